@@ -7,22 +7,22 @@ import scipy
 import numpy as np
 # Import Modules to Find Peak
 import scipy.signal
-# Modules to Plot
-import matplotlib.pyplot as plt
+# Import the Shared Profiler
+from _profilingProtocols import profiler
 
 # ---------------------------------------------------------------------------#
 # ---------------------- Linear Baseline Subtraction  ---------------------- #
 
 class bestLinearFit:
     
-    def __init__(self, samplingFreq):
+    def __init__(self, samplingFreq, minBaselinePoints = 10):
         # Specify peak parameters.
         self.minPeakDuration = samplingFreq*0.02
         self.minPeakDistance = samplingFreq*0.1
         self.samplingFreq = samplingFreq
         self.ignoredBoundaryPoints = 10
         self.minLeftBoundaryInd = 100
-        self.minBaselinePoints = 10
+        self.minBaselinePoints = minBaselinePoints
     
     # ---------------------------------------------------------------------- #
     # ------------------------------ Find Peak ----------------------------- #
@@ -42,6 +42,7 @@ class bestLinearFit:
         # If peaks are found in the data
         if len(peakIndices) == 0 and not deriv:
             # Analyze the peaks in the first derivative.
+            profiler.count("findPeaksDerivativeFallbacks")
             filteredVelocity = scipy.signal.savgol_filter(yData, int(self.samplingFreq*0.05), 3, deriv=1)
             return self.findPeaks(xData, filteredVelocity, deriv = True)
         # If no peaks found, return an empty list.
@@ -81,12 +82,14 @@ class bestLinearFit:
         # Define a threshold for distinguishing good/bad lines
         maxBadPointsTotal = int(self.samplingFreq*0.01)
         goodTangentInd = [[] for _ in range(maxBadPointsTotal)]
+        numBaselinePairs = 0
                 
         # For Each Index Pair on the Left and Right of the Peak
         for rightInd in range(peakInd+2, len(yData), 1):
             for leftInd in range(peakInd-2, -1, -1):
                 if rightInd - leftInd < self.minBaselinePoints:
                     continue
+                numBaselinePairs += 1
 
                 # Draw a Linear Line Between the Points
                 lineSlope = (yData[leftInd] - yData[rightInd])/(xData[leftInd] - xData[rightInd])
@@ -100,6 +103,7 @@ class bestLinearFit:
                 # Define a threshold for distinguishing good/bad lines
                 if numWrongSideOfTangent < maxBadPointsTotal:
                     goodTangentInd[numWrongSideOfTangent].append((lineSlope, leftInd, rightInd))
+        profiler.count("baselinePairsEvaluated", numBaselinePairs)
                     
         # If Nothing Found, Try and Return a Semi-Optimal Tangent Position
         for goodInd in range(maxBadPointsTotal):
@@ -111,6 +115,8 @@ class bestLinearFit:
     # ------------------------- Data Visualization ------------------------- #   
     
     def plotLinearFit(self, potential, current, allLinearFits, allBaselineData, finalPeaks):
+        # Only load matplotlib when plotting.
+        import matplotlib.pyplot as plt
         plt.figure()
         # Plot the signal data
         plt.plot(potential, current, 'k-', linewidth= 2)
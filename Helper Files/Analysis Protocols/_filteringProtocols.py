@@ -15,12 +15,9 @@ With a citation:
 # Basic Modules
 import math
 import numpy as np
-from scipy.linalg import svd
 # Filtering Modules
-import scipy
-# Fourier Transform Modules
-from scipy.fft import rfft,rfftfreq
-from scipy.fft import irfft
+import scipy.signal
+# The SVD (scipy.linalg) and Fourier (scipy.fft) backends are imported when first used.
 
 # -------------------------------------------------------------------------- #
 # ------------------------- Filtering Methods Head ------------------------- #
@@ -39,6 +36,17 @@ class filteringMethods:
 
 class bandPassFilter:
     
+    def __init__(self):
+        # The filter designs already computed: {(order, normalized cutoffs, filterType, output): coefficients}
+        self.filterDesigns = {}
+    
+    def getButterDesign(self, order, normal_cutoff, filterType, output):
+        # Design each filter once (the same cutoff and sampling frequency repeat for every segment).
+        designKey = (order, tuple(np.atleast_1d(normal_cutoff).tolist()), filterType, output)
+        if designKey not in self.filterDesigns:
+            self.filterDesigns[designKey] = scipy.signal.butter(order, normal_cutoff, btype=filterType, analog=False, output=output)
+        return self.filterDesigns[designKey]
+    
     def butterFilter(self, data, cutoffFreq=[0.1, 7], samplingFreq=800, order=3, filterType='bandpass', fastFilt = True):
         """
         Apply a Butterworth filter to a signal.
@@ -72,10 +80,10 @@ class bandPassFilter:
         normal_cutoff = np.asarray(cutoffFreq) / nyq
         
         if fastFilt:
-            sos = scipy.signal.butter(order, normal_cutoff, btype=filterType, analog=False, output='sos')
+            sos = self.getButterDesign(order, normal_cutoff, filterType, 'sos')
             filteredData = scipy.signal.sosfiltfilt(sos, data)
         else:
-            b, a = scipy.signal.butter(order, normal_cutoff, btype=filterType, analog=False, output='ba')
+            b, a = self.getButterDesign(order, normal_cutoff, filterType, 'ba')
             filteredData = scipy.signal.filtfilt(b, a, data)
 
         return filteredData
@@ -136,6 +144,7 @@ class fourierFilter:
         # Extra Padding: Mirror the Data on Both Sides
         f_noisePadded.extend(f_noisePadded[::-1])
         # Tranform the Data into the Frequency Domain
+        from scipy.fft import rfft, rfftfreq, irfft
         n    = len(f_noisePadded)
         yf   = rfft(f_noisePadded)
         xf   = rfftfreq(n, 1/samplingFreq)
@@ -258,6 +267,7 @@ class Denoiser:
         trend = np.linspace(0, gap, sequence.size)
         X = self._embed(sequence-trend, layer)
         # singular value decomposition
+        from scipy.linalg import svd
         self.U, self.s, Vh = svd(X, full_matrices=False, overwrite_a=True, check_finite=False)
         # low-rank approximation
         A = self.U[:,:self.r] @ np.diag(self.s[:self.r]) @ Vh[:self.r]
@@ -279,6 +289,7 @@ class Denoiser:
                 Result of cross validation. True means the detrending procedure is valid.
         '''
         X = self._embed(x, m)
+        from scipy.linalg import svd
         self.U, self.s, self._Vh = svd(X, full_matrices=False, overwrite_a=True, check_finite=False)
         # Search for noise components using the normalized mean total variation of the left singular vectors as an indicator.
         # The procedure runs in batch of every 10 singular vectors.
@@ -392,6 +403,7 @@ class Denoiser:
         
         # Cross Validate
         X = self._embed(sequence - trend, layer)
+        from scipy.linalg import svd
         self.U, self.s, self._Vh = svd(X, full_matrices=False, overwrite_a=True, check_finite=False)
 
         # low-rank approximation by using only signal components
@@ -0,0 +1,185 @@
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Basic Modules
+import os
+import sys
+import json
+import time
+import tracemalloc
+# Peak memory of the process (not available on Windows)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# -------------------------------------------------------------------------- #
+# ------------------------------ Stage Profiler ---------------------------- #
+
+class stageProfiler:
+    """
+    Nested stage timers, per-stage memory peaks, and hot-path counters for each analyzed file.
+    Stages are named by their nesting ("Analyze/getPeaks/analyzeData"). Every file gets a JSON
+    report and the batch gets a summary. While disabled (the default), stage() returns a shared
+    no-op context and count() returns at once. The reports assume one file is processed at a time.
+    
+    The memory of a stage (peakAllocatedMB) is the most memory it allocated above its start, traced
+    with tracemalloc (Python and NumPy allocations in this process; tracing slows the allocations).
+    The file and batch peakMemoryMB are the resident peak of the whole process.
+    """
+
+    def __init__(self):
+        # Specify the report settings.
+        self.enabled = False
+        self.reportFolder = None
+        # Initialize the batch information.
+        self.fileReports = []
+        self.startFile(None)
+
+    def enable(self, reportFolder):
+        self.enabled = True
+        self.reportFolder = reportFolder
+        os.makedirs(reportFolder, exist_ok=True)
+        # Trace the allocations for the stage memory.
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    # ---------------------------------------------------------------------- #
+    # ---------------------------- Measurements ---------------------------- #
+
+    def startFile(self, fileName):
+        # Reset the measurements for a new file.
+        self.fileName = fileName
+        self.stageStack = []
+        self.stagePeaks = []    # The traced peak of every open stage (bytes)
+        self.stageStats = {}    # Stage path -> {"calls", "seconds", "peakAllocatedMB"}
+        self.counters = {}
+        self.fileStartTime = time.perf_counter()
+
+    def stage(self, stageName):
+        if not self.enabled:
+            return nullStage
+        return profiledStage(self, stageName)
+
+    def count(self, counterName, numCounts = 1):
+        if self.enabled:
+            self.counters[counterName] = self.counters.get(counterName, 0) + numCounts
+
+    def getPeakMemory(self):
+        # The peak resident memory of the process so far (MB).
+        if resource is None:
+            return None
+        peakMemory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes; macOS reports bytes.
+        return peakMemory / 1024**2 if sys.platform == "darwin" else peakMemory / 1024
+
+    def addPeakMemory(self, peakMemory):
+        # Count a traced peak in the innermost open stage.
+        if len(self.stagePeaks) != 0:
+            self.stagePeaks[-1] = max(self.stagePeaks[-1], peakMemory)
+
+    def startStageMemory(self):
+        # The traced peak so far belongs to the outer stage; restart the peak for this stage.
+        currentMemory, peakMemory = tracemalloc.get_traced_memory()
+        self.addPeakMemory(peakMemory)
+        self.stagePeaks.append(currentMemory)
+        tracemalloc.reset_peak()
+        return currentMemory
+
+    def finishStageMemory(self):
+        # The peak of this stage (and its inner stages) also counts for the outer stage.
+        currentMemory, peakMemory = tracemalloc.get_traced_memory()
+        stagePeak = max(self.stagePeaks.pop(), peakMemory)
+        self.addPeakMemory(stagePeak)
+        tracemalloc.reset_peak()
+        return stagePeak
+
+    def addStage(self, stagePath, stageTime, allocatedMemory):
+        stageStats = self.stageStats.setdefault(stagePath, {"calls": 0, "seconds": 0.0, "peakAllocatedMB": 0.0})
+        stageStats["calls"] += 1
+        stageStats["seconds"] += stageTime
+        stageStats["peakAllocatedMB"] = max(stageStats["peakAllocatedMB"], allocatedMemory / 1024**2)
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------------- Reports ------------------------------ #
+
+    def finishFile(self):
+        if not self.enabled:
+            return None
+        # Organize the file report.
+        fileReport = {
+            "fileName": self.fileName,
+            "totalSeconds": time.perf_counter() - self.fileStartTime,
+            "peakMemoryMB": self.getPeakMemory(),
+            "stages": self.stageStats,
+            "counters": self.counters,
+        }
+        self.fileReports.append(fileReport)
+        self.saveReport(fileReport, os.path.splitext(str(self.fileName))[0] + ".json")
+        self.startFile(None)
+
+        return fileReport
+
+    def saveSummary(self):
+        if not self.enabled:
+            return None
+        # Add up the stages and counters of every file.
+        batchStages = {}; batchCounters = {}
+        for fileReport in self.fileReports:
+            for stagePath, stageStats in fileReport["stages"].items():
+                batchStats = batchStages.setdefault(stagePath, {"calls": 0, "seconds": 0.0, "peakAllocatedMB": 0.0})
+                batchStats["calls"] += stageStats["calls"]
+                batchStats["seconds"] += stageStats["seconds"]
+                batchStats["peakAllocatedMB"] = max(batchStats["peakAllocatedMB"], stageStats["peakAllocatedMB"])
+            for counterName, numCounts in fileReport["counters"].items():
+                batchCounters[counterName] = batchCounters.get(counterName, 0) + numCounts
+
+        batchSummary = {
+            "numFiles": len(self.fileReports),
+            "totalSeconds": sum(fileReport["totalSeconds"] for fileReport in self.fileReports),
+            "peakMemoryMB": self.getPeakMemory(),
+            "files": {fileReport["fileName"]: fileReport["totalSeconds"] for fileReport in self.fileReports},
+            "stages": batchStages,
+            "counters": batchCounters,
+        }
+        self.saveReport(batchSummary, "batchSummary.json")
+
+        return batchSummary
+
+    def saveReport(self, report, reportName):
+        with open(os.path.join(self.reportFolder, reportName), "w") as reportFile:
+            json.dump(report, reportFile, indent=2)
+
+class profiledStage:
+
+    def __init__(self, profiler, stageName):
+        self.profiler = profiler
+        self.stageName = stageName
+
+    def __enter__(self):
+        self.profiler.stageStack.append(self.stageName)
+        self.stagePath = "/".join(self.profiler.stageStack)
+        self.startMemory = self.profiler.startStageMemory()
+        self.startTime = time.perf_counter()
+        return self
+
+    def __exit__(self, *exceptionInfo):
+        stageTime = time.perf_counter() - self.startTime
+        self.profiler.addStage(self.stagePath, stageTime, self.profiler.finishStageMemory() - self.startMemory)
+        self.profiler.stageStack.pop()
+        return False
+
+class noStage:
+    # The stage used while profiling is disabled.
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exceptionInfo):
+        return False
+
+nullStage = noStage()
+
+# The profiler shared by every module.
+profiler = stageProfiler()
@@ -0,0 +1,98 @@
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Basic Modules
+import numpy as np
+
+# -------------------------------------------------------------------------- #
+# ------------------------ Running Statistics Class ------------------------ #
+
+class runningStatistics:
+    """
+    NaN-aware Welford accumulator for the mean and variance of a data stream.
+    Every prefix result is cached as an array so the full running curve of a
+    series is calculated in one O(N) pass instead of once per prefix.
+    """
+
+    def __init__(self):
+        # Initialize the accumulators.
+        self.resetStatistics()
+
+    def resetStatistics(self):
+        # Welford accumulators (always float64).
+        self.numPoints = 0
+        self.runningMean = 0.0
+        self.sumSquaredDiffs = 0.0
+
+    def addPoint(self, dataPoint):
+        # NaN values do not change the statistics.
+        if np.isnan(dataPoint):
+            return
+
+        # Welford update of the mean and the sum of squared differences.
+        self.numPoints += 1
+        meanDiff = dataPoint - self.runningMean
+        self.runningMean += meanDiff / self.numPoints
+        self.sumSquaredDiffs += meanDiff * (dataPoint - self.runningMean)
+
+    def getVariance(self, ddof = 1):
+        # Not enough points to define the variance.
+        if self.numPoints - ddof <= 0:
+            return np.nan
+        return self.sumSquaredDiffs / (self.numPoints - ddof)
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------- Prefix Statistics -------------------------- #
+
+    def prefixStatistics(self, data, ddof = 1):
+        """
+        Returns the non-NaN count, mean, and variance of data[:ind+1] for every ind.
+        """
+        data = np.asarray(data, dtype=np.float64)
+        # Setup the prefix holders.
+        prefixCounts = np.zeros(len(data), dtype=int)
+        prefixMeans = np.full(len(data), np.nan)
+        prefixVariances = np.full(len(data), np.nan)
+
+        # Accumulate the statistics point by point.
+        self.resetStatistics()
+        for dataInd in range(len(data)):
+            self.addPoint(data[dataInd])
+            # Store the prefix results.
+            prefixCounts[dataInd] = self.numPoints
+            if self.numPoints != 0:
+                prefixMeans[dataInd] = self.runningMean
+            prefixVariances[dataInd] = self.getVariance(ddof)
+
+        return prefixCounts, prefixMeans, prefixVariances
+
+    def coefficientOfVariation(self, peakCurrents):
+        """
+        Running coefficient of variation (%) of the peak current for every cycle.
+            NaN: The peak was not found in this cycle.
+            0: Less than two peaks have been found up to this cycle.
+        """
+        peakCurrents = np.asarray(peakCurrents, dtype=np.float64)
+        prefixCounts, prefixMeans, prefixVariances = self.prefixStatistics(peakCurrents, ddof = 1)
+
+        # Calculate the CoV of the peak current
+        with np.errstate(divide='ignore', invalid='ignore'):
+            peakCoV = np.sqrt(prefixVariances) / np.abs(prefixMeans) * 100
+        # Label the cycles without enough information.
+        peakCoV[prefixCounts <= 1] = 0
+        peakCoV[np.isnan(peakCurrents)] = np.nan
+
+        return peakCoV
+
+    def groupCoefficientOfVariation(self, bothPeakCurrentGroups):
+        """
+        bothPeakCurrentGroups Dim: 2, # groups, # frames
+        bothPeakCoVGroups Dim: 2, # groups, # frames
+        """
+        bothPeakCoVGroups = []
+        # For the oxidation and reduction peaks.
+        for peakCurrentGroups in bothPeakCurrentGroups:
+            peakCoVGroups = [self.coefficientOfVariation(peakCurrents) for peakCurrents in peakCurrentGroups]
+            bothPeakCoVGroups.append(np.asarray(peakCoVGroups))
+
+        return bothPeakCoVGroups
@@ -7,13 +7,12 @@ import numpy as np
 # Import Modules to Find Peak
 import scipy.signal
 from scipy.signal import savgol_filter
-# Modules to Plot
-import matplotlib.pyplot as plt
 
 # Import filtering file
 import _baselineProtocols   # Import class with baseline methods.
 import _filteringProtocols  # Import class with filtering methods.
 import _universalProtocols
+from _profilingProtocols import profiler
 
 # -------------------------------------------------------------------------- #
 # ------------------------------ CV Protocol ------------------------------- #
@@ -23,6 +22,7 @@ class cvProtocol():
     def __init__(self):
         # CV parameters.
         self.lowPassCutoff = 100
+        self.minBaselinePoints = 10     # The fewest points between the two baseline points.
         
         # Define general classes to process data.
         self.filteringMethods = _filteringProtocols.filteringMethods()
@@ -34,6 +34,37 @@ class cvProtocol():
         if len(initialScanDeriv)/2 < (initialScanDeriv > 0).sum():
             return False
         return True
+    
+    def filterSegments(self, potentials, currents):
+        """
+        Filters a stack of CV segments (# segments, # points) with one vectorized pass per
+        sampling frequency, exactly as analyzeData filters a single segment.
+        Returns the filtered currents, their first derivatives, and the scan direction and
+        sampling frequency of every segment.
+        """
+        potentials = np.asarray(potentials, dtype=np.float64)
+        currents = np.asarray(currents, dtype=np.float64)
+        filteredCurrents = np.empty(currents.shape); firstDerivs = np.empty(currents.shape)
+        reductiveScans = np.zeros(len(currents), dtype=bool)
+        
+        profiler.count("segmentsFiltered", len(currents))
+        # Filter the segments with the same sampling frequency together.
+        samplingFreqs = np.abs(potentials.shape[1]/(potentials[:, -1] - potentials[:, 0]))
+        for samplingFreq in np.unique(samplingFreqs):
+            segmentMask = samplingFreqs == samplingFreq
+            # Apply a Low Pass Filter
+            current = self.filteringMethods.bandPassFilter.butterFilter(currents[segmentMask], self.lowPassCutoff, samplingFreq, order = 3, filterType = 'low')
+            # Apply smoothing
+            current = savgol_filter(current, max(5, int(samplingFreq*0.01)), 3)
+            # Calculate the derivative of the CV curve.
+            firstDeriv = savgol_filter(current, int(samplingFreq*0.1), 3, deriv = 1)
+            
+            # Check if the data is oxidative or reductive.
+            initialScanDerivs = firstDeriv[:, 0:int(samplingFreq*0.1)]
+            reductiveScans[segmentMask] = ~(initialScanDerivs.shape[1]/2 < (initialScanDerivs > 0).sum(axis=1))
+            filteredCurrents[segmentMask] = current; firstDerivs[segmentMask] = firstDeriv
+        
+        return filteredCurrents, firstDerivs, reductiveScans, samplingFreqs
             
     def flipReductiveData(self, potential = [], allCurrents =  []):
         # Flip the reductive scan in the positive direction.
@@ -53,27 +84,77 @@ class cvProtocol():
         linearFit = lineSlope*xData + slopeIntercept
         
         return linearFit
-    
-    def analyzeData(self, potential, current, plotResult = False):
+
+    def getBaselineLine(self, potential, linearFit, reductiveScan):
+        """
+        Returns the (slope, intercept) of a baseline fit from analyzeData. The fit is a line in
+        the potential the peak was analyzed in (flipped and with negated current if reductive).
+        """
+        potential = np.asarray(potential); linearFit = np.asarray(linearFit)
+        # Undo the conversion back to reductive data.
+        if reductiveScan:
+            potential, [linearFit] = self.flipReductiveData(potential, [linearFit])
+        lineSlope = (linearFit[-1] - linearFit[0])/(potential[-1] - potential[0])
+        slopeIntercept = linearFit[0] - lineSlope*potential[0]
+
+        return lineSlope, slopeIntercept
+
+    def getBaselineFit(self, potential, baselineLine, reductiveScan):
+        # Recreate the baseline fit from getBaselineLine in the same format as analyzeData.
+        lineSlope, slopeIntercept = baselineLine
         potential = np.asarray(potential)
-        current = np.asarray(current)
+        if reductiveScan:
+            potential = np.flip(potential)
+        linearFit = lineSlope*potential + slopeIntercept
 
-        # ------------------------- Filter the Data ------------------------ #
-        # Apply a Low Pass Filter
-        samplingFreq = abs(len(potential)/(potential[-1] - potential[0]))
-        current = self.filteringMethods.bandPassFilter.butterFilter(current, self.lowPassCutoff, samplingFreq, order = 3, filterType = 'low')
+        # Convert the fit back to reductive data.
+        if reductiveScan:
+            linearFit = -linearFit
+        return linearFit
 
-        # Apply smoothing
-        current = savgol_filter(current, max(5, int(samplingFreq*0.01)), 3)
-        # ------------------------------------------------------------------ #
+    def analyzeData(self, potential, current, plotResult = False):
+        potential = np.asarray(potential)
+        current, firstDeriv, reductiveScan, samplingFreq = self.filterData(potential, current)
         
-        # ------------------------- Check if OX/Red ------------------------ #
-        # Calculate the derivative of the CV curve.
-        firstDeriv = savgol_filter(current, int(samplingFreq*0.1), 3, deriv = 1)
+        return self.analyzeFilteredData(potential, current, firstDeriv, reductiveScan, samplingFreq, plotResult)
+    
+    def filterData(self, potential, current):
+        """
+        Filters one segment. Returns the filtered current, its first derivative, and the scan direction and sampling frequency.
+        """
+        potential = np.asarray(potential)
+        current = np.asarray(current)
+
+        with profiler.stage("filtering"):
+            # ------------------------- Filter the Data ------------------------ #
+            # Apply a Low Pass Filter
+            samplingFreq = abs(len(potential)/(potential[-1] - potential[0]))
+            current = self.filteringMethods.bandPassFilter.butterFilter(current, self.lowPassCutoff, samplingFreq, order = 3, filterType = 'low')
+    
+            # Apply smoothing
+            current = savgol_filter(current, max(5, int(samplingFreq*0.01)), 3)
+            # ------------------------------------------------------------------ #
+            
+            # ------------------------- Check if OX/Red ------------------------ #
+            # Calculate the derivative of the CV curve.
+            firstDeriv = savgol_filter(current, int(samplingFreq*0.1), 3, deriv = 1)
+            
+            # Check if the data is oxidative or reductive.
+            reductiveScan = self.isReductiveScan(firstDeriv, samplingFreq)
+            # ------------------------------------------------------------------ #
         
-        # Check if the data is oxidative or reductive.
-        reductiveScan = self.isReductiveScan(firstDeriv, samplingFreq)
+        return current, firstDeriv, reductiveScan, samplingFreq
+    
+    def analyzeFilteredData(self, potential, current, firstDeriv, reductiveScan, samplingFreq, plotResult = False):
+        """
+        Finds the peaks and baselines of one segment after filterSegments (or the filtering in analyzeData).
+        """
+        potential = np.asarray(potential, dtype=np.float64)
+        reductiveScan = bool(reductiveScan)
+        # The (leftBaselineInd, rightBaselineInd, peakInd) of each peak found, to refit similar segments (see refitPeaks).
+        self.baselinePairs = []
         
+        # ------------------------- Check if OX/Red ------------------------ #
         # If reduction.
         if reductiveScan:
             # Analyze the data as oxidative.
@@ -82,10 +163,12 @@ class cvProtocol():
 
         # --------------------- Find the Chemical Peak --------------------- #
         # Initialize baseline subtraction classes.
-        self.linearBaselineFit = _baselineProtocols.bestLinearFit(samplingFreq)
+        self.linearBaselineFit = _baselineProtocols.bestLinearFit(samplingFreq, self.minBaselinePoints)
         
         # Find Peaks in the Data
-        peakIndices = self.linearBaselineFit.findPeaks(potential, current)
+        profiler.count("segmentsAnalyzed")
+        with profiler.stage("findPeaks"):
+            peakIndices = self.linearBaselineFit.findPeaks(potential, current)
         # Return None if No Peak Found
         if len(peakIndices) == 0:
             print("\tNo Peak Found in Data")
@@ -113,7 +196,8 @@ class cvProtocol():
                 continue
             
             # Find the baseline and perform a linear baseline fit.
-            leftBaselineInd, rightBaselineInd = self.linearBaselineFit.findLinearBaseline(potential[lastPeakInd:peakInd], current[lastPeakInd:peakInd], midBaselineInd)
+            with profiler.stage("findLinearBaseline"):
+                leftBaselineInd, rightBaselineInd = self.linearBaselineFit.findLinearBaseline(potential[lastPeakInd:peakInd], current[lastPeakInd:peakInd], midBaselineInd)
             if leftBaselineInd == None: continue
             linearFit = self.findLinearFit(potential, current, leftBaselineInd, rightBaselineInd)
 
@@ -167,6 +251,7 @@ class cvProtocol():
             peakPotentials.append(peakPotential)
             allBaselineData.append(baselineData)
             allLinearFitBounds.append([leftBaselineInd, peakInd])
+            self.baselinePairs.append((leftBaselineInd, rightBaselineInd, peakInd))
             
         # If reduction.
         if reductiveScan:
@@ -176,11 +261,56 @@ class cvProtocol():
         
         # ----------------------- Extract Information ---------------------- #
         allLinearFitBounds = np.array(allLinearFitBounds)
+        profiler.count("peaksFound", len(finalPeaks))
         
         if plotResult:
             self.linearBaselineFit.plotLinearFit(potential, current, allLinearFits, allBaselineData, finalPeaks)
         # ------------------------------------------------------------------ #
         
         return allLinearFits, peakPotentials, peakCurrents, allLinearFitBounds, reductiveScan
+    
+    def refitPeaks(self, potential, current, reductiveScan, baselinePairs):
+        """
+        Refits the peaks of a filtered segment with the baseline points found in a similar segment
+        (analyzeFilteredData's baselinePairs), skipping the peak and baseline searches. Each peak is
+        moved to the nearby maximum above the new baseline. Returns the analyzeFilteredData output,
+        or None if a refit peak reaches the end of the segment (the segment needs a full analysis).
+        """
+        potential = np.asarray(potential, dtype=np.float64)
+        # Analyze the data as oxidative.
+        if reductiveScan:
+            potential, [current] = self.flipReductiveData(potential, [current])
+        
+        allLinearFits, peakPotentials, peakCurrents, allLinearFitBounds = [], [], [], []
+        for leftBaselineInd, rightBaselineInd, peakInd in baselinePairs:
+            # Refit the baseline and readjust the chemical peak.
+            linearFit = self.findLinearFit(potential, current, leftBaselineInd, rightBaselineInd)
+            baselineData = current - linearFit
+            peakInd = self.universalMethods.findLocalMax(baselineData, peakInd, binarySearchWindow = 5)
+            if peakInd == len(potential) - 1:
+                return None
+            
+            # Organize the peak information (as in analyzeFilteredData).
+            peakCurrent = baselineData[peakInd]
+            if reductiveScan:
+                flippedPotential, [baselineData, linearFit] = self.flipReductiveData(potential.copy(), [baselineData, linearFit])
+                peakPotential = flippedPotential[peakInd]
+            else:
+                peakPotential = potential[peakInd]
+            allLinearFits.append(linearFit)
+            peakCurrents.append(peakCurrent)
+            peakPotentials.append(peakPotential)
+            allLinearFitBounds.append([leftBaselineInd, peakInd])
+        
+        return allLinearFits, peakPotentials, peakCurrents, np.array(allLinearFitBounds), reductiveScan
+    
+    def getSegmentChange(self, rawCurrent, filteredCurrent, referenceCurrent):
+        """
+        The RMS difference between two filtered segments in units of the measurement noise
+        (the RMS of the raw minus the filtered current).
+        """
+        noiseLevel = np.sqrt(np.mean((np.asarray(rawCurrent) - filteredCurrent)**2))
+        segmentChange = np.sqrt(np.mean((filteredCurrent - referenceCurrent)**2))
+        return segmentChange / max(noiseLevel, np.finfo(float).tiny)
 
 
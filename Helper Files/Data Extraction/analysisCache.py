@@ -0,0 +1,120 @@
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import os
+import sys
+import json
+import zipfile
+import hashlib
+
+# Import Python Files for Saved Results
+import resultsProcessing
+
+# -------------------------------------------------------------------------- #
+# --------------------------- Analysis Memo Cache -------------------------- #
+
+class analysisCache:
+    """
+    On-disk memo cache of the full processData.processCV output. A cache entry is
+    keyed by the bytes of the data file, every analysis parameter, and the source
+    code of the analysis modules, so any change to the data, the settings, or the
+    algorithm gives a new key. The least recently used entries are deleted when
+    the cache grows past maxCacheSize (bytes).
+    """
+
+    def __init__(self, cacheFolder, maxCacheSize = 2*1024**3):
+        # Specify the cache location and size.
+        self.cacheFolder = cacheFolder
+        self.maxCacheSize = maxCacheSize
+        os.makedirs(cacheFolder, exist_ok=True)
+
+        # The cached results use the saved results format.
+        self.analysisResults = resultsProcessing.analysisResults()
+        # The modules that define the analysis algorithm.
+        self.analysisModules = ["processDataCV", "cvAnalysis", "_baselineProtocols", "_filteringProtocols", "_universalProtocols"]
+        self.algorithmFingerprint = None
+
+    # ---------------------------------------------------------------------- #
+    # ----------------------------- Cache Keys ----------------------------- #
+
+    def getFileHash(self, dataFile, blockSize = 2**20):
+        # Hash the contents of the file in blocks.
+        fileHash = hashlib.sha256()
+        with open(dataFile, "rb") as openFile:
+            for fileBlock in iter(lambda: openFile.read(blockSize), b""):
+                fileHash.update(fileBlock)
+        return fileHash.hexdigest()
+
+    def getAlgorithmFingerprint(self):
+        # Hash the source code of the (already imported) analysis modules once.
+        if self.algorithmFingerprint is None:
+            sourceHash = hashlib.sha256(str(self.analysisResults.resultsVersion).encode())
+            for moduleName in self.analysisModules:
+                with open(sys.modules[moduleName].__file__, "rb") as sourceFile:
+                    sourceHash.update(sourceFile.read())
+            self.algorithmFingerprint = sourceHash.hexdigest()
+        return self.algorithmFingerprint
+
+    def getParameters(self, analyzeDataCV):
+        # Every setting that changes the processCV output.
+        analysisParameters = {
+            "numInitCyclesToSkip": analyzeDataCV.numInitCyclesToSkip,
+            "useCHIPeaks": analyzeDataCV.useCHIPeaks,
+            "scaleCurrent": analyzeDataCV.scaleCurrent,
+            "maxPeakPotentialDeviation": analyzeDataCV.maxPeakPotentialDeviation,
+            "lowPassCutoff": analyzeDataCV.analyzeCV.lowPassCutoff,
+            "minBaselinePoints": analyzeDataCV.analyzeCV.minBaselinePoints,
+            "storageType": analyzeDataCV.storageType.__name__,
+            "raggedCyclePolicy": analyzeDataCV.raggedCyclePolicy,
+            "maxSegmentOverrun": analyzeDataCV.maxSegmentOverrun,
+        }
+        # The segment reuse only changes the peaks found by the analysis (processData asserts the paths it runs in).
+        if analyzeDataCV.reuseUnchangedCycles and not analyzeDataCV.useCHIPeaks:
+            analysisParameters.update(reuseUnchangedCycles = True, maxCycleChange = analyzeDataCV.maxCycleChange)
+        return analysisParameters
+
+    def getCacheKey(self, dataFile, analyzeDataCV):
+        # Combine the data, parameter, and algorithm fingerprints.
+        cacheKey = hashlib.sha256()
+        cacheKey.update(self.getFileHash(dataFile).encode())
+        cacheKey.update(json.dumps(self.getParameters(analyzeDataCV), sort_keys=True).encode())
+        cacheKey.update(self.getAlgorithmFingerprint().encode())
+        return cacheKey.hexdigest()
+
+    # ---------------------------------------------------------------------- #
+    # ---------------------------- Cache Access ---------------------------- #
+
+    def loadAnalysis(self, cacheKey):
+        """
+        Returns the processCV output for this key, or None if it was never cached.
+        """
+        cacheFile = self.analysisResults.getResultsFile(self.cacheFolder, cacheKey)
+        try:
+            cachedResults = self.analysisResults.loadResults(cacheFile)
+        except (OSError, EOFError, ValueError, KeyError, AssertionError, zipfile.BadZipFile):
+            return None
+        # Mark the entry as recently used.
+        os.utime(cacheFile)
+        return cachedResults
+
+    def saveAnalysis(self, cacheKey, bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups,
+                     currentFrames, potentialFrames, timeFrames):
+        self.analysisResults.saveResults(bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups,
+                                         currentFrames, potentialFrames, timeFrames, self.cacheFolder, cacheKey)
+        self.evictEntries()
+
+    def evictEntries(self):
+        # Find the cached entries.
+        cacheEntries = []
+        for cacheFile in self.analysisResults.getResultFiles(self.cacheFolder):
+            fileStats = os.stat(self.cacheFolder + cacheFile)
+            cacheEntries.append((fileStats.st_mtime, fileStats.st_size, cacheFile))
+
+        # Delete the least recently used entries until the cache fits.
+        cacheSize = sum(cacheEntry[1] for cacheEntry in cacheEntries)
+        for lastUsed, fileSize, cacheFile in sorted(cacheEntries):
+            if cacheSize <= self.maxCacheSize:
+                break
+            os.remove(self.cacheFolder + cacheFile)
+            cacheSize -= fileSize
@@ -0,0 +1,171 @@
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import os
+import json
+import stat
+import time
+import socket
+import asyncio
+import tempfile
+import traceback
+
+def getSocketFolder():
+    # The user's runtime folder, or a folder in the temporary directory that only this user can open.
+    runtimeFolder = os.environ.get("XDG_RUNTIME_DIR")
+    if runtimeFolder and os.path.isdir(runtimeFolder):
+        return runtimeFolder
+    socketFolder = os.path.join(tempfile.gettempdir(), "cvAnalysisServer-" + str(os.getuid()))
+    os.makedirs(socketFolder, mode = 0o700, exist_ok = True)
+    # Never use a folder another user made (or could write to) in the shared directory.
+    folderInfo = os.lstat(socketFolder)
+    if not stat.S_ISDIR(folderInfo.st_mode) or folderInfo.st_uid != os.getuid() or stat.S_IMODE(folderInfo.st_mode) & 0o077:
+        raise PermissionError("The socket folder " + socketFolder + " must be a directory owned by this user with no group or other access")
+    return socketFolder
+
+# The socket the server listens on when no other path is given.
+defaultSocketPath = os.path.join(getSocketFolder(), "cvAnalysisServer.sock")
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Analysis Server ----------------------------- #
+
+class analysisServer:
+    """
+    Keeps the analysis classes loaded in one process and analyzes the files sent over a Unix socket, so
+    scripted runs skip the interpreter startup, the imports, and the cold caches. Each connection sends one
+    JSON request per line and gets one JSON response per line:
+        {"command": "ping"}                                         -> the server state
+        {"command": "analyze", "dataFiles": [...], "options": {}}   -> the result of every file, in order
+        {"command": "shutdown"}                                     -> stops the server after the running files
+    The files are analyzed by maxConcurrent workers, each running analyzeFile(dataFile, workerInd, options)
+    in a thread; it returns a JSON-serializable summary of the file.
+    """
+
+    def __init__(self, analyzeFile, socketPath = defaultSocketPath, maxConcurrent = 1):
+        # Specify the analysis and where to listen.
+        self.analyzeFile = analyzeFile
+        self.socketPath = socketPath
+        self.maxConcurrent = maxConcurrent
+
+        # The server state.
+        self.startTime = time.monotonic()
+        self.numFilesAnalyzed = 0; self.numFilesFailed = 0
+        self.shutdownEvent = None; self.freeWorkers = None
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------------ Requests ------------------------------ #
+
+    async def analyzeDataFile(self, dataFile, options):
+        eventLoop = asyncio.get_running_loop()
+        # Wait for a free worker (its analysis classes are used by one file at a time).
+        workerInd = await self.freeWorkers.get()
+        print("\nAnalyzing Submitted Data:", dataFile)
+        startTime = time.perf_counter()
+        try:
+            if not os.path.isfile(dataFile):
+                raise FileNotFoundError(dataFile)
+            # Analyze off the event loop so other clients are still answered.
+            fileResult = await eventLoop.run_in_executor(None, self.analyzeFile, dataFile, workerInd, options)
+            self.numFilesAnalyzed += 1
+            return dict(dataFile = dataFile, status = "done", seconds = round(time.perf_counter() - startTime, 3), error = None, result = fileResult)
+        except (Exception, SystemExit) as analysisError:
+            traceback.print_exc()
+            self.numFilesFailed += 1
+            return dict(dataFile = dataFile, status = "failed", seconds = round(time.perf_counter() - startTime, 3), error = repr(analysisError), result = None)
+        finally:
+            self.freeWorkers.put_nowait(workerInd)
+
+    async def handleRequest(self, request):
+        command = request.get("command")
+        if command == "ping":
+            return dict(status = "ok", pid = os.getpid(), uptime = round(time.monotonic() - self.startTime, 3), maxConcurrent = self.maxConcurrent,
+                        filesAnalyzed = self.numFilesAnalyzed, filesFailed = self.numFilesFailed)
+        elif command == "analyze":
+            fileResults = await asyncio.gather(*[self.analyzeDataFile(dataFile, request.get("options", {})) for dataFile in request.get("dataFiles", [])])
+            return dict(status = "ok" if all(fileResult["status"] == "done" for fileResult in fileResults) else "failed", files = fileResults)
+        elif command == "shutdown":
+            self.shutdownEvent.set()
+            return dict(status = "ok")
+        return dict(status = "failed", error = "Unknown command: " + repr(command))
+
+    async def handleClient(self, reader, writer):
+        try:
+            while not reader.at_eof():
+                requestLine = await reader.readline()
+                if not requestLine.strip():
+                    continue
+                try:
+                    response = await self.handleRequest(json.loads(requestLine))
+                except json.JSONDecodeError as requestError:
+                    response = dict(status = "failed", error = "Invalid request: " + str(requestError))
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # The client left, or the server is shutting down.
+            pass
+        finally:
+            writer.close()
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------------- Serving ------------------------------ #
+
+    def removeStaleSocket(self):
+        # Reuse the path of a server that did not shut down cleanly, but never take over a running one.
+        if os.path.exists(self.socketPath):
+            if isServerRunning(self.socketPath):
+                raise RuntimeError("An analysis server is already listening on " + self.socketPath)
+            os.remove(self.socketPath)
+
+    async def serve(self):
+        self.shutdownEvent = asyncio.Event()
+        self.freeWorkers = asyncio.Queue()
+        for workerInd in range(self.maxConcurrent):
+            self.freeWorkers.put_nowait(workerInd)
+
+        self.removeStaleSocket()
+        # Only this user can connect (the socket is made private before anyone can reach it).
+        previousUmask = os.umask(0o177)
+        try:
+            cvServer = await asyncio.start_unix_server(self.handleClient, path = self.socketPath)
+        finally:
+            os.umask(previousUmask)
+        os.chmod(self.socketPath, 0o600)
+        print("Listening on:", self.socketPath)
+        try:
+            async with cvServer:
+                await self.shutdownEvent.wait()
+        finally:
+            if os.path.exists(self.socketPath):
+                os.remove(self.socketPath)
+
+    def run(self):
+        # Serve until a shutdown request or Ctrl-C.
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        print("\nStopped the Analysis Server")
+
+# -------------------------------------------------------------------------- #
+# -------------------------------- Client ---------------------------------- #
+
+def sendRequest(request, socketPath = defaultSocketPath, timeout = None):
+    # Send one request to the server and wait for its response.
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as clientSocket:
+        clientSocket.settimeout(timeout)
+        clientSocket.connect(socketPath)
+        clientSocket.sendall((json.dumps(request) + "\n").encode())
+        responseLine = b""
+        while not responseLine.endswith(b"\n"):
+            responseChunk = clientSocket.recv(65536)
+            if not responseChunk:
+                raise ConnectionError("The analysis server closed the connection")
+            responseLine += responseChunk
+    return json.loads(responseLine)
+
+def isServerRunning(socketPath = defaultSocketPath):
+    try:
+        return sendRequest({"command": "ping"}, socketPath, timeout = 5)["status"] == "ok"
+    except (OSError, ValueError):
+        return False
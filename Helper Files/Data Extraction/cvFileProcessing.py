@@ -0,0 +1,234 @@
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import os
+import sys
+import threading
+import numpy as np
+
+# Import the Shared Profiler
+sys.path.append('./Helper Files/Analysis Protocols/')
+from _profilingProtocols import profiler
+
+# Import Python Files for Data Extraction (dataPlotting and matplotlib are imported only when a movie is rendered)
+import excelProcessing
+import processDataCV
+import resultsProcessing
+import resultsDatabase
+import analysisCache
+
+# -------------------------------------------------------------------------- #
+# --------------------------- CV File Processing --------------------------- #
+
+class cvFileProcessor:
+    """
+    The per-file steps of every CV protocol (mainProtocol.py, watchProtocol.py, serverProtocol.py): extract, analyze,
+    render, and save, so the protocols only differ in how the files arrive. Each step takes and returns the file's
+    fileInfo dict, so the steps can also run as pipeline stages; processFile runs every step for one file.
+        analysisSettings: The processDataCV.processData keywords (numInitCyclesToSkip, useCHIPeaks, compactStorage, ...).
+        movieSettings: The dataPlotting.plotDataCV keywords except fileName/outputDirectory (plotMovies = False: no movies).
+    The outputs of each data file are saved in "<its folder>CV Analysis/". With numWorkers > 1, files run at the same time
+    in threads (each worker has its own analysis classes); the movies and the saved files are written one at a time.
+    With numAnalysisWorkers > 1 one process pool is shared by every worker (see startAnalysisPool).
+    """
+
+    def __init__(self, analysisSettings, movieSettings, plotMovies = True, exportFormats = ("xlsx",), useAnalysisCache = True,
+                 analysisCacheFolder = "./Analysis Cache/", maxAnalysisCacheSize = 2*1024**3, progressiveAnalysis = False,
+                 numQuickLookCycles = 20, quickLookSpacing = "log", numWorkers = 1):
+        # Specify the steps of each file.
+        self.analysisSettings = dict(analysisSettings)
+        self.movieSettings = dict(movieSettings)
+        self.plotMovies = plotMovies
+        self.exportFormats = exportFormats
+        self.useAnalysisCache = useAnalysisCache
+        self.progressiveAnalysis = progressiveAnalysis
+        self.numQuickLookCycles = numQuickLookCycles
+        self.quickLookSpacing = quickLookSpacing
+
+        # Initialize the shared classes.
+        self.saveData = excelProcessing.saveData()
+        self.analysisResults = resultsProcessing.analysisResults()
+        self.cachedAnalyses = analysisCache.analysisCache(analysisCacheFolder, maxAnalysisCacheSize)
+        # Each worker analyzes with its own classes (the CV analysis keeps state while analyzing).
+        self.workerClasses = [(excelProcessing.processFiles(), processDataCV.processData(**self.analysisSettings)) for workerInd in range(numWorkers)]
+        # Keep one segment analysis pool open for every worker.
+        self.analysisPool = None
+        if self.analysisSettings.get("numAnalysisWorkers", 1) > 1:
+            self.analysisPool = processDataCV.startAnalysisPool(self.analysisSettings["numAnalysisWorkers"])
+            for extractData, analyzeDataCV in self.workerClasses:
+                analyzeDataCV.analysisPool = self.analysisPool
+        # The movies, the cache, and the databases are used by one worker at a time.
+        self.renderLock = threading.Lock(); self.saveLock = threading.Lock()
+        # The database with the peaks of every experiment in each data folder (opened when first used).
+        self.peakDatabases = {}
+
+    def getFileInfo(self, dataFile, workerInd = 0):
+        dataDirectory, currentFile = os.path.split(dataFile); dataDirectory = os.path.join(dataDirectory, "")
+        return {"fileName": os.path.splitext(currentFile)[0], "dataFile": dataFile, "dataDirectory": dataDirectory,
+                "outputDirectory": dataDirectory + "CV Analysis/", "workerInd": workerInd, "cachedResults": None, "usedCache": False}
+
+    def getPeakDatabase(self, fileInfo):
+        # Open the database of this data folder once (call with the saveLock).
+        dataDirectory = fileInfo["dataDirectory"]
+        if dataDirectory not in self.peakDatabases:
+            os.makedirs(fileInfo["outputDirectory"] + "Peak Information/", exist_ok = True)
+            self.peakDatabases[dataDirectory] = resultsDatabase.resultsDatabase(fileInfo["outputDirectory"] + "Peak Information/cvPeaks.sqlite")
+        return self.peakDatabases[dataDirectory]
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------------ File Steps ---------------------------- #
+
+    def extractFile(self, dataFile, workerInd = 0):
+        # ------------------------ Extract the Data ------------------------ #
+        fileInfo = self.getFileInfo(dataFile, workerInd)
+        extractData, analyzeDataCV = self.workerClasses[workerInd]
+        # Reuse the analysis if this file was already analyzed with the same settings.
+        if self.useAnalysisCache:
+            fileInfo["cacheKey"] = self.cachedAnalyses.getCacheKey(dataFile, analyzeDataCV)
+            with self.saveLock: fileInfo["cachedResults"] = self.cachedAnalyses.loadAnalysis(fileInfo["cacheKey"])
+            fileInfo["usedCache"] = fileInfo["cachedResults"] is not None
+        if fileInfo["cachedResults"] is None:
+            # Convert and read the data file in an XLSX format (a changed TXT/CSV export is converted again).
+            with profiler.stage("getExcelFile"):
+                fileInfo["xlWorksheet"], fileInfo["xlWorkbook"] = extractData.getExcelFile(dataFile, fileInfo["outputDirectory"], testSheetNum = 0, excelDelimiter = ",")
+        # ------------------------------------------------------------------ #
+        return fileInfo
+
+    def analyzeFile(self, fileInfo):
+        # ------------------------ Analyze the Data ------------------------ #
+        if fileInfo["cachedResults"] is not None:
+            print("\tUsing the Cached Analysis")
+            fileInfo["analysisResults"] = fileInfo.pop("cachedResults")
+            return fileInfo
+        extractData, analyzeDataCV = self.workerClasses[fileInfo["workerInd"]]
+        fileInfo.pop("cachedResults")
+        if self.progressiveAnalysis:
+            # Save the provisional peaks as the cycles are backfilled.
+            def saveQuickLook(progressResults):
+                self.saveData.saveDataCV(progressResults["bothPeakPotentialGroups"], progressResults["bothPeakCurrentGroups"], progressResults["bothBaselineBoundsGroups"],
+                                         progressResults["bothBaselineFitGroups"], fileInfo["outputDirectory"] + "Peak Information/Quick Look/", fileInfo["fileName"] + ".xlsx", exportFormats = ("csv",))
+            fileInfo["analysisResults"] = analyzeDataCV.processCVProgressive(fileInfo.pop("xlWorksheet"), fileInfo.pop("xlWorkbook"), saveQuickLook,
+                                                                             self.numQuickLookCycles, self.quickLookSpacing)
+        else:
+            fileInfo["analysisResults"] = analyzeDataCV.processCV(fileInfo.pop("xlWorksheet"), fileInfo.pop("xlWorkbook"))
+        # Cache the analysis for the next run.
+        if self.useAnalysisCache:
+            with self.saveLock: self.cachedAnalyses.saveAnalysis(fileInfo["cacheKey"], *fileInfo["analysisResults"])
+        # ------------------------------------------------------------------ #
+        return fileInfo
+
+    def analyzeReplicates(self, allFileInfo):
+        # -------------------- Analyze the Data Together ------------------- #
+        extractData, analyzeDataCV = self.workerClasses[0]
+        newFiles = [fileInfo for fileInfo in allFileInfo if fileInfo["cachedResults"] is None]
+        allAnalysisResults = analyzeDataCV.processCVReplicates([fileInfo.pop("xlWorksheet") for fileInfo in newFiles], [fileInfo.pop("xlWorkbook") for fileInfo in newFiles])
+        for fileInfo, analysisResults in zip(newFiles, allAnalysisResults):
+            fileInfo["analysisResults"] = analysisResults
+            fileInfo.pop("cachedResults")
+            # Cache the analysis for the next run.
+            if self.useAnalysisCache:
+                with self.saveLock: self.cachedAnalyses.saveAnalysis(fileInfo["cacheKey"], *analysisResults)
+        # Use the cached analysis of the other files.
+        for fileInfo in allFileInfo:
+            if "analysisResults" not in fileInfo:
+                self.analyzeFile(fileInfo)
+        # ------------------------------------------------------------------ #
+        return allFileInfo
+
+    def renderFile(self, fileInfo, plotMovies = True):
+        # ------------------------- Plot the Data -------------------------- #
+        fileInfo["renderedMovie"] = self.plotMovies and plotMovies
+        if not fileInfo["renderedMovie"]:
+            return fileInfo
+        import dataPlotting
+        bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, \
+            currentFrames, potentialFrames, timeFrames = fileInfo["analysisResults"]
+        # Plot the CV Data
+        with self.renderLock:
+            plotData = dataPlotting.plotDataCV(fileInfo["fileName"], fileInfo["outputDirectory"], **self.movieSettings)
+            plotData.plotCurves(potentialFrames, currentFrames, timeFrames, bothPeakPotentialGroups,
+                                bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups)
+            # Free the figure (one is made per file; parallel rendering makes none here).
+            if plotData.figure is not None:
+                dataPlotting.plt.close(plotData.figure)
+        # ------------------------------------------------------------------ #
+        return fileInfo
+
+    def saveFile(self, fileInfo):
+        # ------------------------- Save the Data -------------------------- #
+        fileName, outputDirectory = fileInfo["fileName"], fileInfo["outputDirectory"]
+        bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, \
+            currentFrames, potentialFrames, timeFrames = fileInfo["analysisResults"]
+        with self.saveLock:
+            # Save the analysis results to re-render without reanalyzing (see renderProtocol.py).
+            self.analysisResults.saveResults(bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups,
+                                             currentFrames, potentialFrames, timeFrames, outputDirectory + "Analysis Results/", fileName)
+            # Add the peaks to the database (one transaction per file).
+            self.getPeakDatabase(fileInfo).saveExperiment(bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups,
+                                                          currentFrames, fileName, fileInfo["dataDirectory"], self.analysisSettings["numInitCyclesToSkip"],
+                                                          self.analysisSettings["useCHIPeaks"])
+            # Save the Peak Information
+            with profiler.stage("saveDataCV"):
+                self.saveData.saveDataCV(bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups,
+                                         outputDirectory + "Peak Information/", fileName + ".xlsx", sheetName = "CV Analysis", exportFormats = self.exportFormats)
+        # ------------------------------------------------------------------ #
+        return fileInfo
+
+    def processFile(self, dataFile, workerInd = 0, plotMovies = True):
+        # Analyze one file; the peaks are saved before the movie so they are ready first.
+        fileInfo = self.analyzeFile(self.extractFile(dataFile, workerInd))
+        return self.renderFile(self.saveFile(fileInfo), plotMovies)
+
+    def streamFile(self, dataFile):
+        # ---------------------- Analyze Cycle by Cycle -------------------- #
+        assert dataFile.endswith((".txt", ".csv")), "Only CHI TXT/CSV files can be streamed: " + dataFile
+        fileInfo = self.getFileInfo(dataFile)
+        extractData, analyzeDataCV = self.workerClasses[0]
+        print("\nStreaming Data:", os.path.basename(dataFile))
+        # Save each cycle's peaks as they are found and keep only the compact peak information.
+        peakWriter = excelProcessing.peakStreamWriter(fileInfo["outputDirectory"] + "Peak Information/" + fileInfo["fileName"] + ".csv")
+        peakCollector = processDataCV.peakGroupCollector()
+        for cycleResult in analyzeDataCV.streamCV(dataFile):
+            peakWriter.addCycle(cycleResult)
+            peakCollector.addCycle(cycleResult)
+        peakWriter.close()
+        print("\tFinished Data Analysis")
+        bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineLineGroups = peakCollector.getPeakGroups()
+
+        # ---------------------- Plot Cycle by Cycle ----------------------- #
+        if not self.plotMovies:
+            return None
+        import dataPlotting
+        # Read the CV frames again while rendering; the baseline fits are rebuilt per frame (one process renders a stream).
+        movieSettings = dict(self.movieSettings, numRenderWorkers = 1)
+        plotData = dataPlotting.plotDataCV(fileInfo["fileName"], fileInfo["outputDirectory"], **movieSettings)
+        plotData.plotCurvesStream(analyzeDataCV.streamCHIFrames(dataFile), peakCollector.numFrames, peakCollector.currentBounds, bothPeakPotentialGroups,
+                                  bothPeakCurrentGroups, bothBaselineBoundsGroups, lambda potentialFrames: processDataCV.baselineFitFrames(analyzeDataCV.analyzeCV, bothBaselineLineGroups, potentialFrames))
+        dataPlotting.plt.close(plotData.figure)
+        # ------------------------------------------------------------------ #
+
+    def close(self):
+        # Close the worker pool and the peak databases.
+        if self.analysisPool is not None:
+            self.analysisPool.terminate(); self.analysisPool.join()
+            self.analysisPool = None
+        for peakDatabase in self.peakDatabases.values():
+            peakDatabase.close()
+        self.peakDatabases = {}
+
+# -------------------------------------------------------------------------- #
+# ------------------------------ File Summaries ---------------------------- #
+
+def summarizePeakGroups(bothPeakPotentialGroups, bothPeakCurrentGroups, returnPeaks = False):
+    # The peak groups of each scan direction (NaN cycles become null in the JSON).
+    peakSummary = {}
+    for reductiveScan, peakType in enumerate(["oxidation", "reduction"]):
+        peakPotentialGroups = np.asarray(bothPeakPotentialGroups[reductiveScan], dtype=np.float64)
+        peakCurrentGroups = np.asarray(bothPeakCurrentGroups[reductiveScan], dtype=np.float64)
+        peakSummary[peakType] = dict(numPeakGroups = len(peakPotentialGroups),
+                                     meanPeakPotentials = [None if np.isnan(peakPotentials).all() else float(np.nanmean(peakPotentials)) for peakPotentials in peakPotentialGroups])
+        if returnPeaks:
+            peakSummary[peakType]["peakPotentialGroups"] = np.where(np.isnan(peakPotentialGroups), None, peakPotentialGroups).tolist()
+            peakSummary[peakType]["peakCurrentGroups"] = np.where(np.isnan(peakCurrentGroups), None, peakCurrentGroups).tolist()
+    return peakSummary
@@ -0,0 +1,124 @@
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import time
+import numpy as np
+
+# -------------------------------------------------------------------------- #
+# ------------------------ Peak Engine Equivalence ------------------------- #
+
+class engineComparison:
+    """
+    Runs the reference peak analysis (processData.getPeaks: analyzeData, findLinearBaseline,
+    findNearbyMinimum, and addPeakInfo_toGroups) and alternate engines on the same CV frames.
+    It reports the per-peak differences in Ep, Ip, and the baseline bounds, and the speedup.
+    An engine is a function (potentialFrames, currentFrames, pointsPerSegment) that returns
+    (bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups) in the getPeaks shapes.
+    """
+
+    def __init__(self, analyzeDataCV, peakPotentialTolerance = 1e-6, peakCurrentTolerance = 1e-6, baselineBoundsTolerance = 0):
+        # Specify the reference analysis.
+        self.analyzeDataCV = analyzeDataCV
+        # Specify the largest allowed differences: Volts, relative current, and points.
+        self.peakPotentialTolerance = peakPotentialTolerance
+        self.peakCurrentTolerance = peakCurrentTolerance
+        self.baselineBoundsTolerance = baselineBoundsTolerance
+
+        # The alternate engines to compare: {engineName: engineFunction}
+        self.engines = {"lockstep": self.lockstepEngine, "streaming": self.streamingEngine}
+
+    def addEngine(self, engineName, engineFunction):
+        self.engines[engineName] = engineFunction
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------------- Engines ------------------------------ #
+
+    def referenceEngine(self, potentialFrames, currentFrames, pointsPerSegment):
+        return self.analyzeDataCV.getPeaks(potentialFrames, currentFrames, pointsPerSegment)[0:3]
+
+    def lockstepEngine(self, potentialFrames, currentFrames, pointsPerSegment):
+        # Filter all the segments in one vectorized pass (see processCVReplicates).
+        analyzeCV = self.analyzeDataCV.analyzeCV
+        potentialSegments = np.asarray(potentialFrames, dtype=np.float64)[:, 0:2*pointsPerSegment].reshape(-1, pointsPerSegment)
+        currentSegments = np.asarray(currentFrames, dtype=np.float64)[:, 0:2*pointsPerSegment].reshape(-1, pointsPerSegment)
+        filteredCurrents, firstDerivs, reductiveScans, samplingFreqs = analyzeCV.filterSegments(potentialSegments, currentSegments)
+
+        segmentAnalyses = (analyzeCV.analyzeFilteredData(potentialSegments[segmentInd], filteredCurrents[segmentInd], firstDerivs[segmentInd],
+                                                         reductiveScans[segmentInd], samplingFreqs[segmentInd]) for segmentInd in range(len(potentialSegments)))
+        return self.analyzeDataCV.getPeaks(potentialFrames, currentFrames, pointsPerSegment, segmentAnalyses)[0:3]
+
+    def streamingEngine(self, potentialFrames, currentFrames, pointsPerSegment):
+        # Group the peaks cycle by cycle with the peakGroupTracker (see streamPeaks).
+        import processDataCV
+        peakCollector = processDataCV.peakGroupCollector()
+        for cycleResult in self.analyzeDataCV.streamPeaks(zip(currentFrames, potentialFrames, [[0]]*len(potentialFrames))):
+            peakCollector.addCycle(cycleResult)
+        return peakCollector.getPeakGroups()[0:3]
+
+    # ---------------------------------------------------------------------- #
+    # ----------------------------- Comparison ----------------------------- #
+
+    def timeEngine(self, engineFunction, potentialFrames, currentFrames, pointsPerSegment):
+        startTime = time.perf_counter()
+        peakGroups = engineFunction(potentialFrames, currentFrames, pointsPerSegment)
+        return peakGroups, time.perf_counter() - startTime
+
+    def comparePeakGroups(self, referenceGroups, engineGroups):
+        """
+        Returns the number of reference peaks, the largest Ep (V), relative Ip, and baseline bound (points)
+        differences, and a list of the problems found.
+        """
+        numPeaks = 0; maxDifferences = [0.0, 0.0, 0.0]; comparisonErrors = []
+        for reductiveScan, scanName in enumerate(["Oxidation", "Reduction"]):
+            referencePotentials, referenceCurrents, referenceBounds = [np.asarray(peakGroups[reductiveScan], dtype=np.float64) for peakGroups in referenceGroups]
+            enginePotentials, engineCurrents, engineBounds = [np.asarray(peakGroups[reductiveScan], dtype=np.float64) for peakGroups in engineGroups]
+            numPeaks += int((~np.isnan(referencePotentials)).sum())
+
+            # The same peak groups must be found in the same cycles.
+            if referencePotentials.shape != enginePotentials.shape:
+                comparisonErrors.append(scanName + " peak groups: " + str(referencePotentials.shape) + " vs " + str(enginePotentials.shape))
+                continue
+            missingPeaks = np.isnan(referencePotentials) != np.isnan(enginePotentials)
+            if missingPeaks.any():
+                comparisonErrors.append(scanName + " peaks found in different cycles: " + str(int(missingPeaks.sum())) + " peaks")
+            if referencePotentials.size == 0:
+                continue
+
+            # Compare the peaks both engines found.
+            foundPeaks = ~np.isnan(referencePotentials) & ~np.isnan(enginePotentials)
+            if foundPeaks.any():
+                peakPotentialDiff = np.abs(enginePotentials - referencePotentials)[foundPeaks].max()
+                peakCurrentDiff = (np.abs(engineCurrents - referenceCurrents) / np.maximum(np.abs(referenceCurrents), 1e-12))[foundPeaks].max()
+                baselineBoundsDiff = np.nan_to_num(np.abs(engineBounds - referenceBounds)[foundPeaks]).max()
+                maxDifferences = np.maximum(maxDifferences, [peakPotentialDiff, peakCurrentDiff, baselineBoundsDiff]).tolist()
+
+        # Check the tolerances.
+        for differenceName, maxDifference, tolerance in zip(["Ep", "Ip", "Baseline bounds"], maxDifferences,
+                                                            [self.peakPotentialTolerance, self.peakCurrentTolerance, self.baselineBoundsTolerance]):
+            if maxDifference > tolerance:
+                comparisonErrors.append(differenceName + " differs by " + "%.3g"%maxDifference + " (tolerance " + "%.3g"%tolerance + ")")
+
+        return numPeaks, maxDifferences, comparisonErrors
+
+    def compareEngines(self, dataName, potentialFrames, currentFrames, pointsPerSegment):
+        """
+        Returns one report row per alternate engine for these CV frames.
+        """
+        referenceGroups, referenceTime = self.timeEngine(self.referenceEngine, potentialFrames, currentFrames, pointsPerSegment)
+
+        reportRows = []
+        for engineName, engineFunction in self.engines.items():
+            engineGroups, engineTime = self.timeEngine(engineFunction, potentialFrames, currentFrames, pointsPerSegment)
+            numPeaks, maxDifferences, comparisonErrors = self.comparePeakGroups(referenceGroups, engineGroups)
+            reportRows.append(dict(dataName = dataName, engineName = engineName, numPeaks = numPeaks, peakPotentialDiff = maxDifferences[0],
+                                   peakCurrentDiff = maxDifferences[1], baselineBoundsDiff = maxDifferences[2],
+                                   speedup = referenceTime/max(engineTime, 1e-12), comparisonErrors = comparisonErrors))
+        return reportRows
+
+    def printReport(self, reportRows):
+        print("\n%-40s %-12s %7s %10s %10s %8s %8s  %s" % ("Data", "Engine", "Peaks", "Max dEp", "Max dIp", "Max dBnd", "Speedup", "Result"))
+        for reportRow in reportRows:
+            print("%-40s %-12s %7d %10.3g %10.3g %8.3g %7.2fx  %s" % (reportRow["dataName"][-40:], reportRow["engineName"], reportRow["numPeaks"],
+                  reportRow["peakPotentialDiff"], reportRow["peakCurrentDiff"], reportRow["baselineBoundsDiff"], reportRow["speedup"],
+                  "PASS" if len(reportRow["comparisonErrors"]) == 0 else "FAIL: " + "; ".join(reportRow["comparisonErrors"])))
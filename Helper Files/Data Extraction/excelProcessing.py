@@ -9,16 +9,20 @@ Need to Install on the Anaconda Prompt:
 # Basic Modules
 import os
 import sys
-# Read/Write to Excel
+# Read/Write to Excel (pyexcel and openpyxl are imported when first used)
 import csv
-import pyexcel
-import openpyxl as xl
-# Openpyxl Styles
-from openpyxl.styles import Alignment
-from openpyxl.styles import Font
+import json
+import hashlib
+import zipfile
+import numpy as np
+from xml.sax.saxutils import escape
 # Modules to Sort Files in Order
 from natsort import natsorted
 
+# Import Analysis Files
+sys.path.append('./Helper Files/Analysis Protocols/')
+import _statisticsProtocols
+
 class excelFormat:     
             
     def xls2xlsx(self, excelFile, outputFolder):
@@ -42,6 +46,7 @@ class excelFormat:
         # Convert '.xls' to '.xlsx'
         filename = os.path.basename(excelFile)
         newExcelFile = outputFolder + filename + "x"
+        import pyexcel
         pyexcel.save_as(file_name = excelFile, dest_file_name = newExcelFile, logfile=open(os.devnull, 'w'))
         
         # Return New Excel File Name
@@ -62,6 +67,7 @@ class excelFormat:
         inputFile: The Input TXT/CSV File to Convert XLSX
         excelFile: The Output Excel File Name (XLSX)
         """
+        import openpyxl as xl
         # If the File is Not Already Converted: Convert the CSV to XLSX
         if not os.path.isfile(excelFile) or overwriteXL:
             # Make Excel WorkBook
@@ -83,21 +89,6 @@ class excelFormat:
         
         # Return Excel Sheet
         return xlWorkbook, xlWorksheet
-
-    def addExcelAesthetics(self, WB_worksheet):
-        # Center the Data in the Cells
-        align = Alignment(horizontal='center',vertical='center',wrap_text=True)        
-        for column_cells in WB_worksheet.columns:
-            length = max(len(str(cell.value) if cell.value else "") for cell in column_cells)
-            WB_worksheet.column_dimensions[xl.utils.get_column_letter(column_cells[0].column)].width = length
-            
-            for cell in column_cells:
-                cell.alignment = align
-        # Header Style
-        for cell in WB_worksheet["1:1"]:
-            cell.font = Font(color='00FF0000', italic=True, bold=True)
-        
-        return WB_worksheet
     
 
 class processFiles(excelFormat):
@@ -117,6 +108,28 @@ class processFiles(excelFormat):
         
         return natsorted(analysisFile)
     
+    def getSourceRecord(self, sourceFile, blockSize = 2**20):
+        # The size and content hash of the file a workbook is converted from.
+        sourceHash = hashlib.sha256()
+        with open(sourceFile, "rb") as openFile:
+            for fileBlock in iter(lambda: openFile.read(blockSize), b""):
+                sourceHash.update(fileBlock)
+        return {"size": os.path.getsize(sourceFile), "sha256": sourceHash.hexdigest()}
+    
+    def isConvertedFromOtherFile(self, sourceFile, excelFile, sourceRecordFile):
+        """
+        Whether getExcelFile converted this workbook from a different version of sourceFile (compared by size, then content).
+        Workbooks without a source record were not converted here (e.g., checked in), so they are kept as they are.
+        """
+        if not os.path.isfile(excelFile) or not os.path.isfile(sourceRecordFile):
+            return False
+        try:
+            with open(sourceRecordFile, "r") as recordFile:
+                sourceRecord = json.load(recordFile)
+        except ValueError:
+            return True
+        return sourceRecord.get("size") != os.path.getsize(sourceFile) or sourceRecord.get("sha256") != self.getSourceRecord(sourceFile)["sha256"]
+    
     def getExcelFile(self, oldFile, outputFolder, testSheetNum = 0, excelDelimiter = ","):
         """
         --------------------------------------------------------------------------
@@ -138,9 +151,16 @@ class processFiles(excelFormat):
             # Make Output Folder Directory if Not Already Created
             os.makedirs(newFilePath, exist_ok = True)
 
-            # Convert CSV or TXT to XLSX
+            # Convert CSV or TXT to XLSX (again if the workbook was converted from a changed file)
             excelFile = newFilePath + filename + ".xlsx"
-            xlWorkbook, xlWorksheet = self.convertToExcel(oldFile, excelFile, excelDelimiter = excelDelimiter, overwriteXL = False, testSheetNum = testSheetNum)
+            sourceRecordFile = newFilePath + filename + ".source.json"
+            overwriteXL = self.isConvertedFromOtherFile(oldFile, excelFile, sourceRecordFile)
+            convertExcel = overwriteXL or not os.path.isfile(excelFile)
+            xlWorkbook, xlWorksheet = self.convertToExcel(oldFile, excelFile, excelDelimiter = excelDelimiter, overwriteXL = overwriteXL, testSheetNum = testSheetNum)
+            # Record the file the workbook was converted from.
+            if convertExcel:
+                with open(sourceRecordFile, "w") as recordFile:
+                    json.dump(self.getSourceRecord(oldFile), recordFile)
         # If the File is Already an Excel File, Just Load the File
         elif oldFile.endswith(".xlsx"):
             excelFile = oldFile
@@ -148,6 +168,7 @@ class processFiles(excelFormat):
             if excelFile.endswith(".xls"):
                 excelFile = self.xls2xlsx(excelFile, outputFolder)
             # Load the GSR Data from the Excel File
+            import openpyxl as xl
             xlWorkbook = xl.load_workbook(excelFile, data_only=True, read_only=True)
             xlWorksheet = xlWorkbook.worksheets[testSheetNum]
         else:
@@ -162,83 +183,132 @@ class saveData(excelFormat):
     def __init__(self):
         super().__init__()
         
-        self.emptySheetName = "Empty Sheet"
-    
-    def getExcelDocument(self, excelFile, overwriteSave = False):
-        # If the excel file you are saving already exists.
-        if os.path.isfile(excelFile):
-            # If You Want to Overwrite the Excel.
-            if overwriteSave:
-                print("\t\tDeleting Old Excel Workbook")
-                os.remove(excelFile) 
-            else:
-                print("\t\tNot overwriting the file ... but your file already exists??")
-            
-        # If the File is Not Present: Create The Excel File
-        if not os.path.isfile(excelFile):
-            print("\t\tCreating New Excel Workbook")
-            # Make Excel WorkBook
-            WB = xl.Workbook()
-            worksheet = WB.active 
-            worksheet.title = self.emptySheetName
-        else:
-            print("\t\tExcel File Already Exists. Adding New Sheet to File")
-            WB = xl.load_workbook(excelFile, read_only=False)
-            worksheet = WB.create_sheet(self.emptySheetName)
-        return WB, worksheet
+        # Initialize the running statistics for the peak current.
+        self.runningStatistics = _statisticsProtocols.runningStatistics()
+        
+        # The workbook parts around the peak table sheet (one sheet; style 1 is the header font and alignment).
+        xmlHeader = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        self.excelParts = {
+            "[Content_Types].xml": xmlHeader + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/><Default Extension="xml" ContentType="application/xml"/>'
+                '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/></Types>',
+            "_rels/.rels": xmlHeader + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/></Relationships>',
+            "xl/workbook.xml": xmlHeader + '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+                '<sheets><sheet name="%(sheetName)s" sheetId="1" r:id="rId1"/></sheets></workbook>',
+            "xl/_rels/workbook.xml.rels": xmlHeader + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+                '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/></Relationships>',
+            "xl/styles.xml": xmlHeader + '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><i/><color rgb="00FF0000"/><sz val="11"/><name val="Calibri"/></font></fonts>'
+                '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+                '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+                '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+                '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+                '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1" applyAlignment="1"><alignment horizontal="center" vertical="center" wrapText="1"/></xf></cellXfs>'
+                '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles></styleSheet>',
+        }
     
-    def saveDataCV(self, bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, \
-                   bothBaselineFitGroups, saveDataFolder, saveExcelName, sheetName = "CV Analysis"):
-        print("\tSaving the Data")
-        # Create Output File Directory to Save Data: If Not Already Created
-        os.makedirs(saveDataFolder, exist_ok=True)
-        numScans = len(bothPeakPotentialGroups)
-        hasPeaks = len(bothPeakPotentialGroups[0]) != 0
+    def getPeakTable(self, bothPeakPotentialGroups, bothPeakCurrentGroups):
+        """
+        Organizes the peak information as one column per peak value (columnar).
+            headers: The column names ("" for the spacer columns).
+            peakColumns: 1D arrays (# frames) for each column (None for the spacer columns).
+        """
+        # Calculate the running coefficient of variation of every peak group.
+        bothPeakCoVGroups = self.runningStatistics.groupCoefficientOfVariation(bothPeakCurrentGroups)
+        # Find the number of frames from any peak group.
+        numFrames = 0
+        for peakPotentialGroups in bothPeakPotentialGroups:
+            if len(peakPotentialGroups) != 0:
+                numFrames = len(peakPotentialGroups[0])
         
-        # Get the excel document.
-        excelFile = saveDataFolder + saveExcelName
-        WB, worksheet = self.getExcelDocument(excelFile, overwriteSave = True)
-            
-        headers = ["Cycle Number"]
-        # Add a header label for each peak
+        headers = ["Cycle Number"]; peakColumns = [np.arange(1, numFrames + 1)]
+        # Add the columns for each peak
         peakTypes = ["Oxidation", "Reduction"]
-        for reductiveScan in range(numScans):
+        for reductiveScan in range(len(bothPeakPotentialGroups)):
             peakType = peakTypes[reductiveScan]
             numPeakGroups = len(bothPeakPotentialGroups[reductiveScan])
 
             for peakGroupInd in range(numPeakGroups):
-
                 peakInfoString = peakType + " Peak " + str(peakGroupInd + 1)
-                headers.extend([peakInfoString + " Potential (V)", peakInfoString + " Current (uAmps)", ""])
-        worksheet.append(headers)
-        
-        # Organize and save the data
-        if hasPeaks:
-            numFrames = len(bothPeakPotentialGroups[0][0])
-            for frameNum in range(numFrames):
-                frameData = [frameNum+1]
-                
-                for reductiveScan in range(numScans):
-                    numPeakGroups = len(bothPeakPotentialGroups[reductiveScan])
-    
-                    for peakGroupInd in range(numPeakGroups):
-                        Ip = bothPeakCurrentGroups[reductiveScan][peakGroupInd][frameNum]
-                        Ep = bothPeakPotentialGroups[reductiveScan][peakGroupInd][frameNum]
-                        frameData.extend([Ep, Ip, ""])
-                # Write the Data to Excel
-                worksheet.append(frameData)
-        
-        # Add Excel Aesthetics
-        worksheet = self.addExcelAesthetics(worksheet)    
-            
-        # Save as New Excel File
-        WB.save(excelFile)
-        WB.close()
+                headers.extend([peakInfoString + " Potential (V)", peakInfoString + " Current (uAmps)", peakInfoString + " Current CoV (%)", ""])
+                peakColumns.extend([np.asarray(bothPeakPotentialGroups[reductiveScan][peakGroupInd], dtype=float), 
+                                    np.asarray(bothPeakCurrentGroups[reductiveScan][peakGroupInd], dtype=float), 
+                                    np.asarray(bothPeakCoVGroups[reductiveScan][peakGroupInd], dtype=float), None])
+        
+        return headers, peakColumns, numFrames
+    
+    def saveDataCV(self, bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, \
+                   bothBaselineFitGroups, saveDataFolder, saveExcelName, sheetName = "CV Analysis", exportFormats = ("xlsx",)):
+        """
+        exportFormats: Any of "xlsx" (workbook), "csv", and "npz" (binary columns). All use the same peak table.
+        """
+        print("\tSaving the Data")
+        # Create Output File Directory to Save Data: If Not Already Created
+        os.makedirs(saveDataFolder, exist_ok=True)
+        saveFileBase = saveDataFolder + os.path.splitext(saveExcelName)[0]
         
+        # Organize the peak information once.
+        headers, peakColumns, numFrames = self.getPeakTable(bothPeakPotentialGroups, bothPeakCurrentGroups)
         
+        # Save the peak table in each format.
+        if "xlsx" in exportFormats:
+            self.savePeakTableExcel(headers, peakColumns, saveDataFolder + saveExcelName, sheetName)
+        if "csv" in exportFormats:
+            self.savePeakTableCSV(headers, peakColumns, saveFileBase + ".csv")
+        if "npz" in exportFormats:
+            self.savePeakTableNPZ(headers, peakColumns, saveFileBase + ".npz")
+    
+    def savePeakTableExcel(self, headers, peakColumns, excelFile, sheetName):
+        """
+        Writes the peak table as a one-sheet workbook. Each column is formatted once and the sheet XML is filled
+        one row template per frame, instead of writing cell by cell through openpyxl (seconds for long runs).
+        The header is styled as before (red, bold, italic, centered) and the missing peaks are empty cells.
+        """
+        # Remove the old workbook.
+        if os.path.isfile(excelFile):
+            print("\t\tDeleting Old Excel Workbook")
+            os.remove(excelFile)
+        print("\t\tCreating New Excel Workbook")
+        
+        # Format every value once: the shortest repr of each float (the cycle numbers are integers).
+        valueStrings = [None if peakColumn is None else list(map(repr, peakColumn.tolist())) for peakColumn in peakColumns]
+        # Set the column widths to the widest printed value and style the header row (style 1 is the header style).
+        columnWidths = [max([len(header)] + ([] if columnStrings is None else list(map(len, columnStrings)))) for header, columnStrings in zip(headers, valueStrings)]
+        columnXML = "".join('<col min="%d" max="%d" width="%d" customWidth="1"/>' % (columnInd + 1, columnInd + 1, columnWidth) for columnInd, columnWidth in enumerate(columnWidths) if columnWidth != 0)
+        headerXML = "<row>" + "".join('<c t="inlineStr" s="1"><is><t>' + escape(header) + '</t></is></c>' if header else "<c/>" for header in headers) + "</row>"
         
+        # Fill one row template per frame (the spacer columns and the missing peaks are empty cells).
+        rowTemplate = "<row>" + "".join("<c/>" if columnStrings is None else "<c><v>%s</v></c>" for columnStrings in valueStrings) + "</row>"
+        rowsXML = "".join([rowTemplate % peakRow for peakRow in zip(*[columnStrings for columnStrings in valueStrings if columnStrings is not None])])
+        for missingValue in ["nan", "inf", "-inf"]:
+            rowsXML = rowsXML.replace("<c><v>" + missingValue + "</v></c>", "<c/>")
         
+        # Save the workbook parts.
+        with zipfile.ZipFile(excelFile, "w", zipfile.ZIP_DEFLATED, compresslevel = 1) as excelArchive:
+            for partName, partXML in self.excelParts.items():
+                excelArchive.writestr(partName, partXML % {"sheetName": escape(sheetName, {'"': "&quot;"})})
+            excelArchive.writestr("xl/worksheets/sheet1.xml", '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n' +
+                                  '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">' + ("<cols>" + columnXML + "</cols>" if columnXML else "") + 
+                                  '<sheetData>' + headerXML + rowsXML + '</sheetData></worksheet>')
         
+    def savePeakTableCSV(self, headers, peakColumns, csvFile):
+        # Drop the spacer columns.
+        keptColumns = [columnInd for columnInd in range(len(headers)) if peakColumns[columnInd] is not None]
+        with open(csvFile, 'w', newline='') as outputCSV:
+            csvWriter = csv.writer(outputCSV)
+            csvWriter.writerow([headers[columnInd] for columnInd in keptColumns])
+            # Write the rows (missing peaks as empty cells).
+            csvColumns = [np.where(np.isnan(peakColumns[columnInd]), None, peakColumns[columnInd]).tolist() for columnInd in keptColumns]
+            csvWriter.writerows(zip(*csvColumns))
+    
+    def savePeakTableNPZ(self, headers, peakColumns, npzFile):
+        # Save each column as its own array, named by its header.
+        peakArrays = {headers[columnInd]: peakColumns[columnInd] for columnInd in range(len(headers)) if peakColumns[columnInd] is not None}
+        np.savez(npzFile, **peakArrays)
         
         
         
@@ -246,6 +316,46 @@ class saveData(excelFormat):
         
         
         
+        
+        
+        
+        
+        
+    
     
     
-    
\ No newline at end of file
+class peakStreamWriter:
+    """
+    Writes the peaks of a streamed analysis to a CSV file one cycle at a time, with one
+    row per found peak (long format, since new peak groups can appear mid-run).
+    """
+    
+    def __init__(self, csvFile):
+        # Create Output File Directory to Save Data: If Not Already Created
+        os.makedirs(os.path.dirname(csvFile) or ".", exist_ok=True)
+        self.outputCSV = open(csvFile, 'w', newline='')
+        self.csvWriter = csv.writer(self.outputCSV)
+        self.csvWriter.writerow(["Cycle Number", "Scan Direction", "Peak Group", "Peak Potential (V)", "Peak Current (uAmps)", "Peak Current CoV (%)"])
+        
+        # A running statistics accumulator for every peak group: [OXIDATION, REDUCTION]
+        self.bothPeakStatistics = [[], []]
+        self.peakTypes = ["Oxidation", "Reduction"]
+    
+    def addCycle(self, cycleResult):
+        cycleRows = []
+        for reductiveScan in range(2):
+            peakStatistics = self.bothPeakStatistics[reductiveScan]
+            for peakGroupInd, peakPotential, peakCurrent, linearFitBounds, baselineLine in cycleResult["bothCyclePeaks"][reductiveScan]:
+                while len(peakStatistics) <= peakGroupInd:
+                    peakStatistics.append(_statisticsProtocols.runningStatistics())
+                
+                # Update the running coefficient of variation of the peak current.
+                peakStatistics[peakGroupInd].addPoint(peakCurrent)
+                peakCoV = 0
+                if peakStatistics[peakGroupInd].numPoints > 1:
+                    peakCoV = np.sqrt(peakStatistics[peakGroupInd].getVariance(ddof = 1)) / abs(peakStatistics[peakGroupInd].runningMean) * 100
+                cycleRows.append([cycleResult["cycleNum"] + 1, self.peakTypes[reductiveScan], peakGroupInd + 1, peakPotential, peakCurrent, peakCoV])
+        self.csvWriter.writerows(cycleRows)
+    
+    def close(self):
+        self.outputCSV.close()
@@ -0,0 +1,147 @@
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import os
+import json
+import time
+import asyncio
+import traceback
+
+# -------------------------------------------------------------------------- #
+# ----------------------------- Folder Watcher ----------------------------- #
+
+class folderWatcher:
+    """
+    Polls the watch folders (no OS file notifications) and analyzes every new or changed data file
+    once it is stable: its size and modification time have not changed for stableTime seconds.
+    Stable files are queued and analyzed by maxConcurrent workers, each running analyzeFile(dataFile, workerInd)
+    in a thread. The state of every file is kept in "<watchFolder><statusFolder>watchStatus.json":
+        waiting -> queued -> analyzing -> done/failed (and back to waiting if the file changes).
+    """
+
+    def __init__(self, watchFolders, analyzeFile, fileExtensions = (".txt", ".csv", ".xlsx"), pollInterval = 1,
+                 stableTime = 2, maxConcurrent = 1, statusFolder = "CV Analysis/"):
+        # Specify the folders and the analysis.
+        self.watchFolders = [os.path.join(watchFolder, "") for watchFolder in watchFolders]
+        self.analyzeFile = analyzeFile
+        self.fileExtensions = fileExtensions
+        # Specify the polling (seconds) and the number of files analyzed at once.
+        self.pollInterval = pollInterval
+        self.stableTime = stableTime
+        self.maxConcurrent = maxConcurrent
+        self.statusFolder = statusFolder
+
+        # The status of every file: {watchFolder: {fileName: fileStatus}}
+        self.folderStatus = {watchFolder: self.loadStatus(watchFolder) for watchFolder in self.watchFolders}
+        # The last (size, modified time) seen and when it was first seen: {dataFile: (fileSignature, seenTime)}
+        self.fileSignatures = {}
+
+    # ---------------------------------------------------------------------- #
+    # ---------------------------- Status Index ---------------------------- #
+
+    def getStatusFile(self, watchFolder):
+        return watchFolder + self.statusFolder + "watchStatus.json"
+
+    def loadStatus(self, watchFolder):
+        statusFile = self.getStatusFile(watchFolder)
+        if not os.path.isfile(statusFile):
+            return {}
+        with open(statusFile, "r") as statusJSON:
+            folderStatus = json.load(statusJSON)
+        # Files interrupted by the last shutdown are analyzed again.
+        for fileStatus in folderStatus.values():
+            if fileStatus["status"] in ("queued", "analyzing"):
+                fileStatus["status"] = "waiting"
+        return folderStatus
+
+    def saveStatus(self, watchFolder):
+        # Replace the index in one step so readers never see a partial file.
+        statusFile = self.getStatusFile(watchFolder)
+        os.makedirs(os.path.dirname(statusFile), exist_ok=True)
+        with open(statusFile + ".tmp", "w") as statusJSON:
+            json.dump(self.folderStatus[watchFolder], statusJSON, indent=2)
+        os.replace(statusFile + ".tmp", statusFile)
+
+    def setStatus(self, watchFolder, fileName, status, **statusInfo):
+        fileStatus = self.folderStatus[watchFolder].setdefault(fileName, {})
+        fileStatus.update(status = status, updated = time.strftime("%Y-%m-%d %H:%M:%S"), **statusInfo)
+        self.saveStatus(watchFolder)
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------------- Polling ------------------------------ #
+
+    def getDataFiles(self, watchFolder):
+        # The data files directly in the folder (the outputs are in subfolders).
+        if not os.path.isdir(watchFolder):
+            return []
+        dataFiles = []
+        for dirEntry in os.scandir(watchFolder):
+            if dirEntry.is_file() and dirEntry.name.endswith(self.fileExtensions) and not dirEntry.name.startswith((".", "~$")):
+                fileStat = dirEntry.stat()
+                dataFiles.append((dirEntry.name, [fileStat.st_size, fileStat.st_mtime]))
+        return sorted(dataFiles)
+
+    def pollFolders(self, analysisQueue):
+        currentTime = time.monotonic()
+        for watchFolder in self.watchFolders:
+            folderStatus = self.folderStatus[watchFolder]
+            for fileName, fileSignature in self.getDataFiles(watchFolder):
+                dataFile = watchFolder + fileName
+                fileStatus = folderStatus.get(fileName, {})
+                # Skip files that are waiting for a worker or were analyzed in this version.
+                if fileStatus.get("status") in ("queued", "analyzing"):
+                    continue
+                if fileStatus.get("status") in ("done", "failed") and fileStatus.get("fileSignature") == fileSignature:
+                    continue
+
+                # Restart the stability timer whenever the file changes.
+                lastSignature, seenTime = self.fileSignatures.get(dataFile, (None, currentTime))
+                if lastSignature != fileSignature:
+                    self.fileSignatures[dataFile] = (fileSignature, currentTime)
+                    if fileStatus.get("status") != "waiting":
+                        self.setStatus(watchFolder, fileName, "waiting", fileSignature = fileSignature)
+                    continue
+                # Queue the file once it is stable.
+                if currentTime - seenTime >= self.stableTime:
+                    self.setStatus(watchFolder, fileName, "queued", fileSignature = fileSignature)
+                    analysisQueue.put_nowait((watchFolder, fileName, fileSignature))
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------------ Analysis ------------------------------ #
+
+    async def analysisWorker(self, workerInd, analysisQueue):
+        eventLoop = asyncio.get_running_loop()
+        while True:
+            watchFolder, fileName, fileSignature = await analysisQueue.get()
+            self.setStatus(watchFolder, fileName, "analyzing", worker = workerInd)
+            print("\nAnalyzing New Data:", watchFolder + fileName)
+            startTime = time.perf_counter()
+            try:
+                # Analyze off the event loop so polling continues.
+                await eventLoop.run_in_executor(None, self.analyzeFile, watchFolder + fileName, workerInd)
+                self.setStatus(watchFolder, fileName, "done", fileSignature = fileSignature, seconds = round(time.perf_counter() - startTime, 3), error = None)
+            except (Exception, SystemExit) as analysisError:
+                traceback.print_exc()
+                self.setStatus(watchFolder, fileName, "failed", fileSignature = fileSignature, seconds = round(time.perf_counter() - startTime, 3), error = repr(analysisError))
+            finally:
+                analysisQueue.task_done()
+
+    async def watch(self):
+        analysisQueue = asyncio.Queue()
+        analysisWorkers = [asyncio.create_task(self.analysisWorker(workerInd, analysisQueue)) for workerInd in range(self.maxConcurrent)]
+        print("Watching:", ", ".join(self.watchFolders))
+        try:
+            while True:
+                self.pollFolders(analysisQueue)
+                await asyncio.sleep(self.pollInterval)
+        finally:
+            for analysisWorker in analysisWorkers:
+                analysisWorker.cancel()
+
+    def run(self):
+        # Watch until interrupted (Ctrl-C).
+        try:
+            asyncio.run(self.watch())
+        except KeyboardInterrupt:
+            print("\nStopped Watching")
@@ -0,0 +1,180 @@
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import os
+import itertools
+import multiprocessing
+import numpy as np
+
+# Import Python Files for Data Extraction
+import excelProcessing
+import processDataCV
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Parameter Sweep ----------------------------- #
+
+class parameterSweep:
+    """
+    Evaluates processCV over a grid of analysis parameters as a chain of stages. Each stage output is
+    memoized by the key of its input stage plus its own parameters, so a grid point only reruns the
+    stages after the first parameter that changed:
+        parse:    The CV frames                                 (numInitCyclesToSkip)
+        filter:   Low pass, smoothing, derivative, direction    (lowPassCutoff)
+        peaks:    The peaks and their linear baselines          (minBaselinePoints)
+        grouping: The peak groups across cycles                 (maxPeakPotentialDeviation)
+    The derivative has no parameters of its own and is kept with the filter, and the baselines are
+    searched while the peaks are found (analyzeFilteredData), so they share a stage.
+    """
+
+    # The stages in order and the parameters each one uses.
+    sweepStages = [("parse", ["numInitCyclesToSkip"]), ("filter", ["lowPassCutoff"]),
+                   ("peaks", ["minBaselinePoints"]), ("grouping", ["maxPeakPotentialDeviation"])]
+
+    def __init__(self, numInitCyclesToSkip = 1, keepBaselineFits = True):
+        # Keep the full baseline fits in the results (they are as large as the CV data).
+        self.keepBaselineFits = keepBaselineFits
+        # Initialize the analysis classes.
+        self.extractData = excelProcessing.processFiles()
+        self.analyzeDataCV = processDataCV.processData(numInitCyclesToSkip, useCHIPeaks = False)
+        self.numInitCyclesToSkip = numInitCyclesToSkip
+
+        # The memoized stage outputs: {stageName: {stageKey: stageOutput}}
+        self.stageResults = {stageName: {} for stageName, stageParameters in self.sweepStages}
+        # How often each stage was computed or reused.
+        self.stageCounts = {stageName: [0, 0] for stageName, stageParameters in self.sweepStages}
+
+    def getDefaultParameters(self):
+        # The parameters processCV uses now.
+        return {
+            "numInitCyclesToSkip": self.numInitCyclesToSkip,
+            "lowPassCutoff": self.analyzeDataCV.analyzeCV.lowPassCutoff,
+            "minBaselinePoints": self.analyzeDataCV.analyzeCV.minBaselinePoints,
+            "maxPeakPotentialDeviation": self.analyzeDataCV.maxPeakPotentialDeviation,
+        }
+
+    def getGridPoints(self, parameterGrid):
+        """
+        parameterGrid: {parameterName: [values]}. Returns every combination (with the defaults for the other
+        parameters), ordered so the grid points that share early stages are next to each other.
+        """
+        sweepParameters = [parameterName for stageName, stageParameters in self.sweepStages for parameterName in stageParameters]
+        unknownParameters = set(parameterGrid) - set(sweepParameters)
+        assert len(unknownParameters) == 0, "These parameters cannot be swept: " + str(sorted(unknownParameters))
+
+        defaultParameters = self.getDefaultParameters()
+        parameterValues = [parameterGrid.get(parameterName, [defaultParameters[parameterName]]) for parameterName in sweepParameters]
+        return [dict(zip(sweepParameters, gridValues)) for gridValues in itertools.product(*parameterValues)]
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------------- Stages ------------------------------- #
+
+    def parseStage(self, dataFile, parameters):
+        self.analyzeDataCV.numInitCyclesToSkip = parameters["numInitCyclesToSkip"]
+        # Read the TXT/CSV files directly; load the Excel files.
+        if dataFile.endswith((".txt", ".csv")):
+            currentFrames, potentialFrames, timeFrames = self.analyzeDataCV.loadCHIFrames(dataFile)
+        else:
+            xlWorksheet, xlWorkbook = self.extractData.getExcelFile(dataFile, os.path.dirname(dataFile) + "/CV Analysis/", testSheetNum = 0, excelDelimiter = ",")
+            startRow, scanRate, pointsPerScan, pointsPerSegment, startSegment, numberOfSegments, skipOffset = self.analyzeDataCV.getRunInfo(xlWorksheet)
+            currentFrames, potentialFrames, timeFrames = self.analyzeDataCV.extractCHIData(xlWorksheet, startRow, scanRate, pointsPerScan)
+            xlWorkbook.close()
+        pointsPerSegment = int(len(potentialFrames[0])/2)
+
+        return np.asarray(potentialFrames, dtype=np.float64), np.asarray(currentFrames, dtype=np.float64), pointsPerSegment
+
+    def filterStage(self, parseOutput, parameters):
+        potentialFrames, currentFrames, pointsPerSegment = parseOutput
+        self.analyzeDataCV.analyzeCV.lowPassCutoff = parameters["lowPassCutoff"]
+        # Filter every segment: (cycles x 2, points)
+        potentialSegments = potentialFrames[:, 0:2*pointsPerSegment].reshape(-1, pointsPerSegment)
+        currentSegments = currentFrames[:, 0:2*pointsPerSegment].reshape(-1, pointsPerSegment)
+        return self.analyzeDataCV.analyzeCV.filterSegments(potentialSegments, currentSegments)
+
+    def peaksStage(self, parseOutput, filterOutput, parameters):
+        potentialFrames, currentFrames, pointsPerSegment = parseOutput
+        filteredCurrents, firstDerivs, reductiveScans, samplingFreqs = filterOutput
+        self.analyzeDataCV.analyzeCV.minBaselinePoints = parameters["minBaselinePoints"]
+        # Find the peaks of every filtered segment.
+        potentialSegments = potentialFrames[:, 0:2*pointsPerSegment].reshape(-1, pointsPerSegment)
+        return [self.analyzeDataCV.analyzeCV.analyzeFilteredData(potentialSegments[segmentInd], filteredCurrents[segmentInd], firstDerivs[segmentInd],
+                                                                 reductiveScans[segmentInd], samplingFreqs[segmentInd]) for segmentInd in range(len(potentialSegments))]
+
+    def groupingStage(self, parseOutput, peaksOutput, parameters):
+        potentialFrames, currentFrames, pointsPerSegment = parseOutput
+        self.analyzeDataCV.maxPeakPotentialDeviation = parameters["maxPeakPotentialDeviation"]
+        peakGroups = self.analyzeDataCV.getPeaks(potentialFrames, currentFrames, pointsPerSegment, iter(peaksOutput))
+        if not self.keepBaselineFits:
+            peakGroups = peakGroups[0:3] + (None,)
+        return peakGroups
+
+    def getStageOutput(self, stageName, stageKey, stageFunction, *stageInputs):
+        # Reuse the stage output if these inputs were already evaluated.
+        stageResults = self.stageResults[stageName]
+        if stageKey in stageResults:
+            self.stageCounts[stageName][1] += 1
+        else:
+            stageResults[stageKey] = stageFunction(*stageInputs)
+            self.stageCounts[stageName][0] += 1
+        return stageResults[stageKey]
+
+    def evaluate(self, dataFile, parameters):
+        """
+        Returns the getPeaks output (bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups)
+        of one grid point.
+        """
+        # The key of each stage: the data file, then the parameters of this and every earlier stage.
+        fileStat = os.stat(dataFile)
+        stageKey = (os.path.abspath(dataFile), fileStat.st_size, fileStat.st_mtime); stageKeys = {}
+        for stageName, stageParameters in self.sweepStages:
+            stageKey = stageKey + tuple(parameters[parameterName] for parameterName in stageParameters)
+            stageKeys[stageName] = stageKey
+
+        parseOutput = self.getStageOutput("parse", stageKeys["parse"], self.parseStage, dataFile, parameters)
+        filterOutput = self.getStageOutput("filter", stageKeys["filter"], self.filterStage, parseOutput, parameters)
+        peaksOutput = self.getStageOutput("peaks", stageKeys["peaks"], self.peaksStage, parseOutput, filterOutput, parameters)
+        return self.getStageOutput("grouping", stageKeys["grouping"], self.groupingStage, parseOutput, peaksOutput, parameters)
+
+    def clearStages(self, stageNames = None):
+        # Free the memoized outputs (for example, between data files).
+        for stageName in (self.stageResults if stageNames is None else stageNames):
+            self.stageResults[stageName] = {}
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------------- Sweeps ------------------------------- #
+
+    def runSweep(self, dataFile, parameterGrid, numWorkers = 1):
+        """
+        Evaluates every grid point of parameterGrid ({parameterName: [values]}) on dataFile.
+        With numWorkers > 1, the ordered grid is split into contiguous chunks, one per worker process,
+        so each worker still reuses the stages its grid points share.
+        Returns a list of {"parameters": gridPoint, "peakGroups": getPeaks output}.
+        """
+        gridPoints = self.getGridPoints(parameterGrid)
+        print("\nSweeping", len(gridPoints), "Parameter Sets on:", os.path.basename(dataFile))
+        if numWorkers <= 1 or len(gridPoints) <= 1:
+            allPeakGroups = [self.evaluate(dataFile, gridPoint) for gridPoint in gridPoints]
+        else:
+            chunkBounds = np.linspace(0, len(gridPoints), min(numWorkers, len(gridPoints)) + 1).astype(int)
+            sweepJobs = [(self.numInitCyclesToSkip, self.keepBaselineFits, dataFile, gridPoints[chunkBounds[chunkInd]:chunkBounds[chunkInd+1]]) for chunkInd in range(len(chunkBounds) - 1)]
+            with multiprocessing.Pool(len(sweepJobs)) as sweepPool:
+                chunkResults = sweepPool.starmap(runSweepChunk, sweepJobs)
+            # Combine the results and stage counts of the workers.
+            allPeakGroups = []
+            for chunkPeakGroups, chunkStageCounts in chunkResults:
+                allPeakGroups.extend(chunkPeakGroups)
+                for stageName, (numComputed, numReused) in chunkStageCounts.items():
+                    self.stageCounts[stageName][0] += numComputed; self.stageCounts[stageName][1] += numReused
+
+        return [dict(parameters = gridPoint, peakGroups = peakGroups) for gridPoint, peakGroups in zip(gridPoints, allPeakGroups)]
+
+    def printStageCounts(self):
+        print("\n%-10s %10s %10s" % ("Stage", "Computed", "Reused"))
+        for stageName, (numComputed, numReused) in self.stageCounts.items():
+            print("%-10s %10d %10d" % (stageName, numComputed, numReused))
+
+def runSweepChunk(numInitCyclesToSkip, keepBaselineFits, dataFile, gridPoints):
+    # Evaluate a chunk of the grid in a worker process with its own stage memo.
+    chunkSweep = parameterSweep(numInitCyclesToSkip, keepBaselineFits)
+    chunkPeakGroups = [chunkSweep.evaluate(dataFile, gridPoint) for gridPoint in gridPoints]
+    return chunkPeakGroups, chunkSweep.stageCounts
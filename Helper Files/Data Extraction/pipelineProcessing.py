@@ -0,0 +1,131 @@
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import time
+import queue
+import threading
+
+# -------------------------------------------------------------------------- #
+# ----------------------------- Pipeline Stage ----------------------------- #
+
+class pipelineStage:
+    """
+    One step of the file pipeline, run in its own thread. Items are taken from the
+    input queue, processed, and put on the (bounded) output queue; a full output
+    queue blocks the stage, which is the backpressure on the earlier stages.
+    """
+
+    def __init__(self, stageName, stageFunction):
+        # Specify the stage.
+        self.stageName = stageName
+        self.stageFunction = stageFunction
+        self.inputQueue = None
+        self.outputQueue = None
+
+        # Initialize the utilization stats (seconds).
+        self.numItems = 0
+        self.busyTime = 0
+        self.waitingTime = 0    # Waiting for an item from the previous stage.
+        self.blockedTime = 0    # Waiting for room in the next stage's queue.
+        self.stageError = None
+
+    def runStage(self, stopItem, abortEvent):
+        while True:
+            # Get the next item.
+            startTime = time.perf_counter()
+            pipelineItem = self.inputQueue.get()
+            self.waitingTime += time.perf_counter() - startTime
+            if pipelineItem is stopItem:
+                break
+
+            # Process the item (after an error in any stage, only pass the stop signal along).
+            if not abortEvent.is_set():
+                startTime = time.perf_counter()
+                try:
+                    pipelineItem = self.stageFunction(pipelineItem)
+                    self.numItems += 1
+                except BaseException as stageError:
+                    self.stageError = stageError
+                    abortEvent.set()
+                self.busyTime += time.perf_counter() - startTime
+
+                # Hand the item to the next stage.
+                if not abortEvent.is_set() and self.outputQueue is not None:
+                    startTime = time.perf_counter()
+                    self.outputQueue.put(pipelineItem)
+                    self.blockedTime += time.perf_counter() - startTime
+
+        # Tell the next stage there are no more items.
+        if self.outputQueue is not None:
+            self.outputQueue.put(stopItem)
+
+# -------------------------------------------------------------------------- #
+# ------------------------------ File Pipeline ----------------------------- #
+
+class filePipeline:
+    """
+    Runs every file through the stages in order, with the stages overlapping in time:
+    while file N is analyzed, file N+1 can be parsed and file N-1 saved. At most
+    queueSize items wait between two stages.
+    """
+
+    def __init__(self, pipelineStages, queueSize = 1):
+        # Specify the pipeline.
+        self.pipelineStages = [pipelineStage(stageName, stageFunction) for stageName, stageFunction in pipelineStages]
+        self.queueSize = queueSize
+        self.pipelineTime = 0
+
+    def run(self, pipelineItems):
+        stopItem = object()
+        abortEvent = threading.Event()
+        # Connect the stages with bounded queues.
+        inputQueue = queue.Queue()
+        for stage in self.pipelineStages:
+            stage.inputQueue = inputQueue
+            inputQueue = queue.Queue(maxsize = self.queueSize)
+            stage.outputQueue = inputQueue
+        self.pipelineStages[-1].outputQueue = None
+
+        # Start every stage.
+        startTime = time.perf_counter()
+        stageThreads = [threading.Thread(target=stage.runStage, args=(stopItem, abortEvent), name=stage.stageName, daemon=True) for stage in self.pipelineStages]
+        for stageThread in stageThreads:
+            stageThread.start()
+        # Feed the items to the first stage.
+        for pipelineItem in pipelineItems:
+            if abortEvent.is_set():
+                break
+            self.pipelineStages[0].inputQueue.put(pipelineItem)
+        self.pipelineStages[0].inputQueue.put(stopItem)
+
+        # Wait for the last item to leave the pipeline.
+        for stageThread in stageThreads:
+            stageThread.join()
+        self.pipelineTime = time.perf_counter() - startTime
+
+        # Raise the first error from any stage.
+        for stage in self.pipelineStages:
+            if stage.stageError is not None:
+                raise stage.stageError
+
+    def getUtilization(self):
+        """
+        Returns the stats of each stage: {stageName: {numItems, busyTime, waitingTime, blockedTime, utilization}}
+        """
+        stageStats = {}
+        for stage in self.pipelineStages:
+            stageStats[stage.stageName] = {
+                "numItems": stage.numItems,
+                "busyTime": stage.busyTime,
+                "waitingTime": stage.waitingTime,
+                "blockedTime": stage.blockedTime,
+                "utilization": stage.busyTime / self.pipelineTime if self.pipelineTime else 0,
+            }
+        return stageStats
+
+    def printUtilization(self):
+        print("\nPipeline Utilization (" + str(round(self.pipelineTime, 2)) + " Seconds):")
+        print("\t%-10s %6s %12s %12s %12s %9s" % ("Stage", "Files", "Busy (s)", "Waiting (s)", "Blocked (s)", "Busy (%)"))
+        for stageName, stats in self.getUtilization().items():
+            print("\t%-10s %6d %12.2f %12.2f %12.2f %9.1f" % (stageName, stats["numItems"], stats["busyTime"], stats["waitingTime"], stats["blockedTime"], 100*stats["utilization"]))
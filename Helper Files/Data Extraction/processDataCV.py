@@ -10,13 +10,19 @@ Need to Install on the Anaconda Prompt:
 
 # Basic Modules
 import re
+import csv
 import sys
 import math
 import numpy as np
+import multiprocessing
 
 # Import Analysis Files
 sys.path.append('./Helper Files/Analysis Protocols/')
 import cvAnalysis
+import _statisticsProtocols
+from _profilingProtocols import profiler
+# Import the Shared Memory Frames
+import sharedFrames
 
 # -------------------------------------------------------------------------- #
 # ------------------------------- CV Analysis ------------------------------ #
@@ -108,7 +114,8 @@ class generalAnalysis():
 
 class processData(generalAnalysis):
     
-    def __init__(self, numInitCyclesToSkip, useCHIPeaks):
+    def __init__(self, numInitCyclesToSkip, useCHIPeaks, compactStorage = False, checkCompactStorage = False, numAnalysisWorkers = 1,
+                 reuseUnchangedCycles = False, maxCycleChange = 0.5, raggedCyclePolicy = "drop"):
         super().__init__()
         # Initialize CV analysis
         self.analyzeCV = cvAnalysis.cvProtocol()
@@ -118,38 +125,183 @@ class processData(generalAnalysis):
 
         # General Parameters
         self.scaleCurrent = 10**6
+        # Cycles whose segments do not have pointsPerSegment points: "drop" them or "pad" (edge-pad or trim) each segment.
+        self.raggedCyclePolicy = raggedCyclePolicy
+        assert raggedCyclePolicy in ("drop", "pad"), "Unknown raggedCyclePolicy: " + str(raggedCyclePolicy)
+        # Segments at most this many points too long are trimmed in both policies (a repeated sample in a sweep).
+        self.maxSegmentOverrun = 2
+        # The real (not padded) points of the last extracted frames: # frames, # points per scan
+        self.frameMasks = None
+        # The index of the first data segment of each extracted frame (CHI numbers the segments from 1).
+        self.frameSegmentInds = None
+        
+        # Specify the precision of the stored frames and results (the analysis always uses float64).
+        self.storageType = np.float32 if compactStorage else np.float64
+        self.checkCompactStorage = checkCompactStorage and compactStorage
+        # The significant digits reported for the peaks (movie legend): potential, current
+        self.reportedDigits = (3, 4)
+        
+        # Specify the processes that analyze the segments (1 = serial analysis).
+        self.numAnalysisWorkers = numAnalysisWorkers
+        # The peaks of a segment the workers can return (segments with more peaks are reanalyzed here).
+        self.maxPeaksPerSegment = 4
+        # A worker pool kept open between files (see startAnalysisPool); None starts a pool for each file.
+        self.analysisPool = None
+        
+        # Refit the peaks of a segment with the last analyzed baselines if the segment changed less than maxCycleChange (in noise units).
+        self.reuseUnchangedCycles = reuseUnchangedCycles
+        self.maxCycleChange = maxCycleChange
+        # Each segment is compared with the one before it, so the reuse only runs in the serial analysis.
+        assert not (reuseUnchangedCycles and numAnalysisWorkers > 1), "reuseUnchangedCycles needs the serial analysis (numAnalysisWorkers = 1)"
 
     def extractCHIData(self, chiWorksheet, startRow, scanRate, pointsPerScan):        
+        """
+        Reads the data from startRow (the first data row) and splits it into CV frames at the scan
+        vertices (see segmentCycles), skipping the first numInitCyclesToSkip cycles.
+        """
         # Get the Data
-        current = []; potential = []; time = [0]
-        currentFrames = []; potentialFrames = []; timeFrames = []
+        dataPoints = []
         for rowA, rowB in chiWorksheet.iter_rows(min_col=1, min_row=startRow, max_col=2, max_row=chiWorksheet.max_row):
-            # Get Potential and Current Data Points
-            potentialVal = rowA.value
-            currentVal = rowB.value
-            
             # If There is No More Data, Stop Recording
-            if potentialVal == None:
+            if rowA.value == None or rowA.value == "":
                 break
-            
-            # Add Data to Current Frame
-            potential.append(float(potentialVal))
-            current.append(float(currentVal)*self.scaleCurrent)
-            if len(potential) > 1:
-                timeGap =  abs(potential[-1] - potential[-2]) / scanRate
-                time.append(time[-1] + timeGap)
-            
-            # If Done Collecting Data, Collect as Frame and Start a New Frame
-            if len(potential) >= pointsPerScan:
-                # Add Current Frame
-                potentialFrames.append(potential)
-                currentFrames.append(current)
-                timeFrames.append(time)
-                # Reset for New Frame
-                current = []; potential = []; time = [time[-1] + timeGap]
+            dataPoints.append((rowA.value, rowB.value))
+        dataPoints = np.asarray(dataPoints, dtype=np.float64).reshape(-1, 2)
+        
+        return self.getCycleFrames(dataPoints[:, 0], dataPoints[:, 1]*self.scaleCurrent, scanRate, pointsPerScan)
+    
+    def segmentCycles(self, potential):
+        """
+        Finds the scan vertices from the sign changes of diff(potential) in one vectorized pass.
+        The vertex point starts the next segment, and a cycle starts at every vertex that turns back to the initial direction.
+            segmentTable: # segments x [startInd, endInd (exclusive), direction (+1 forward, -1 reverse)]
+            cycleTable: # cycles x [startInd, endInd (exclusive), firstSegmentInd, numSegments]
+        """
+        potential = np.asarray(potential, dtype=np.float64)
+        if len(potential) < 2:
+            return np.zeros((0, 3), dtype=int), np.zeros((0, 4), dtype=int)
+        # The direction of every step (held potentials keep the last direction).
+        stepDirections = np.sign(np.diff(potential)).astype(int)
+        movingSteps = np.flatnonzero(stepDirections)
+        if len(movingSteps) == 0:
+            return np.zeros((0, 3), dtype=int), np.zeros((0, 4), dtype=int)
+        lastMovingStep = np.maximum.accumulate(np.where(stepDirections != 0, np.arange(len(stepDirections)), movingSteps[0]))
+        stepDirections = stepDirections[lastMovingStep]
+        
+        # Segment at every change of direction.
+        vertexInds = np.flatnonzero(stepDirections[1:] != stepDirections[:-1]) + 1
+        segmentStarts = np.concatenate(([0], vertexInds))
+        segmentEnds = np.concatenate((vertexInds, [len(potential)]))
+        segmentTable = np.column_stack((segmentStarts, segmentEnds, stepDirections[segmentStarts]))
         
+        # Start a cycle at every segment in the initial direction.
+        cycleSegmentInds = np.flatnonzero(segmentTable[:, 2] == segmentTable[0, 2])
+        numCycleSegments = np.diff(np.concatenate((cycleSegmentInds, [len(segmentTable)])))
+        cycleTable = np.column_stack((segmentStarts[cycleSegmentInds], segmentEnds[cycleSegmentInds + numCycleSegments - 1], cycleSegmentInds, numCycleSegments))
+        
+        return segmentTable, cycleTable
+    
+    def getCycleFrames(self, potential, current, scanRate, pointsPerScan):
+        """
+        Splits the data into (# cycles, pointsPerScan) frames at the vertices (segmentCycles), skipping the
+        first numInitCyclesToSkip kept cycles. See selectCycles for the cycles that are kept.
+        """
+        # The running time of every point.
+        time = np.concatenate(([0], np.cumsum(np.abs(np.diff(potential))/scanRate)))
+        segmentTable, cycleTable = self.segmentCycles(potential)
+        cycleTable, segmentLengths = self.selectCycles(segmentTable, cycleTable, int(pointsPerScan/2))
+        # Skip the beginning cycles.
+        cycleTable = cycleTable[self.numInitCyclesToSkip:]; segmentLengths = segmentLengths[self.numInitCyclesToSkip:]
+        
+        currentFrames, potentialFrames, timeFrames, self.frameMasks = self.gatherCycleFrames(potential, current, time, segmentTable, cycleTable, segmentLengths, pointsPerScan)
+        self.frameSegmentInds = cycleTable[:, 2]
+        # Start the time at the first analyzed point.
+        if len(timeFrames) != 0:
+            timeFrames -= timeFrames[0, 0]
         return currentFrames, potentialFrames, timeFrames
     
+    def selectCycles(self, segmentTable, cycleTable, pointsPerSegment):
+        """
+        Keeps the cycles with both segments and returns them with the number of points used from each segment: # cycles x 2.
+        Segments up to maxSegmentOverrun points too long are trimmed. Other ragged cycles follow raggedCyclePolicy:
+        "drop" skips them (the later cycles are numbered one lower), "pad" edge-pads or trims each segment to pointsPerSegment.
+        """
+        cycleTable = cycleTable[cycleTable[:, 3] == 2]
+        segmentLengths = np.column_stack((segmentTable[cycleTable[:, 2], 1] - segmentTable[cycleTable[:, 2], 0], 
+                                          segmentTable[cycleTable[:, 2] + 1, 1] - segmentTable[cycleTable[:, 2] + 1, 0])).reshape(-1, 2)
+        # Trim the small overruns.
+        segmentLengths = np.where((pointsPerSegment < segmentLengths) & (segmentLengths <= pointsPerSegment + self.maxSegmentOverrun), pointsPerSegment, segmentLengths)
+        if self.raggedCyclePolicy == "drop":
+            regularCycles = (segmentLengths == pointsPerSegment).all(axis=1)
+            cycleTable = cycleTable[regularCycles]; segmentLengths = segmentLengths[regularCycles]
+        
+        return cycleTable, segmentLengths
+    
+    def gatherCycleFrames(self, potential, current, time, segmentTable, cycleTable, segmentLengths, pointsPerScan):
+        """
+        Gathers both segments of every selected cycle (padded with the last point of the segment) in one indexing step.
+        Returns the current, potential, and time frames and the mask of the real (not padded) points: # cycles x pointsPerScan.
+        """
+        pointsPerSegment = int(pointsPerScan/2)
+        segmentPoints = np.arange(pointsPerSegment)
+        segmentStarts = np.column_stack((segmentTable[cycleTable[:, 2], 0], segmentTable[cycleTable[:, 2] + 1, 0])).reshape(-1, 2)
+        frameInds = np.concatenate([segmentStarts[:, [segmentInd]] + np.minimum(segmentPoints, segmentLengths[:, [segmentInd]] - 1) for segmentInd in range(2)], axis=1)
+        frameMasks = np.concatenate([segmentPoints < segmentLengths[:, [segmentInd]] for segmentInd in range(2)], axis=1)
+        if pointsPerScan % 2 == 1:
+            # An odd number of points per scan keeps one more reverse point.
+            frameInds = np.column_stack((frameInds, np.minimum(cycleTable[:, 1] - 1, frameInds[:, -1] + 1)))
+            frameMasks = np.column_stack((frameMasks, segmentLengths[:, 1] > pointsPerSegment))
+        frameInds = frameInds.reshape(len(cycleTable), pointsPerScan)
+        
+        return current[frameInds], potential[frameInds], time[frameInds], frameMasks.reshape(len(cycleTable), pointsPerScan)
+    
+    def iterCHIFrames(self, dataPoints, scanRate, pointsPerScan):
+        """
+        Groups the (potential, current) data points into CV frames at the vertices, yielding one frame at a time.
+        The frames match getCycleFrames: the data is read a block at a time and every cycle is cut once the
+        next cycle has started, so only about one cycle is held in memory.
+        """
+        pointsPerSegment = int(pointsPerScan/2)
+        numCyclesToSkip = self.numInitCyclesToSkip; startTime = None
+        potential = []; current = []; bufferStartTime = 0
+        dataPoints = iter(dataPoints); dataFinished = False
+        while not dataFinished:
+            # Read the next block of points.
+            numNewPoints = 0
+            for potentialVal, currentVal in dataPoints:
+                # If There is No More Data, Stop Recording
+                if potentialVal == None or potentialVal == "":
+                    break
+                potential.append(float(potentialVal)); current.append(float(currentVal)*self.scaleCurrent)
+                numNewPoints += 1
+                if numNewPoints == pointsPerScan:
+                    break
+            dataFinished = numNewPoints < pointsPerScan
+            
+            # Find the cycles in the buffer (all but the last cycle are complete until the data ends).
+            bufferPotential = np.asarray(potential, dtype=np.float64); bufferCurrent = np.asarray(current, dtype=np.float64)
+            time = np.cumsum(np.concatenate(([bufferStartTime], np.abs(np.diff(bufferPotential))/scanRate)))
+            segmentTable, cycleTable = self.segmentCycles(bufferPotential)
+            completeCycles = cycleTable if dataFinished else cycleTable[:-1]
+            if len(completeCycles) == 0:
+                continue
+            
+            # Yield the kept cycles (after the skipped ones).
+            keptCycles, segmentLengths = self.selectCycles(segmentTable, completeCycles, pointsPerSegment)
+            numSkipped = min(numCyclesToSkip, len(keptCycles)); numCyclesToSkip -= numSkipped
+            currentFrames, potentialFrames, timeFrames, frameMasks = self.gatherCycleFrames(bufferPotential, bufferCurrent, time, segmentTable, keptCycles[numSkipped:], 
+                                                                                            segmentLengths[numSkipped:], pointsPerScan)
+            for currentFrame, potentialFrame, timeFrame in zip(currentFrames, potentialFrames, timeFrames):
+                # Start the time at the first analyzed point.
+                if startTime is None:
+                    startTime = timeFrame[0]
+                yield currentFrame.tolist(), potentialFrame.tolist(), (timeFrame - startTime).tolist()
+            
+            # Keep the points from the start of the last (incomplete) cycle.
+            bufferStart = cycleTable[-1, 0]
+            potential = potential[bufferStart:]; current = current[bufferStart:]
+            bufferStartTime = time[bufferStart]
+    
     def getRunInfo(self, chiWorksheet):
         # Set Initial Variables from last Run to Zero
         scanRate = None; sampleInterval = None; highVolt = None; lowVolt = None; startRow = None
@@ -183,97 +335,139 @@ class processData(generalAnalysis):
         # Find Point/Scan
         pointsPerScan = int(xRange/sampleInterval)
         pointsPerSegment = int(pointsPerScan/2)
-        # Adjust Which Cycle you Start at
+        # Adjust Which Cycle you Start at (extractCHIData skips the cycles from startRow)
         skipOffset = int(self.numInitCyclesToSkip*pointsPerScan)
-        startRow += skipOffset
         # Total Frames (Will Round Down to Remove Incomplete Scans); Frame = Cycle = 2 Segments
-        totalFrames = math.floor((chiWorksheet.max_row - startRow + 1)/pointsPerScan)
+        totalFrames = math.floor((chiWorksheet.max_row - startRow - skipOffset + 1)/pointsPerScan)
         numberOfSegments = totalFrames*2
 
         # Return all the CV information.
         return startRow, scanRate, pointsPerScan, pointsPerSegment, startSegment, numberOfSegments, skipOffset
     
-    def getPeaksCHI(self, chiWorksheet, startRow, startSegment, skipOffset, numberOfSegments):
-        # Create data structures to hold information: [OXIDATION, REDUCTION]
-        peakInfoHolder = [[], []]
+    def getPeakTableCHI(self, chiWorksheet, startSegment):
+        """
+        Reads every peak CHI reported in the header (from "Segment 1:" to the data) in one pass.
+        Returns arrays with one entry per peak: segmentNums, Ep (V), ip (A)
+        """
+        # Collect the header lines of the segments.
+        headerLines = []
+        for cellVal, in chiWorksheet.iter_rows(min_col=1, min_row=startSegment, max_col=1, values_only=True):
+            if cellVal == "Potential/V":
+                break
+            if cellVal != None:
+                headerLines.append(str(cellVal))
         
-        cycleNum = 0
-        for rowA in chiWorksheet.iter_rows(min_col=1, min_row=startSegment, max_col=1, max_row=startRow - 4 - skipOffset):
-            cellVal = rowA[0].value
-            if cellVal == None:
-                continue
+        # Extract all the labeled numbers at once: Segment #:, Ep = #V, ip = #A
+        headerInfo = re.findall(r"^(Segment|Ep|ip)\D*?(-?\d*\.?\d+(?:[Ee][-+]?\d+)?)", "\n".join(headerLines), re.MULTILINE)
+        if len(headerInfo) == 0:
+            return np.asarray([], dtype=int), np.asarray([]), np.asarray([])
+        headerLabels = np.asarray([headerLabel for headerLabel, headerValue in headerInfo])
+        headerValues = np.asarray([float(headerValue) for headerLabel, headerValue in headerInfo])
         
-            # Skip Over Bad Segments
-            if self.numInitCyclesToSkip > 0:
-                if rowA[0].row == startSegment:
-                    continue
-                if cellVal.startswith("Segment "):
-                    segment = float(cellVal[:-1].split("Segment ")[-1])
-                    self.numInitCyclesToSkip -= 0.5
-                if self.numInitCyclesToSkip != 0:
-                    continue
-            
-            # Find the Current Segment
-            if cellVal.startswith("Segment "): 
-                # Extract Segment Info
-                segment = float(cellVal[:-1].split("Segment ")[-1])
-                
-                # Finish the cycle giving every peak we are tracking a value
-                reductiveScan = not (segment%2 == 1)
-                peakInfoHolder[reductiveScan] = self.populateNullPeaks(peakInfoHolder[reductiveScan], cycleNum)
-                
-                # It is a New Cycle Everytime we Scan Forwards
-                if segment%2 == 1:
-                    cycleNum += 1
-                # Stop if Next is Incomplete Segment; Else Continue Looping
-                if cycleNum*2 == numberOfSegments+1:
-                    print("HERE")
-                    break
+        # Label every line with the segment it is in.
+        segmentMask = headerLabels == "Segment"
+        lineSegments = headerValues[segmentMask][np.maximum(np.cumsum(segmentMask) - 1, 0)].astype(int)
+        # Organize the peak information (CHI gives Ep and ip together for every peak).
+        peakMask = headerLabels == "Ep"
+        Ep = headerValues[peakMask]; ip = headerValues[headerLabels == "ip"]
+        assert len(Ep) == len(ip), "Every CHI peak needs an Ep and ip: " + str(len(Ep)) + " vs " + str(len(ip))
+        
+        return lineSegments[peakMask], Ep, ip
+    
+    def getPeaksCHI(self, chiWorksheet, startSegment, numFrames, pointsPerSegment):
+        """
+        Groups the peaks CHI reported for the analyzed cycles with the same rule as getPeaks and
+        returns them in the getPeaks shapes. CHI gives no baselines, so the baseline bounds and fits are NaN.
+        """
+        segmentNums, Ep, ip = self.getPeakTableCHI(chiWorksheet, startSegment)
+        # Odd segments scan forward (oxidation); a new cycle starts with every odd segment.
+        reductiveScans = (segmentNums % 2 == 0).astype(int)
+        if self.frameSegmentInds is not None and len(self.frameSegmentInds) == numFrames:
+            # Use the segments of the extracted frames (cycles can be dropped at ragged vertices).
+            segmentFrames = np.full(max(segmentNums.max(initial=0), self.frameSegmentInds.max(initial=0) + 2) + 1, -1)
+            segmentFrames[self.frameSegmentInds] = segmentFrames[self.frameSegmentInds + 1] = np.arange(numFrames)
+            cycleNums = segmentFrames[segmentNums - 1]
+        else:
+            cycleNums = (segmentNums - 1 - int(round(2*self.numInitCyclesToSkip)))//2
+        # The peak current in uAmps, positive in both directions like getPeaks.
+        peakCurrents = np.where(reductiveScans, -ip, ip)*self.scaleCurrent
+        
+        # Assign each peak of the analyzed cycles to a peak group.
+        peakTracker = peakGroupTracker(self.maxPeakPotentialDeviation)
+        peakInds = np.flatnonzero((0 <= cycleNums) & (cycleNums < numFrames))
+        peakGroupInds = [peakTracker.addPeak(reductiveScans[peakInd], Ep[peakInd], cycleNums[peakInd]) for peakInd in peakInds]
+        
+        bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups = [], [], [], []
+        for reductiveScan, numPeakGroups in enumerate(peakTracker.getNumPeakGroups()):
+            if numPeakGroups == 0:
+                emptyGroups = np.asarray([], dtype=np.float64)
+                bothPeakPotentialGroups.append(emptyGroups); bothPeakCurrentGroups.append(emptyGroups)
+                bothBaselineBoundsGroups.append(emptyGroups); bothBaselineFitGroups.append(emptyGroups)
                 continue
-            elif cellVal.startswith("Ep = "):
-                Ep = [float(x.split(":")[0]) for x in re.findall("-?\d+.?\d*(?:[Ee]-\d+)?", cellVal)][0]
-            # find the Peak Current in the Segment
-            elif cellVal.startswith("ip = "):
-                Ip = [float(x.split(":")[0]) for x in re.findall("-?\d+.?\d*(?:[Ee]-\d+)?", cellVal)][0]
-                
-                # Check if the scan is reductive or oxidative
-                reductiveScan = not (segment%2 == 1)
-                # Check if this is the first peak in the cycle
-                if len(peakInfoHolder[reductiveScan]) == cycleNum:
-                    peakInfoHolder[reductiveScan].append([])
-                # Add the peaks to the cycle
-                assert False
-                peakInfoHolder[reductiveScan] = self.addPeakInfo_toGroups(peakInfoHolder[reductiveScan], Ep, Ip, np.nan, [], cycleNum-1)
-        
-        # Add the peaks to the cycle
-        peakInfoHolder[0] = self.populateNullPeaks(peakInfoHolder[0], cycleNum)
-        peakInfoHolder[1] = self.populateNullPeaks(peakInfoHolder[1], cycleNum)
-
-        return peakInfoHolder
-    
-    def getPeaks(self, potentialFrames, currentFrames, pointsPerSegment):        
+            # Place the peaks of this scan direction in their group and cycle.
+            scanPeaks = reductiveScans[peakInds] == reductiveScan
+            scanGroupInds = np.asarray(peakGroupInds, dtype=int)[scanPeaks]
+            scanCycleNums = cycleNums[peakInds][scanPeaks]
+            peakPotentialGroups = np.full((numPeakGroups, numFrames), np.nan, dtype=np.float64)
+            peakCurrentGroups = np.full((numPeakGroups, numFrames), np.nan, dtype=np.float64)
+            peakPotentialGroups[scanGroupInds, scanCycleNums] = Ep[peakInds][scanPeaks]
+            peakCurrentGroups[scanGroupInds, scanCycleNums] = peakCurrents[peakInds][scanPeaks]
+            
+            bothPeakPotentialGroups.append(peakPotentialGroups); bothPeakCurrentGroups.append(peakCurrentGroups)
+            bothBaselineBoundsGroups.append(np.full((numPeakGroups, numFrames, 2), np.nan, dtype=np.float64))
+            bothBaselineFitGroups.append(np.full((numPeakGroups, numFrames, pointsPerSegment), np.nan, dtype=np.float64))
+        
+        # Assert the integrity of all the data
+        self.assertHolderIntegrity(bothPeakPotentialGroups[0], bothPeakCurrentGroups[0], bothBaselineBoundsGroups[0], bothBaselineFitGroups[0], numFrames, pointsPerSegment)
+        self.assertHolderIntegrity(bothPeakPotentialGroups[1], bothPeakCurrentGroups[1], bothBaselineBoundsGroups[1], bothBaselineFitGroups[1], numFrames, pointsPerSegment)
+        
+        return bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups
+    
+    def getPeaks(self, potentialFrames, currentFrames, pointsPerSegment, segmentAnalyses = None, frameMasks = None):
+        """
+        segmentAnalyses: Optional analyzeData output of every segment in order (cycle 1 oxidation, cycle 1 reduction, ...);
+            by default each segment is analyzed here.
+        frameMasks: Optional mask of the real points of each frame (getCycleFrames with raggedCyclePolicy = "pad").
+            Only the real points of a padded segment are analyzed, and its baselines are NaN over the padded points.
+        """
         # Create data structures to hold information: [OXIDATION, REDUCTION]
         bothPeakPotentialGroups, bothPeakCurrentGroups = [[], []], [[], []]
         bothBaselineBoundsGroups, bothBaselineFitGroups = [[], []], [[], []]
+        # The last fully analyzed segment of each scan direction (for reuseUnchangedCycles).
+        referenceSegments = [None, None]; numReusedSegments = 0
                 
         # Loop through each CV cycle
         for cycleNum in range(len(potentialFrames)):
-            # Extract the Potential and the Current
-            potentialFull = potentialFrames[cycleNum]
-            currentFull = currentFrames[cycleNum]
+            # Extract the Potential and the Current (analyzed in float64 for any storage precision)
+            potentialFull = np.asarray(potentialFrames[cycleNum], dtype=np.float64)
+            currentFull = np.asarray(currentFrames[cycleNum], dtype=np.float64)
             
             # Extract each segment in the scan
             for segmentScale in range(2):
                 potential = potentialFull[segmentScale*pointsPerSegment:(segmentScale+1)*pointsPerSegment]
                 current = currentFull[segmentScale*pointsPerSegment:(segmentScale+1)*pointsPerSegment]
+                # Leave out the padded points (the padding is at the end of the segment).
+                numRealPoints = pointsPerSegment
+                if frameMasks is not None:
+                    numRealPoints = int(np.count_nonzero(frameMasks[cycleNum][segmentScale*pointsPerSegment:(segmentScale+1)*pointsPerSegment]))
+                    potential = potential[:numRealPoints]; current = current[:numRealPoints]
                 
                 # Analyze each segment
-                allLinearFits, peakPotentials, peakCurrents, allLinearFitBounds, reductiveScan = self.analyzeCV.analyzeData(potential, current)
+                if segmentAnalyses is not None:
+                    allLinearFits, peakPotentials, peakCurrents, allLinearFitBounds, reductiveScan = next(segmentAnalyses)
+                elif self.reuseUnchangedCycles:
+                    segmentAnalysis, segmentReused = self.analyzeSegmentDelta(potential, current, referenceSegments, segmentScale)
+                    allLinearFits, peakPotentials, peakCurrents, allLinearFitBounds, reductiveScan = segmentAnalysis
+                    numReusedSegments += segmentReused
+                else:
+                    allLinearFits, peakPotentials, peakCurrents, allLinearFitBounds, reductiveScan = self.analyzeCV.analyzeData(potential, current)
 
                 # For each peak found in the data.
                 for fitInd in range(len(allLinearFits)):
                     linearFit, linearFitBounds = allLinearFits[fitInd], allLinearFitBounds[fitInd]
                     peakPotential, peakCurrent = peakPotentials[fitInd], peakCurrents[fitInd]
+                    if numRealPoints != pointsPerSegment:
+                        linearFit = np.concatenate((linearFit, np.full(pointsPerSegment - numRealPoints, np.nan)))
                     
                     # Compile all the data collected for this peak.
                     self.addPeakInfo_toGroups(bothPeakPotentialGroups[reductiveScan], bothPeakCurrentGroups[reductiveScan], 
@@ -281,31 +475,108 @@ class processData(generalAnalysis):
                                               peakPotential, peakCurrent, linearFitBounds, linearFit, cycleNum)
                 
                 self.padAllGroups(bothPeakPotentialGroups[reductiveScan], bothPeakCurrentGroups[reductiveScan], 
-                                  bothBaselineBoundsGroups[reductiveScan], bothBaselineFitGroups[reductiveScan], cycleNum, len(potential))
+                                  bothBaselineBoundsGroups[reductiveScan], bothBaselineFitGroups[reductiveScan], cycleNum, pointsPerSegment)
                 # Assert the integrity of the data collection.
                 if len(bothPeakPotentialGroups[reductiveScan]) !=0:
                     assert len(bothPeakPotentialGroups[reductiveScan][0]) == cycleNum + 1, print("Likely two similar peaks recorded as same group", len(bothPeakPotentialGroups[reductiveScan][0]), cycleNum + 1)
+        if self.reuseUnchangedCycles and segmentAnalyses is None:
+            print("\tRefit", numReusedSegments, "of", 2*len(potentialFrames), "Segments with the Previous Baselines (" + "%.1f"%(100*numReusedSegments/max(2*len(potentialFrames), 1)) + "%)")
+            profiler.count("segmentsReused", numReusedSegments)
         # bothBaselineFitGroups Dim: 2, # groups, # frames, # points per red/ox
         # bothPeakCurrentGroups Dim: 2, # groups, # frames
         # bothPeakPotentialGroups Dim: 2, # groups, # frames
         # bothBaselineBoundsGroups Dim: 2, # groups, # frames, # points per red/ox
         # Convert to numpy arrays.
-        bothBaselineFitGroups[0] = np.asarray(bothBaselineFitGroups[0])
-        bothPeakCurrentGroups[0] = np.asarray(bothPeakCurrentGroups[0])
-        bothPeakPotentialGroups[0] = np.asarray(bothPeakPotentialGroups[0])
-        bothBaselineBoundsGroups[0] = np.asarray(bothBaselineBoundsGroups[0])
+        bothBaselineFitGroups[0] = np.asarray(bothBaselineFitGroups[0], dtype=np.float64)
+        bothPeakCurrentGroups[0] = np.asarray(bothPeakCurrentGroups[0], dtype=np.float64)
+        bothPeakPotentialGroups[0] = np.asarray(bothPeakPotentialGroups[0], dtype=np.float64)
+        bothBaselineBoundsGroups[0] = np.asarray(bothBaselineBoundsGroups[0], dtype=np.float64)
         # Convert to numpy arrays.
-        bothBaselineFitGroups[1] = np.asarray(bothBaselineFitGroups[1])
-        bothPeakCurrentGroups[1] = np.asarray(bothPeakCurrentGroups[1])
-        bothPeakPotentialGroups[1] = np.asarray(bothPeakPotentialGroups[1])
-        bothBaselineBoundsGroups[1] = np.asarray(bothBaselineBoundsGroups[1])
+        bothBaselineFitGroups[1] = np.asarray(bothBaselineFitGroups[1], dtype=np.float64)
+        bothPeakCurrentGroups[1] = np.asarray(bothPeakCurrentGroups[1], dtype=np.float64)
+        bothPeakPotentialGroups[1] = np.asarray(bothPeakPotentialGroups[1], dtype=np.float64)
+        bothBaselineBoundsGroups[1] = np.asarray(bothBaselineBoundsGroups[1], dtype=np.float64)
         
         # Assert the integrity of all the data
-        self.assertHolderIntegrity(bothPeakPotentialGroups[0], bothPeakCurrentGroups[0], bothBaselineBoundsGroups[0], bothBaselineFitGroups[0], len(potentialFrames), len(potential))
-        self.assertHolderIntegrity(bothPeakPotentialGroups[1], bothPeakCurrentGroups[1], bothBaselineBoundsGroups[1], bothBaselineFitGroups[1], len(potentialFrames), len(potential))
+        self.assertHolderIntegrity(bothPeakPotentialGroups[0], bothPeakCurrentGroups[0], bothBaselineBoundsGroups[0], bothBaselineFitGroups[0], len(potentialFrames), pointsPerSegment)
+        self.assertHolderIntegrity(bothPeakPotentialGroups[1], bothPeakCurrentGroups[1], bothBaselineBoundsGroups[1], bothBaselineFitGroups[1], len(potentialFrames), pointsPerSegment)
 
         return bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups
-            
+
+    def analyzeSegmentDelta(self, potential, current, referenceSegments, segmentScale):
+        """
+        Analyzes a segment like analyzeData, but refits the peaks with the baselines of the last fully analyzed
+        segment in this scan direction (referenceSegments[segmentScale]) if the filtered current changed less than
+        maxCycleChange. Comparing against the last analyzed segment (not the last refit one) keeps slow drifts from adding up.
+        Returns the analyzeData output and whether the segment was refit.
+        """
+        filteredCurrent, firstDeriv, reductiveScan, samplingFreq = self.analyzeCV.filterData(potential, current)
+        
+        # Refit the peaks if the segment is unchanged within the noise.
+        referenceSegment = referenceSegments[segmentScale]
+        if referenceSegment is not None and referenceSegment["reductiveScan"] == reductiveScan and len(referenceSegment["filteredCurrent"]) == len(filteredCurrent):
+            if self.analyzeCV.getSegmentChange(current, filteredCurrent, referenceSegment["filteredCurrent"]) < self.maxCycleChange:
+                segmentAnalysis = self.analyzeCV.refitPeaks(potential, filteredCurrent, reductiveScan, referenceSegment["baselinePairs"])
+                if segmentAnalysis is not None:
+                    return segmentAnalysis, True
+        
+        # Analyze the segment and use it as the new reference (if it has peaks to refit).
+        segmentAnalysis = self.analyzeCV.analyzeFilteredData(potential, filteredCurrent, firstDeriv, reductiveScan, samplingFreq)
+        referenceSegments[segmentScale] = None
+        if len(self.analyzeCV.baselinePairs) != 0:
+            referenceSegments[segmentScale] = dict(filteredCurrent = filteredCurrent, reductiveScan = reductiveScan, baselinePairs = list(self.analyzeCV.baselinePairs))
+        return segmentAnalysis, False
+
+    def getPeaksParallel(self, potentialFrames, currentFrames, pointsPerSegment):
+        """
+        getPeaks with the segments analyzed by numAnalysisWorkers processes. The segments are put in shared
+        memory once and every worker analyzes a range of rows in place, writing its peaks into preallocated
+        shared outputs; only the array handles and row ranges are pickled. The peaks are grouped here.
+        """
+        numFrames = len(potentialFrames)
+        with sharedFrames.sharedFrameStore() as frameStore:
+            # Share the segments: (cycles x 2, points)
+            potentialSegments = frameStore.addArray("potential", np.asarray(potentialFrames, dtype=np.float64)[:, 0:2*pointsPerSegment].reshape(-1, pointsPerSegment))
+            frameStore.addArray("current", np.asarray(currentFrames, dtype=np.float64)[:, 0:2*pointsPerSegment].reshape(-1, pointsPerSegment))
+            numSegments = len(potentialSegments)
+            # Allocate the outputs of every segment.
+            numPeaks = frameStore.allocateArray("numPeaks", (numSegments,), np.int64, fillValue = -1)
+            reductiveScans = frameStore.allocateArray("reductiveScans", (numSegments,), np.bool_, fillValue = False)
+            peakPotentials = frameStore.allocateArray("peakPotentials", (numSegments, self.maxPeaksPerSegment))
+            peakCurrents = frameStore.allocateArray("peakCurrents", (numSegments, self.maxPeaksPerSegment))
+            linearFitBounds = frameStore.allocateArray("linearFitBounds", (numSegments, self.maxPeaksPerSegment, 2))
+            linearFits = frameStore.allocateArray("linearFits", (numSegments, self.maxPeaksPerSegment, pointsPerSegment))
+
+            # Analyze a few row ranges per worker to balance the load.
+            rangeBounds = np.unique(np.linspace(0, numSegments, 4*self.numAnalysisWorkers + 1).astype(int))
+            analysisJobs = [(frameStore.getHandles(), self.maxPeaksPerSegment, rangeBounds[rangeInd], rangeBounds[rangeInd+1]) for rangeInd in range(len(rangeBounds) - 1)]
+            print("\tAnalyzing", numSegments, "Segments with", self.numAnalysisWorkers, "Workers")
+            if self.analysisPool is not None:
+                self.analysisPool.starmap(analyzeSharedSegments, analysisJobs)
+            else:
+                with multiprocessing.Pool(self.numAnalysisWorkers) as analysisPool:
+                    analysisPool.starmap(analyzeSharedSegments, analysisJobs)
+            assert (numPeaks >= 0).all(), "A worker did not analyze all its segments"
+
+            # Read the analysis of each segment as getPeaks asks for them.
+            def readSegmentAnalyses():
+                for segmentInd in range(numSegments):
+                    # Reanalyze the segments with more peaks than the outputs hold.
+                    if numPeaks[segmentInd] > self.maxPeaksPerSegment:
+                        yield self.analyzeCV.analyzeData(potentialSegments[segmentInd].copy(), frameStore.sharedArrays["current"][segmentInd].copy())
+                        continue
+                    peakInds = range(numPeaks[segmentInd])
+                    yield ([linearFits[segmentInd, peakInd].copy() for peakInd in peakInds], [float(peakPotentials[segmentInd, peakInd]) for peakInd in peakInds],
+                           [float(peakCurrents[segmentInd, peakInd]) for peakInd in peakInds], linearFitBounds[segmentInd, 0:numPeaks[segmentInd]].astype(int),
+                           bool(reductiveScans[segmentInd]))
+            peakGroups = self.getPeaks(potentialFrames, currentFrames, pointsPerSegment, readSegmentAnalyses())
+
+            # Release the views before the shared memory is freed.
+            potentialSegments = numPeaks = reductiveScans = peakPotentials = peakCurrents = linearFitBounds = linearFits = None
+        profiler.count("segmentsAnalyzedInWorkers", 2*numFrames)
+
+        return peakGroups
+
     def assertHolderIntegrity(self, peakPotentialGroups, peakCurrentGroups, baselineBoundsGroups, baselineFitGroups, numFrames, numPoints):
         numGroups = len(peakPotentialGroups)
         if numGroups != 0:
@@ -320,26 +591,534 @@ class processData(generalAnalysis):
             assert peakPotentialGroups.shape == (0,), peakPotentialGroups.shape
             assert baselineBoundsGroups.shape == (0,), baselineBoundsGroups.shape
             assert baselineFitGroups.shape == (0,), baselineFitGroups.shape
+    
+    def checkStoragePrecision(self, referencePeakGroups, compactPeakGroups):
+        """
+        Tolerance check for compactStorage: the stored float32 peaks must match the float64 peaks of the
+        analysis to the reported digits (%.3g volts, %.4g uAmps), i.e. within half a unit of the last reported
+        digit. The peaks are always found in float64 and float32 rounds by less than 1e-7, so a mismatch
+        means the storage lost the reported precision. Raises a ValueError naming the first peak that changed.
+            referencePeakGroups, compactPeakGroups: (bothPeakPotentialGroups, bothPeakCurrentGroups)
+        """
+        for peakName, referenceGroups, compactGroups, numDigits in zip(["Peak Potential", "Peak Current"], referencePeakGroups, compactPeakGroups, self.reportedDigits):
+            # Compare to half of the last reported digit.
+            peakTolerance = 0.5*10**(1 - numDigits)
+            for reductiveScan, scanName in enumerate(["Oxidation", "Reduction"]):
+                referencePeaks = np.asarray(referenceGroups[reductiveScan], dtype=np.float64)
+                compactPeaks = np.asarray(compactGroups[reductiveScan], dtype=np.float64)
+                # The same peaks must be stored for every cycle.
+                if referencePeaks.shape != compactPeaks.shape:
+                    raise ValueError(scanName + " " + peakName + " groups changed with compact storage: " + str(referencePeaks.shape) + " vs " + str(compactPeaks.shape))
+                changedPeaks = ~np.isclose(compactPeaks, referencePeaks, rtol=peakTolerance, atol=0, equal_nan=True)
+                if changedPeaks.any():
+                    peakGroupInd, cycleNum = np.argwhere(changedPeaks)[0]
+                    raise ValueError(scanName + " " + peakName + " of peak group " + str(peakGroupInd + 1) + " changed with compact storage in cycle " + str(cycleNum) + 
+                                     ": " + str(float(referencePeaks[peakGroupInd, cycleNum])) + " vs " + str(float(compactPeaks[peakGroupInd, cycleNum])))
 
-    def processCV(self, xlWorksheet, xlWorkbook):  
+    def storeResults(self, bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, currentFrames, potentialFrames, timeFrames):
+        """
+        Returns the float64 analysis (the processCV output) in the storage precision, checking the stored peaks
+        with checkCompactStorage. The running time is a cumulative sum, so it stays float64.
+        """
+        storedGroups = [[np.asarray(peakGroups, dtype=self.storageType) for peakGroups in bothGroups] 
+                        for bothGroups in (bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups)]
+        if self.checkCompactStorage:
+            self.checkStoragePrecision((bothPeakPotentialGroups, bothPeakCurrentGroups), storedGroups[0:2])
+        
+        return (*storedGroups, np.asarray(currentFrames, dtype=self.storageType), np.asarray(potentialFrames, dtype=self.storageType), np.asarray(timeFrames, dtype=np.float64))
+
+    def extractFrames(self, xlWorksheet):
+        """
+        The extraction steps of processCV. Returns the float64 CV frames, pointsPerSegment, startSegment,
+        and the pad masks (None if no frame is padded). The frames are stored with storeResults after the analysis.
+        """
         # Get the details about the the CV program
-        startRow, scanRate, pointsPerScan, pointsPerSegment, startSegment, numberOfSegments, skipOffset = self.getRunInfo(xlWorksheet)
+        with profiler.stage("getRunInfo"):
+            startRow, scanRate, pointsPerScan, pointsPerSegment, startSegment, numberOfSegments, skipOffset = self.getRunInfo(xlWorksheet)
         
         # Get the Current/Potential/Times of each CV scan.
-        currentFrames, potentialFrames, timeFrames = self.extractCHIData(xlWorksheet, startRow, scanRate, pointsPerScan)
+        with profiler.stage("extractCHIData"):
+            currentFrames, potentialFrames, timeFrames = self.extractCHIData(xlWorksheet, startRow, scanRate, pointsPerScan)
+        profiler.count("cyclesExtracted", len(currentFrames))
+        # Leave the padded points of ragged cycles out of the analysis.
+        frameMasks = self.frameMasks if self.frameMasks is not None and not self.frameMasks.all() else None
+        # Analyze the frames in float64 for any storage precision.
+        currentFrames = np.asarray(currentFrames, dtype=np.float64)
+        potentialFrames = np.asarray(potentialFrames, dtype=np.float64)
+        timeFrames = np.asarray(timeFrames, dtype=np.float64)
         print("\tFinished Data Extraction");
         
+        return currentFrames, potentialFrames, timeFrames, pointsPerSegment, startSegment, frameMasks
+
+    def processCV(self, xlWorksheet, xlWorkbook):  
+        currentFrames, potentialFrames, timeFrames, pointsPerSegment, startSegment, frameMasks = self.extractFrames(xlWorksheet)
+        
         # Find the peaks in each CV scan
         if self.useCHIPeaks:
-            bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups = self.getPeaksCHI(xlWorksheet, startRow, startSegment, skipOffset, numberOfSegments)
+            with profiler.stage("getPeaksCHI"):
+                bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups = self.getPeaksCHI(xlWorksheet, startSegment, len(potentialFrames), pointsPerSegment)
         else:
-            bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups = self.getPeaks(potentialFrames, currentFrames, pointsPerSegment)
+            with profiler.stage("getPeaks"):
+                if self.numAnalysisWorkers > 1 and frameMasks is None:
+                    bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups = self.getPeaksParallel(potentialFrames, currentFrames, pointsPerSegment)
+                else:
+                    # The workers analyze full segments, so padded frames are analyzed here.
+                    bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups = self.getPeaks(potentialFrames, currentFrames, pointsPerSegment, frameMasks = frameMasks)
             
         # Finished Data Collection: Close Workbook and Return Data to User
         xlWorkbook.close()
         print("\tFinished Data Analysis");
-        return bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, currentFrames, potentialFrames, timeFrames
+        return self.storeResults(bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, currentFrames, potentialFrames, timeFrames)
+    
+    # ---------------------------------------------------------------------- #
+    # ------------------------ Lockstep Replicates ------------------------- #
+    
+    def processCVReplicates(self, xlWorksheets, xlWorkbooks):
+        """
+        Analyzes a batch of files like processCV, in lockstep for replicates. The files with the
+        same run settings (scan rate and points per scan) have all their segments stacked into one
+        (files x cycles x 2, points) array, which is filtered in one vectorized pass before the
+        per-file peak grouping. Returns the processCV output of every file, in order.
+        """
+        assert not self.useCHIPeaks, "Lockstep analysis reanalyzes the CV curves"
+        assert self.raggedCyclePolicy == "drop", "Lockstep analysis stacks full segments (raggedCyclePolicy = 'drop')"
+        assert not self.reuseUnchangedCycles, "Lockstep analysis filters every segment (reuseUnchangedCycles = False)"
+        # Extract the CV frames of every file and group the files by their run settings.
+        allFileFrames = []; replicateGroups = {}
+        for fileInd, (xlWorksheet, xlWorkbook) in enumerate(zip(xlWorksheets, xlWorkbooks)):
+            startRow, scanRate, pointsPerScan, pointsPerSegment, startSegment, numberOfSegments, skipOffset = self.getRunInfo(xlWorksheet)
+            currentFrames, potentialFrames, timeFrames = self.extractCHIData(xlWorksheet, startRow, scanRate, pointsPerScan)
+            xlWorkbook.close()
+            # Analyze the frames in float64 (see processCV).
+            allFileFrames.append((np.asarray(currentFrames, dtype=np.float64).reshape(len(currentFrames), pointsPerScan), 
+                                  np.asarray(potentialFrames, dtype=np.float64).reshape(len(potentialFrames), pointsPerScan),
+                                  np.asarray(timeFrames, dtype=np.float64), pointsPerSegment))
+            replicateGroups.setdefault((scanRate, pointsPerScan), []).append(fileInd)
+        print("\tFinished Data Extraction of", len(allFileFrames), "Files in", len(replicateGroups), "Replicate Groups")
+        
+        allResults = [None]*len(allFileFrames)
+        for replicateInds in replicateGroups.values():
+            pointsPerSegment = allFileFrames[replicateInds[0]][3]
+            # Stack the segments of every replicate: (files x cycles x 2, points)
+            fileSegments = []
+            for fileInd in replicateInds:
+                currentFrames, potentialFrames = allFileFrames[fileInd][0:2]
+                fileSegments.append((currentFrames[:, 0:2*pointsPerSegment].reshape(-1, pointsPerSegment), potentialFrames[:, 0:2*pointsPerSegment].reshape(-1, pointsPerSegment)))
+            filteredCurrents, firstDerivs, reductiveScans, samplingFreqs = self.analyzeCV.filterSegments(np.concatenate([potentials for currents, potentials in fileSegments]), 
+                                                                                                       np.concatenate([currents for currents, potentials in fileSegments]))
+            
+            # Find and group the peaks of each file.
+            segmentBounds = np.cumsum([0] + [len(currents) for currents, potentials in fileSegments])
+            for groupInd, fileInd in enumerate(replicateInds):
+                currentFrames, potentialFrames, timeFrames, pointsPerSegment = allFileFrames[fileInd]
+                potentialSegments = fileSegments[groupInd][1]
+                # Find the peaks of each filtered segment as getPeaks asks for them.
+                segmentAnalyses = (self.analyzeCV.analyzeFilteredData(potentialSegments[segmentInd - segmentBounds[groupInd]], filteredCurrents[segmentInd], 
+                                                                      firstDerivs[segmentInd], reductiveScans[segmentInd], samplingFreqs[segmentInd]) 
+                                   for segmentInd in range(segmentBounds[groupInd], segmentBounds[groupInd+1]))
+                bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups = self.getPeaks(potentialFrames, currentFrames, pointsPerSegment, segmentAnalyses)
+                
+                allResults[fileInd] = self.storeResults(bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, currentFrames, potentialFrames, timeFrames)
+                allFileFrames[fileInd] = None
+        print("\tFinished Data Analysis")
+        
+        return allResults
+    
+    # ---------------------------------------------------------------------- #
+    # ------------------------- Streaming Analysis ------------------------- #
+    
+    def getRunInfoCHI(self, chiRows):
+        """
+        Reads the header of a CHI text file (rows from csv.reader) up to the first data row.
+        Mirrors getRunInfo without loading the whole file into a worksheet.
+        """
+        scanRate = None; sampleInterval = None; highVolt = None; lowVolt = None
+        for row in chiRows:
+            if len(row) == 0:
+                continue
+            cellVal = row[0]
+            
+            # Find the Scan Rate (Volts/Second)
+            if cellVal.startswith("Scan Rate (V/s) = "):
+                scanRate = float(cellVal.split(" = ")[-1])
+            # Find the Sample Interval (Voltage Different Between Points)
+            elif cellVal.startswith("Sample Interval (V) = "):
+                sampleInterval = float(cellVal.split(" = ")[-1])
+            # Find the Highest Voltage
+            elif cellVal.startswith("High E (V) = "):
+                highVolt = float(cellVal.split(" = ")[-1])
+            # Find the Lowest Voltage
+            elif cellVal.startswith("Low E (V) = "):
+                lowVolt = float(cellVal.split(" = ")[-1])
+            elif cellVal == "Potential/V":
+                # Skip the empty row before the data.
+                next(chiRows, None)
+                break
+        # Find Point/Scan
+        pointsPerScan = int((highVolt - lowVolt)*2/sampleInterval)
+        pointsPerSegment = int(pointsPerScan/2)
+        
+        return scanRate, pointsPerScan, pointsPerSegment
+        
+    def streamCHIFrames(self, dataFile):
+        """
+        Yields the (current, potential, time) frames of a CHI text file one cycle at a time (the frames of getCycleFrames).
+        The frames carry no pad mask, so only the regular cycles are streamed (raggedCyclePolicy = "drop").
+        """
+        assert self.raggedCyclePolicy == "drop", "Streaming keeps the regular cycles only (raggedCyclePolicy = 'drop')"
+        with open(dataFile, "r") as chiFile:
+            chiRows = csv.reader(chiFile, delimiter = ",")
+            scanRate, pointsPerScan, pointsPerSegment = self.getRunInfoCHI(chiRows)
+            
+            # Yield every complete frame (iterCHIFrames skips the beginning cycles).
+            dataPoints = ((row[0], row[1]) if len(row) >= 2 else (None, None) for row in chiRows)
+            yield from self.iterCHIFrames(dataPoints, scanRate, pointsPerScan)
+        
+    def loadCHIFrames(self, dataFile):
+        """
+        Reads a whole CHI text file into arrays and returns its (current, potential, time) frames from getCycleFrames.
+        The same frames as processCV without the Excel conversion (streamCHIFrames yields them one at a time).
+        """
+        with open(dataFile, "r") as chiFile:
+            chiRows = csv.reader(chiFile, delimiter = ",")
+            scanRate, pointsPerScan, pointsPerSegment = self.getRunInfoCHI(chiRows)
+            dataPoints = []
+            for row in chiRows:
+                # If There is No More Data, Stop Recording
+                if len(row) < 2 or row[0] == "":
+                    break
+                dataPoints.append((float(row[0]), float(row[1])))
+        dataPoints = np.asarray(dataPoints, dtype=np.float64).reshape(-1, 2)
+        
+        return self.getCycleFrames(dataPoints[:, 0], dataPoints[:, 1]*self.scaleCurrent, scanRate, pointsPerScan)
+        
+    def streamPeaks(self, cvFrames):
+        """
+        Analyzes and groups the peaks one cycle at a time, yielding a result per cycle:
+            cycleNum, currentFrame, potentialFrame, timeFrame: The CV data of this cycle.
+            bothCyclePeaks: [OXIDATION, REDUCTION] lists of (peakGroupInd, peakPotential, peakCurrent, linearFitBounds, baselineLine).
+            numPeakGroupsBoth: The number of peak groups found so far.
+        """
+        peakTracker = peakGroupTracker(self.maxPeakPotentialDeviation)
+        # Loop through each CV cycle
+        for cycleNum, (currentFull, potentialFull, timeFull) in enumerate(cvFrames):
+            pointsPerSegment = int(len(potentialFull)/2)
+            bothCyclePeaks = [[], []]
+            
+            # Extract each segment in the scan
+            for segmentScale in range(2):
+                potential = potentialFull[segmentScale*pointsPerSegment:(segmentScale+1)*pointsPerSegment]
+                current = currentFull[segmentScale*pointsPerSegment:(segmentScale+1)*pointsPerSegment]
+                
+                # Analyze each segment
+                allLinearFits, peakPotentials, peakCurrents, allLinearFitBounds, reductiveScan = self.analyzeCV.analyzeData(potential, current)
+                
+                # For each peak found in the data.
+                for fitInd in range(len(allLinearFits)):
+                    # Only keep the baseline line (not the full fit) for the movie.
+                    baselineLine = self.analyzeCV.getBaselineLine(potential, allLinearFits[fitInd], reductiveScan)
+                    peakGroupInd = peakTracker.addPeak(reductiveScan, peakPotentials[fitInd], cycleNum)
+                    bothCyclePeaks[reductiveScan].append((peakGroupInd, peakPotentials[fitInd], peakCurrents[fitInd], allLinearFitBounds[fitInd], baselineLine))
+            
+            yield dict(cycleNum = cycleNum, currentFrame = currentFull, potentialFrame = potentialFull, timeFrame = timeFull, 
+                       bothCyclePeaks = bothCyclePeaks, numPeakGroupsBoth = peakTracker.getNumPeakGroups())
+    
+    def streamCV(self, dataFile):
+        # Stream the analysis of every cycle in the CHI text file.
+        assert not self.reuseUnchangedCycles, "Streaming analyzes every segment (reuseUnchangedCycles = False)"
+        return self.streamPeaks(self.streamCHIFrames(dataFile))
+    
+    # ---------------------------------------------------------------------- #
+    # ------------------------ Progressive Analysis ------------------------ #
+    
+    def processCVProgressive(self, xlWorksheet, xlWorkbook, publishResults, numQuickLookCycles = 20, quickLookSpacing = "log"):
+        """
+        processCV that analyzes a sparse subset of the cycles first and backfills the rest (see progressiveAnalysis).
+        publishResults is called with the provisional peaks after the quick look and as the backfill refines them.
+        The backfill runs before returning; the returned results are the same as processCV.
+        """
+        assert not self.useCHIPeaks, "Progressive analysis reanalyzes the CV curves"
+        assert self.raggedCyclePolicy == "drop", "Progressive analysis analyzes full segments (raggedCyclePolicy = 'drop')"
+        assert not self.reuseUnchangedCycles, "Progressive analysis analyzes the cycles out of order (reuseUnchangedCycles = False)"
+        assert self.numAnalysisWorkers == 1, "Progressive analysis analyzes one cycle at a time (numAnalysisWorkers = 1)"
+        # Get the Current/Potential/Times of each CV scan (as processCV).
+        currentFrames, potentialFrames, timeFrames, pointsPerSegment, startSegment, frameMasks = self.extractFrames(xlWorksheet)
+        xlWorkbook.close()
+        
+        # Publish the quick look, then backfill every cycle.
+        with profiler.stage("getPeaks"):
+            cvProgress = progressiveAnalysis(self, potentialFrames, currentFrames, pointsPerSegment, numQuickLookCycles, quickLookSpacing)
+            bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups = cvProgress.run(publishResults)
+        print("\tFinished Data Analysis")
+        
+        return self.storeResults(bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, currentFrames, potentialFrames, timeFrames)
 
+# -------------------------------------------------------------------------- #
+# ------------------------- Streaming Peak Groups -------------------------- #
+
+class peakGroupTracker:
+    """
+    Assigns each new peak to a peak group with the same rule as addPeakInfo_toGroups,
+    keeping only the last three peak potentials of each group.
+    """
+    
+    def __init__(self, maxPeakPotentialDeviation):
+        self.maxPeakPotentialDeviation = maxPeakPotentialDeviation
+        # The recent peak potentials and the last cycle of every group: [OXIDATION, REDUCTION]
+        self.bothRecentPotentials = [[], []]
+        self.bothLastCycles = [[], []]
+        
+    def getNumPeakGroups(self):
+        return [len(self.bothRecentPotentials[0]), len(self.bothRecentPotentials[1])]
+    
+    def addPeak(self, reductiveScan, peakPotential, cycleNum):
+        recentPotentials = self.bothRecentPotentials[reductiveScan]
+        lastCycles = self.bothLastCycles[reductiveScan]
+        
+        # Find the first group whose recent peaks are within range.
+        for peakGroupInd in range(len(recentPotentials)):
+            if abs(peakPotential - np.mean(recentPotentials[peakGroupInd])) < self.maxPeakPotentialDeviation:
+                break
+        else:
+            # Make a new group.
+            recentPotentials.append([]); lastCycles.append(-1)
+            peakGroupInd = len(recentPotentials) - 1
+        # Every group has at most one peak per cycle.
+        assert lastCycles[peakGroupInd] != cycleNum, "Likely two similar peaks recorded as same group"
+        
+        # Add the peak to the group.
+        recentPotentials[peakGroupInd] = (recentPotentials[peakGroupInd] + [peakPotential])[-3:]
+        lastCycles[peakGroupInd] = cycleNum
+        return peakGroupInd
+
+class peakGroupCollector:
+    """
+    Collects the compact per-cycle peak information of a streamed analysis (no CV frames
+    and no full baseline fits) in the same group layout as processCV.
+    """
+    
+    def __init__(self):
+        # The peak information of every group: [OXIDATION, REDUCTION] -> group -> {cycleNum: peakInfo}
+        self.bothPeakGroups = [[], []]
+        self.numFrames = 0
+        self.pointsPerSegment = None
+        # The range of the CV current.
+        self.currentBounds = [np.inf, -np.inf]
+        
+    def addCycle(self, cycleResult):
+        self.numFrames = cycleResult["cycleNum"] + 1
+        self.pointsPerSegment = int(len(cycleResult["potentialFrame"])/2)
+        self.currentBounds = [min(self.currentBounds[0], min(cycleResult["currentFrame"])), max(self.currentBounds[1], max(cycleResult["currentFrame"]))]
+        
+        # Add the new peaks to their groups.
+        for reductiveScan in range(2):
+            while len(self.bothPeakGroups[reductiveScan]) < cycleResult["numPeakGroupsBoth"][reductiveScan]:
+                self.bothPeakGroups[reductiveScan].append({})
+            for peakGroupInd, peakPotential, peakCurrent, linearFitBounds, baselineLine in cycleResult["bothCyclePeaks"][reductiveScan]:
+                self.bothPeakGroups[reductiveScan][peakGroupInd][cycleResult["cycleNum"]] = (peakPotential, peakCurrent, *linearFitBounds, *baselineLine)
+    
+    def getPeakGroups(self):
+        """
+        Returns the peak groups as NaN-padded arrays:
+            bothPeakPotentialGroups, bothPeakCurrentGroups Dim: 2, # groups, # frames
+            bothBaselineBoundsGroups, bothBaselineLineGroups Dim: 2, # groups, # frames, 2
+        """
+        bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineLineGroups = [], [], [], []
+        for peakGroups in self.bothPeakGroups:
+            peakInfo = np.full((len(peakGroups), self.numFrames, 6), np.nan)
+            for peakGroupInd, peakGroup in enumerate(peakGroups):
+                for cycleNum, cyclePeakInfo in peakGroup.items():
+                    peakInfo[peakGroupInd, cycleNum] = cyclePeakInfo
+            # Split the information.
+            bothPeakPotentialGroups.append(peakInfo[:, :, 0] if len(peakGroups) else np.asarray([]))
+            bothPeakCurrentGroups.append(peakInfo[:, :, 1] if len(peakGroups) else np.asarray([]))
+            bothBaselineBoundsGroups.append(peakInfo[:, :, 2:4] if len(peakGroups) else np.asarray([]))
+            bothBaselineLineGroups.append(peakInfo[:, :, 4:6] if len(peakGroups) else np.asarray([]))
+        
+        return bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineLineGroups
+
+class baselineFitFrames:
+    """
+    Rebuilds the baseline fit of one peak and frame on demand from its baseline line.
+    Indexed like bothBaselineFitGroups ([reductiveScan][peakGroupInd][frameNum]) so the
+    movie can use it in place of the full fits; potentialFrames only needs the frame being drawn.
+    """
     
+    def __init__(self, analyzeCV, bothBaselineLineGroups, potentialFrames, reductiveScan = None, peakGroupInd = None):
+        self.analyzeCV = analyzeCV
+        self.bothBaselineLineGroups = bothBaselineLineGroups
+        self.potentialFrames = potentialFrames
+        self.reductiveScan = reductiveScan
+        self.peakGroupInd = peakGroupInd
+        
+    def __len__(self):
+        if self.reductiveScan is None:
+            return len(self.bothBaselineLineGroups)
+        return len(self.bothBaselineLineGroups[self.reductiveScan])
+        
+    def __getitem__(self, itemInd):
+        # Select the scan direction, then the peak group.
+        if self.reductiveScan is None:
+            return baselineFitFrames(self.analyzeCV, self.bothBaselineLineGroups, self.potentialFrames, itemInd)
+        if self.peakGroupInd is None:
+            return baselineFitFrames(self.analyzeCV, self.bothBaselineLineGroups, self.potentialFrames, self.reductiveScan, itemInd)
+        
+        # Rebuild the fit over the segment the movie draws it on.
+        potentialFull = np.asarray(self.potentialFrames[itemInd])
+        pointsPerSegment = int(len(potentialFull)/2)
+        potential = potentialFull[self.reductiveScan*pointsPerSegment:(self.reductiveScan+1)*pointsPerSegment]
+        baselineLine = self.bothBaselineLineGroups[self.reductiveScan][self.peakGroupInd][itemInd]
+        return self.analyzeCV.getBaselineFit(potential, baselineLine, self.reductiveScan)
+
+# -------------------------------------------------------------------------- #
+# -------------------------- Progressive Analysis -------------------------- #
+
+class progressiveAnalysis:
+    """
+    Analyzes the cycles of a file out of order: a quick look at numQuickLookCycles cycles spaced
+    evenly ("even") or logarithmically ("log", denser at the start), then the rest with the spacing
+    halved each pass. The analysis of every segment is kept, and the peaks of the analyzed cycles are
+    grouped in cycle order for each update, so once every cycle is analyzed the results equal getPeaks.
+    Provisional results have NaN peaks in the cycles that are not analyzed yet. run() analyzes every
+    cycle before it returns; the provisional results only reach the caller through publishResults.
+    """
     
-    
\ No newline at end of file
+    def __init__(self, analyzeDataCV, potentialFrames, currentFrames, pointsPerSegment, numQuickLookCycles = 20, quickLookSpacing = "log"):
+        self.analyzeDataCV = analyzeDataCV
+        self.potentialFrames = potentialFrames
+        self.currentFrames = currentFrames
+        self.pointsPerSegment = pointsPerSegment
+        self.numFrames = len(potentialFrames)
+        
+        # The analysis of both segments of every analyzed cycle: {cycleNum: [oxidation, reduction]}
+        self.cycleAnalyses = {}
+        self.cycleOrder = self.getCycleOrder(numQuickLookCycles, quickLookSpacing)
+        self.numQuickLookCycles = min(numQuickLookCycles, self.numFrames)
+        # The running coefficient of variation of the provisional peak currents.
+        self.runningStatistics = _statisticsProtocols.runningStatistics()
+        
+    def getCycleOrder(self, numQuickLookCycles, quickLookSpacing):
+        # The quick look cycles (always the first and the last).
+        if quickLookSpacing == "log":
+            quickLookCycles = np.geomspace(1, self.numFrames, max(numQuickLookCycles, 2)) - 1
+        else:
+            quickLookCycles = np.linspace(0, self.numFrames - 1, max(numQuickLookCycles, 2))
+        cycleOrder = list(dict.fromkeys(np.round(quickLookCycles).astype(int).tolist()))[0:numQuickLookCycles]
+        
+        # Backfill with the cycle spacing halved every pass.
+        orderedCycles = set(cycleOrder)
+        cycleSpacing = 2**int(math.log2(max(self.numFrames, 1)))
+        while cycleSpacing >= 1:
+            for cycleNum in range(0, self.numFrames, cycleSpacing):
+                if cycleNum not in orderedCycles:
+                    cycleOrder.append(cycleNum); orderedCycles.add(cycleNum)
+            cycleSpacing //= 2
+        
+        return cycleOrder
+    
+    def analyzeCycle(self, cycleNum):
+        potentialFull = np.asarray(self.potentialFrames[cycleNum], dtype=np.float64)
+        currentFull = np.asarray(self.currentFrames[cycleNum], dtype=np.float64)
+        # Analyze each segment in the scan.
+        segmentAnalyses = []
+        for segmentScale in range(2):
+            segmentInds = slice(segmentScale*self.pointsPerSegment, (segmentScale+1)*self.pointsPerSegment)
+            segmentAnalyses.append(self.analyzeDataCV.analyzeCV.analyzeData(potentialFull[segmentInds], currentFull[segmentInds]))
+        self.cycleAnalyses[cycleNum] = segmentAnalyses
+        
+    def getPeakGroups(self):
+        """
+        Groups the peaks of the analyzed cycles in cycle order. Returns the getPeaks output over all
+        the frames (NaN in the cycles not analyzed yet) and the mask of the analyzed cycles.
+        """
+        analyzedCycles = sorted(self.cycleAnalyses)
+        segmentAnalyses = (segmentAnalysis for cycleNum in analyzedCycles for segmentAnalysis in self.cycleAnalyses[cycleNum])
+        peakGroups = self.analyzeDataCV.getPeaks([self.potentialFrames[cycleNum] for cycleNum in analyzedCycles], [self.currentFrames[cycleNum] for cycleNum in analyzedCycles],
+                                                 self.pointsPerSegment, segmentAnalyses)
+        analyzedMask = np.zeros(self.numFrames, dtype=bool); analyzedMask[analyzedCycles] = True
+        if len(analyzedCycles) == self.numFrames:
+            return peakGroups, analyzedMask
+        
+        # Spread the analyzed cycles over all the frames.
+        fullPeakGroups = []
+        for bothGroups in peakGroups:
+            fullBothGroups = []
+            for peakGroups_RedOx in bothGroups:
+                if peakGroups_RedOx.size == 0:
+                    fullBothGroups.append(peakGroups_RedOx); continue
+                fullGroups = np.full((len(peakGroups_RedOx), self.numFrames) + peakGroups_RedOx.shape[2:], np.nan, dtype=peakGroups_RedOx.dtype)
+                fullGroups[:, analyzedCycles] = peakGroups_RedOx
+                fullBothGroups.append(fullGroups)
+            fullPeakGroups.append(fullBothGroups)
+        
+        return fullPeakGroups, analyzedMask
+    
+    def publish(self, publishResults):
+        (bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups), analyzedMask = self.getPeakGroups()
+        progressResults = dict(bothPeakPotentialGroups = bothPeakPotentialGroups, bothPeakCurrentGroups = bothPeakCurrentGroups, 
+                               bothPeakCoVGroups = self.runningStatistics.groupCoefficientOfVariation(bothPeakCurrentGroups), 
+                               bothBaselineBoundsGroups = bothBaselineBoundsGroups, bothBaselineFitGroups = bothBaselineFitGroups, 
+                               analyzedCycles = analyzedMask, isComplete = bool(analyzedMask.all()))
+        if publishResults is not None:
+            publishResults(progressResults)
+        
+        return progressResults
+    
+    def run(self, publishResults = None):
+        """
+        Analyzes every cycle, publishing after the quick look and whenever the number of analyzed cycles doubles.
+        Returns the final getPeaks output.
+        """
+        nextPublish = self.numQuickLookCycles
+        for orderInd, cycleNum in enumerate(self.cycleOrder):
+            self.analyzeCycle(cycleNum)
+            # Publish the provisional peaks.
+            if orderInd + 1 == nextPublish and orderInd + 1 < self.numFrames:
+                print("\tProvisional Peaks from", orderInd + 1, "of", self.numFrames, "Cycles")
+                self.publish(publishResults)
+                nextPublish *= 2
+        
+        finalResults = self.publish(publishResults)
+        return finalResults["bothPeakPotentialGroups"], finalResults["bothPeakCurrentGroups"], finalResults["bothBaselineBoundsGroups"], finalResults["bothBaselineFitGroups"]
+    
+# -------------------------------------------------------------------------- #
+# ------------------------- Shared Memory Workers -------------------------- #
+
+# The CV analysis of each worker process (created on its first job).
+workerAnalyzeCV = None
+
+def startAnalysisPool(numAnalysisWorkers):
+    """
+    Starts numAnalysisWorkers processes that each build their cvProtocol once and keep it for every file.
+    Assign the pool to processData.analysisPool (it can be shared) and close it with terminate/join when done.
+    """
+    return multiprocessing.Pool(numAnalysisWorkers, initializer = initAnalysisWorker)
+
+def initAnalysisWorker():
+    global workerAnalyzeCV
+    workerAnalyzeCV = cvAnalysis.cvProtocol()
+
+def analyzeSharedSegments(frameHandles, maxPeaksPerSegment, segmentStart, segmentEnd):
+    """
+    Analyzes the segments [segmentStart, segmentEnd) of a sharedFrameStore in place (see getPeaksParallel).
+    A segment with more than maxPeaksPerSegment peaks only records its number of peaks.
+    """
+    global workerAnalyzeCV
+    if workerAnalyzeCV is None:
+        workerAnalyzeCV = cvAnalysis.cvProtocol()
+    
+    with sharedFrames.sharedFrameView(frameHandles) as frameView:
+        for segmentInd in range(segmentStart, segmentEnd):
+            allLinearFits, peakPotentials, peakCurrents, allLinearFitBounds, reductiveScan = \
+                workerAnalyzeCV.analyzeData(frameView["potential"][segmentInd], frameView["current"][segmentInd])
+            
+            # Write the peaks into the shared outputs.
+            numPeaks = len(allLinearFits)
+            if numPeaks <= maxPeaksPerSegment:
+                for peakInd in range(numPeaks):
+                    frameView["linearFits"][segmentInd, peakInd] = allLinearFits[peakInd]
+                    frameView["peakPotentials"][segmentInd, peakInd] = peakPotentials[peakInd]
+                    frameView["peakCurrents"][segmentInd, peakInd] = peakCurrents[peakInd]
+                    frameView["linearFitBounds"][segmentInd, peakInd] = allLinearFitBounds[peakInd]
+            frameView["reductiveScans"][segmentInd] = reductiveScan
+            frameView["numPeaks"][segmentInd] = numPeaks
@@ -0,0 +1,170 @@
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import os
+import time
+import sqlite3
+import numpy as np
+
+# -------------------------------------------------------------------------- #
+# ------------------------- Peak Results Database -------------------------- #
+
+class resultsDatabase:
+    """
+    Stores the peak results of every analyzed experiment in one SQLite file so the
+    peaks can be compared across experiments without opening each workbook.
+        experiments: One row per analyzed file (with the analysis metadata).
+        peaks: One row per experiment, scan direction, peak group, and cycle.
+    """
+
+    def __init__(self, databaseFile):
+        # Specify the peak columns in the database.
+        self.peakColumns = ["peakPotential", "peakCurrent", "baselineStartInd", "baselineEndInd", "baselineStartCurrent", "baselineEndCurrent"]
+        self.scanDirections = ["Oxidation", "Reduction"]
+
+        # Open the database (creating the tables the first time).
+        self.databaseFile = databaseFile
+        databaseFolder = os.path.dirname(databaseFile)
+        if databaseFolder:
+            os.makedirs(databaseFolder, exist_ok=True)
+        # The connection may be used from a pipeline thread (one thread at a time).
+        self.connection = sqlite3.connect(databaseFile, check_same_thread=False)
+        self.createTables()
+
+    def createTables(self):
+        with self.connection:
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS experiments (
+                                           experimentID INTEGER PRIMARY KEY,
+                                           fileName TEXT UNIQUE NOT NULL,
+                                           dataFolder TEXT,
+                                           numFrames INTEGER,
+                                           numPoints INTEGER,
+                                           numInitCyclesToSkip INTEGER,
+                                           useCHIPeaks INTEGER,
+                                           analysisTime REAL)""")
+            # The primary key is the experiment -> direction -> group -> cycle index.
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS peaks (
+                                           experimentID INTEGER NOT NULL REFERENCES experiments(experimentID) ON DELETE CASCADE,
+                                           reductiveScan INTEGER NOT NULL,
+                                           peakGroup INTEGER NOT NULL,
+                                           cycleNum INTEGER NOT NULL,
+                                           peakPotential REAL,
+                                           peakCurrent REAL,
+                                           baselineStartInd REAL,
+                                           baselineEndInd REAL,
+                                           baselineStartCurrent REAL,
+                                           baselineEndCurrent REAL,
+                                           PRIMARY KEY (experimentID, reductiveScan, peakGroup, cycleNum)) WITHOUT ROWID""")
+            # Index to compare the same peak across all experiments.
+            self.connection.execute("CREATE INDEX IF NOT EXISTS peakGroupIndex ON peaks (reductiveScan, peakGroup, cycleNum)")
+
+    def close(self):
+        self.connection.close()
+
+    # ---------------------------------------------------------------------- #
+    # --------------------------- Save the Peaks --------------------------- #
+
+    def getPeakRows(self, experimentID, bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups):
+        # Organize the peak information as database rows.
+        peakRows = []
+        for reductiveScan in range(len(bothPeakPotentialGroups)):
+            for peakGroupInd in range(len(bothPeakPotentialGroups[reductiveScan])):
+                peakPotentials = np.asarray(bothPeakPotentialGroups[reductiveScan][peakGroupInd], dtype=float)
+                peakCurrents = np.asarray(bothPeakCurrentGroups[reductiveScan][peakGroupInd], dtype=float)
+                baselineBounds = np.asarray(bothBaselineBoundsGroups[reductiveScan][peakGroupInd], dtype=float).reshape(len(peakPotentials), 2)
+                baselineFits = np.asarray(bothBaselineFitGroups[reductiveScan][peakGroupInd], dtype=float)
+
+                # Get the baseline current at each bound (NaN if the peak was not found).
+                baselineCurrents = np.full((len(peakPotentials), 2), np.nan)
+                foundBaselines = ~np.isnan(baselineBounds).any(axis=1)
+                cycleInds = np.nonzero(foundBaselines)[0]
+                baselineInds = baselineBounds[foundBaselines].astype(int)
+                baselineCurrents[cycleInds, 0] = baselineFits[cycleInds, baselineInds[:, 0]]
+                baselineCurrents[cycleInds, 1] = baselineFits[cycleInds, baselineInds[:, 1]]
+
+                # Stack the columns (NaN is stored as NULL).
+                peakTable = np.column_stack((peakPotentials, peakCurrents, baselineBounds, baselineCurrents)).astype(object)
+                peakTable[np.isnan(peakTable.astype(float))] = None
+                for cycleNum, peakRow in enumerate(peakTable.tolist()):
+                    peakRows.append([experimentID, reductiveScan, peakGroupInd, cycleNum] + peakRow)
+
+        return peakRows
+
+    def saveExperiment(self, bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups,
+                       currentFrames, fileName, dataFolder = "", numInitCyclesToSkip = None, useCHIPeaks = None):
+        """
+        Saves (or replaces) all the peaks of one experiment in a single transaction.
+        """
+        numFrames, numPoints = np.asarray(currentFrames).shape[:2]
+        with self.connection:
+            # Remove the old results of this experiment.
+            self.connection.execute("DELETE FROM peaks WHERE experimentID IN (SELECT experimentID FROM experiments WHERE fileName = ?)", (fileName,))
+            self.connection.execute("DELETE FROM experiments WHERE fileName = ?", (fileName,))
+
+            # Add the experiment metadata.
+            experimentID = self.connection.execute("INSERT INTO experiments (fileName, dataFolder, numFrames, numPoints, numInitCyclesToSkip, useCHIPeaks, analysisTime) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                                   (fileName, dataFolder, int(numFrames), int(numPoints), numInitCyclesToSkip, useCHIPeaks, time.time())).lastrowid
+            # Add all the peaks at once.
+            peakRows = self.getPeakRows(experimentID, bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups)
+            self.connection.executemany("INSERT INTO peaks VALUES (" + ", ".join(["?"]*(4 + len(self.peakColumns))) + ")", peakRows)
+
+        return experimentID
+
+    # ---------------------------------------------------------------------- #
+    # -------------------------- Query the Peaks --------------------------- #
+
+    def getExperiments(self, fileContains = ""):
+        # Return the names of the saved experiments.
+        experimentRows = self.connection.execute("SELECT fileName FROM experiments WHERE instr(fileName, ?) > 0 ORDER BY fileName", (fileContains,)).fetchall()
+        return [experimentRow[0] for experimentRow in experimentRows]
+
+    def getPeaks(self, fileName = None, reductiveScan = None, peakGroupInd = None, columns = None):
+        """
+        Returns a dictionary of NumPy arrays (one per column, NaN where the peak was not found),
+        filtered by any combination of the experiment, scan direction, and peak group.
+        """
+        columns = columns or self.peakColumns
+        assert set(columns).issubset(self.peakColumns), "Unknown peak columns: " + str(columns)
+
+        # Organize the filters.
+        whereClauses = []; parameters = []
+        for columnName, columnValue in (("experiments.fileName", fileName), ("peaks.reductiveScan", reductiveScan), ("peaks.peakGroup", peakGroupInd)):
+            if columnValue is not None:
+                whereClauses.append(columnName + " = ?")
+                parameters.append(columnValue)
+        whereStatement = " WHERE " + " AND ".join(whereClauses) if whereClauses else ""
+
+        # Query the peaks in index order.
+        peakRows = self.connection.execute("SELECT experiments.fileName, peaks.reductiveScan, peaks.peakGroup, peaks.cycleNum, " + ", ".join("peaks." + column for column in columns) +
+                                           " FROM peaks JOIN experiments USING (experimentID)" + whereStatement +
+                                           " ORDER BY experiments.fileName, peaks.reductiveScan, peaks.peakGroup, peaks.cycleNum", parameters).fetchall()
+
+        # Organize the rows as columns.
+        peakColumns = list(zip(*peakRows)) or [()]*(4 + len(columns))
+        peakArrays = {"fileName": np.asarray(peakColumns[0], dtype=str)}
+        for columnInd, columnName in enumerate(["reductiveScan", "peakGroup", "cycleNum"]):
+            peakArrays[columnName] = np.asarray(peakColumns[columnInd + 1], dtype=int)
+        for columnInd, columnName in enumerate(columns):
+            peakArrays[columnName] = np.asarray(peakColumns[columnInd + 4], dtype=float)
+
+        return peakArrays
+
+    def getPeakMatrix(self, reductiveScan, peakGroupInd, column = "peakCurrent", fileContains = ""):
+        """
+        Compares one peak across experiments.
+            fileNames: The experiments in the rows.
+            peakMatrix Dim: # experiments, # cycles (NaN padded to the longest experiment).
+        """
+        fileNames = self.getExperiments(fileContains)
+        peakArrays = self.getPeaks(reductiveScan = reductiveScan, peakGroupInd = peakGroupInd, columns = [column])
+        # Keep the requested experiments.
+        keptRows = np.isin(peakArrays["fileName"], fileNames)
+        numCycles = int(peakArrays["cycleNum"][keptRows].max()) + 1 if keptRows.any() else 0
+
+        # Place every cycle of every experiment.
+        peakMatrix = np.full((len(fileNames), numCycles), np.nan)
+        experimentInds = np.searchsorted(fileNames, peakArrays["fileName"][keptRows])
+        peakMatrix[experimentInds, peakArrays["cycleNum"][keptRows]] = peakArrays[column][keptRows]
+
+        return fileNames, peakMatrix
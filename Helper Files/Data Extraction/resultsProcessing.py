@@ -0,0 +1,82 @@
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import os
+import numpy as np
+# Modules to Sort Files in Order
+from natsort import natsorted
+
+# -------------------------------------------------------------------------- #
+# ------------------------- Analysis Results Files ------------------------- #
+
+class analysisResults:
+    """
+    Saves the full output of processData.processCV (frames plus the peak and baseline
+    groups) in an uncompressed NumPy archive, so the movie and the exports can be
+    recreated later without parsing or analyzing the data again.
+    """
+
+    def __init__(self):
+        # Specify the results file format.
+        self.resultsExtension = ".npz"
+        self.resultsVersion = 1
+        # The names of the grouped results: OXIDATION (0), REDUCTION (1)
+        self.groupNames = ["peakPotentialGroups", "peakCurrentGroups", "baselineBoundsGroups", "baselineFitGroups"]
+
+    def getResultsFile(self, resultsFolder, fileName):
+        return resultsFolder + fileName + self.resultsExtension
+
+    def saveResults(self, bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups,
+                    currentFrames, potentialFrames, timeFrames, resultsFolder, fileName):
+        # Create Output File Directory to Save Data: If Not Already Created
+        os.makedirs(resultsFolder, exist_ok=True)
+
+        # Organize the results as named arrays.
+        resultArrays = {
+            "resultsVersion": np.asarray(self.resultsVersion),
+            "currentFrames": np.asarray(currentFrames),
+            "potentialFrames": np.asarray(potentialFrames),
+            "timeFrames": np.asarray(timeFrames),
+        }
+        allGroups = [bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups]
+        for groupName, bothGroups in zip(self.groupNames, allGroups):
+            for reductiveScan in range(2):
+                resultArrays[groupName + "_" + str(reductiveScan)] = np.asarray(bothGroups[reductiveScan])
+
+        # Write to a temporary file first so an interrupted save never leaves a broken results file.
+        resultsFile = self.getResultsFile(resultsFolder, fileName)
+        temporaryFile = resultsFile + ".tmp" + self.resultsExtension
+        np.savez(temporaryFile, **resultArrays)
+        os.replace(temporaryFile, resultsFile)
+
+        return resultsFile
+
+    def loadResults(self, resultsFile):
+        """
+        Returns the results in the same order as processData.processCV.
+        """
+        with np.load(resultsFile, allow_pickle=False) as resultArrays:
+            assert int(resultArrays["resultsVersion"]) == self.resultsVersion, "Unknown results version in " + resultsFile
+            # Extract the grouped results.
+            allGroups = []
+            for groupName in self.groupNames:
+                allGroups.append([resultArrays[groupName + "_" + str(reductiveScan)] for reductiveScan in range(2)])
+            bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups = allGroups
+
+            # Extract the CV frames.
+            currentFrames = resultArrays["currentFrames"]
+            potentialFrames = resultArrays["potentialFrames"]
+            timeFrames = resultArrays["timeFrames"]
+
+        return bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, currentFrames, potentialFrames, timeFrames
+
+    def getResultFiles(self, resultsFolder, fileDoesntContain = "N/A", fileContains = ""):
+        # Find all the saved results in the folder.
+        resultFiles = []
+        if os.path.isdir(resultsFolder):
+            for resultFile in os.listdir(resultsFolder):
+                if resultFile.endswith(self.resultsExtension) and ".tmp" not in resultFile and fileDoesntContain not in resultFile and fileContains in resultFile:
+                    resultFiles.append(resultFile)
+
+        return natsorted(resultFiles)
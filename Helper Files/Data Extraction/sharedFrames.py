@@ -0,0 +1,105 @@
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import numpy as np
+from multiprocessing import shared_memory
+
+# -------------------------------------------------------------------------- #
+# --------------------------- Shared Frame Store --------------------------- #
+
+class sharedFrameStore:
+    """
+    Holds the arrays of one file (the CV frames and the preallocated analysis outputs) in named
+    shared memory blocks. Each array is copied in once; worker processes attach with the handles
+    (block name, shape, dtype) and read and write the arrays in place, so only the handles and
+    row ranges are sent between processes. Use as a context manager to free the blocks.
+    """
+
+    def __init__(self):
+        # The shared blocks and their arrays: {arrayName: sharedBlock}, {arrayName: np.ndarray}
+        self.sharedBlocks = {}
+        self.sharedArrays = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exceptionInfo):
+        self.close()
+        return False
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------------- Arrays ------------------------------- #
+
+    def allocateArray(self, arrayName, arrayShape, dataType = np.float64, fillValue = np.nan):
+        assert arrayName not in self.sharedArrays, "Array already in the store: " + arrayName
+        dataType = np.dtype(dataType)
+        # Shared blocks cannot be empty.
+        numBytes = max(int(np.prod(arrayShape))*dataType.itemsize, 1)
+        sharedBlock = shared_memory.SharedMemory(create = True, size = numBytes)
+        self.sharedBlocks[arrayName] = sharedBlock
+        self.sharedArrays[arrayName] = np.ndarray(arrayShape, dtype = dataType, buffer = sharedBlock.buf)
+        if fillValue is not None:
+            self.sharedArrays[arrayName].fill(fillValue)
+
+        return self.sharedArrays[arrayName]
+
+    def addArray(self, arrayName, array):
+        array = np.asarray(array)
+        sharedArray = self.allocateArray(arrayName, array.shape, array.dtype, fillValue = None)
+        sharedArray[...] = array
+
+        return sharedArray
+
+    def getHandles(self, arrayNames = None):
+        # The picklable description of the arrays: {arrayName: (blockName, shape, dtype)}
+        arrayNames = self.sharedArrays.keys() if arrayNames is None else arrayNames
+        return {arrayName: (self.sharedBlocks[arrayName].name, self.sharedArrays[arrayName].shape, self.sharedArrays[arrayName].dtype.str)
+                for arrayName in arrayNames}
+
+    def close(self):
+        # Drop the views before freeing the memory.
+        self.sharedArrays = {}
+        for sharedBlock in self.sharedBlocks.values():
+            try:
+                sharedBlock.close()
+            except BufferError:
+                # A view is still referenced; the memory is released once it is gone.
+                pass
+            sharedBlock.unlink()
+        self.sharedBlocks = {}
+
+class sharedFrameView:
+    """
+    Attaches to the arrays of a sharedFrameStore in another process (use as a context manager).
+    The arrays are views of the shared memory: writes are seen by the owning process.
+    """
+
+    def __init__(self, frameHandles):
+        self.sharedBlocks = []
+        self.sharedArrays = {}
+        for arrayName, (blockName, arrayShape, dataType) in frameHandles.items():
+            sharedBlock = shared_memory.SharedMemory(name = blockName)
+            self.sharedBlocks.append(sharedBlock)
+            self.sharedArrays[arrayName] = np.ndarray(arrayShape, dtype = np.dtype(dataType), buffer = sharedBlock.buf)
+
+    def __getitem__(self, arrayName):
+        return self.sharedArrays[arrayName]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exceptionInfo):
+        self.close()
+        return False
+
+    def close(self):
+        # Only the owning store unlinks the blocks.
+        self.sharedArrays = {}
+        for sharedBlock in self.sharedBlocks:
+            try:
+                sharedBlock.close()
+            except BufferError:
+                # A view is still referenced (e.g. by an exception traceback); it is released when the process exits.
+                pass
+        self.sharedBlocks = []
@@ -0,0 +1,121 @@
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import os
+import math
+import numpy as np
+
+# -------------------------------------------------------------------------- #
+# ------------------------- Synthetic CHI CV Files ------------------------- #
+
+class syntheticCV:
+    """
+    Writes CV files in the CHI text format that processData.getRunInfo reads: the run header,
+    the peaks CHI reports for every segment, and the "Potential/V, Current/A" data block.
+    Each cycle scans forward from lowVolt to highVolt and back. The current (Amps) is the sum of:
+        Redox peaks: A Gaussian oxidation peak on the forward scan and a reduction peak on the reverse scan.
+        Capacitive background: A constant charging current (+ forward, - reverse) plus a linear slope.
+        Drift: The peak heights change by a factor of (1 + peakDrift) every cycle.
+        Noise: Gaussian noise with a standard deviation of noiseCurrent.
+    """
+
+    def __init__(self, lowVolt = 0.2, highVolt = 1.2, sampleInterval = 0.001, scanRate = 0.05, peaks = None,
+                 capacitiveCurrent = 2e-6, backgroundSlope = 1e-6, peakDrift = -0.0005, noiseCurrent = 2e-8, randomSeed = 0):
+        # Specify the CV program.
+        self.lowVolt = lowVolt
+        self.highVolt = highVolt
+        self.sampleInterval = sampleInterval
+        self.scanRate = scanRate
+        # Specify the redox peaks: Oxidation potential (V), peak separation (V), height (A), and width (V)
+        if peaks is None:
+            peaks = [dict(peakPotential = 0.75, peakSeparation = 0.08, peakHeight = 1e-5, peakWidth = 0.05)]
+        self.peaks = peaks
+
+        # Specify the background, drift, and noise.
+        self.capacitiveCurrent = capacitiveCurrent
+        self.backgroundSlope = backgroundSlope
+        self.peakDrift = peakDrift
+        self.noiseCurrent = noiseCurrent
+        self.randomGenerator = np.random.default_rng(randomSeed)
+
+        # The points of each scan, as in getRunInfo.
+        self.pointsPerScan = int((highVolt - lowVolt)*2/sampleInterval)
+        self.pointsPerSegment = int(self.pointsPerScan/2)
+        # Write enough decimals to resolve the sample interval.
+        self.potentialDecimals = max(3, math.ceil(-math.log10(sampleInterval)))
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------------ CV Cycles ----------------------------- #
+
+    def getScanPotential(self):
+        # One cycle: forward from lowVolt, then back from highVolt.
+        forwardPotential = self.lowVolt + np.arange(self.pointsPerSegment)*self.sampleInterval
+        reversePotential = self.highVolt - np.arange(self.pointsPerScan - self.pointsPerSegment)*self.sampleInterval
+        return np.concatenate((forwardPotential, reversePotential))
+
+    def getPeakScale(self, cycleNum):
+        return (1 + self.peakDrift)**cycleNum
+
+    def getCycleCurrent(self, potential, cycleNum):
+        # Add the capacitive background.
+        forwardScan = np.arange(len(potential)) < self.pointsPerSegment
+        current = np.where(forwardScan, self.capacitiveCurrent, -self.capacitiveCurrent) + self.backgroundSlope*(potential - self.lowVolt)
+
+        # Add the redox peaks.
+        peakScale = self.getPeakScale(cycleNum)
+        for peak in self.peaks:
+            reductionPotential = peak["peakPotential"] - peak["peakSeparation"]
+            oxidationCurrent = np.exp(-((potential - peak["peakPotential"])/peak["peakWidth"])**2)
+            reductionCurrent = -np.exp(-((potential - reductionPotential)/peak["peakWidth"])**2)
+            current += peak["peakHeight"]*peakScale*np.where(forwardScan, oxidationCurrent, reductionCurrent)
+
+        # Add the noise.
+        return current + self.randomGenerator.normal(0, self.noiseCurrent, len(potential))
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------------ CHI Files ----------------------------- #
+
+    def getHeader(self, numCycles):
+        headerLines = [
+            "Jan. 1, 2000   00:00:00", "Cyclic Voltammetry", "File: synthetic", "Data Source:  Simulation",
+            "Instrument Model:  syntheticCV", "Header: ", "Note: ", "",
+            "Init E (V) = " + str(self.lowVolt),
+            "High E (V) = " + str(self.highVolt),
+            "Low E (V) = " + str(self.lowVolt),
+            "Init P/N = P",
+            "Scan Rate (V/s) = " + str(self.scanRate),
+            "Segment = " + str(2*numCycles),
+            "Sample Interval (V) = " + str(self.sampleInterval),
+            "Quiet Time (sec) = 2",
+            "Sensitivity (A/V) = 1e-5",
+            "",
+        ]
+        # Report the true peaks of every segment.
+        for segmentNum in range(1, 2*numCycles + 1):
+            headerLines.append("Segment " + str(segmentNum) + ":")
+            cycleNum = (segmentNum - 1)//2; reductiveScan = segmentNum % 2 == 0
+            for peak in self.peaks:
+                peakHeight = peak["peakHeight"]*self.getPeakScale(cycleNum)
+                peakPotential = peak["peakPotential"] - peak["peakSeparation"]*reductiveScan
+                headerLines.extend(["Ep = " + "%.3f"%peakPotential + "V", "ip = " + "%.3e"%(-peakHeight if reductiveScan else peakHeight) + "A",
+                                    "Ah = " + "%.3e"%(peakHeight*peak["peakWidth"]*math.sqrt(math.pi)/self.scanRate) + "C"])
+            headerLines.append("")
+        headerLines.extend(["Potential/V, Current/A", ""])
+
+        return headerLines
+
+    def writeFile(self, outputFile, numCycles):
+        """
+        Writes numCycles cycles to outputFile (TXT/CSV), one cycle at a time.
+        """
+        os.makedirs(os.path.dirname(outputFile) or ".", exist_ok=True)
+        potential = self.getScanPotential()
+        with open(outputFile, "w") as chiFile:
+            chiFile.write("\n".join(self.getHeader(numCycles)) + "\n")
+            # Write the data of each cycle.
+            for cycleNum in range(numCycles):
+                cycleData = np.column_stack((potential, self.getCycleCurrent(potential, cycleNum)))
+                np.savetxt(chiFile, cycleData, fmt = ["%." + str(self.potentialDecimals) + "f", "%.3e"], delimiter = ", ")
+
+        return outputFile
@@ -0,0 +1,53 @@
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Basic Modules
+import numpy as np
+
+# -------------------------------------------------------------------------- #
+# --------------------------- Streamed CV Frames --------------------------- #
+
+class cycleWindow:
+    """
+    Reads the CV frames from a generator as the movie asks for them, keeping only
+    the current and the previous cycle in memory. The potentialFrames, currentFrames,
+    and timeFrames views are indexed like the full frame lists.
+    """
+
+    def __init__(self, cvFrames, numFrames):
+        # Specify the frame source: (current, potential, time) per cycle.
+        self.cvFrames = iter(cvFrames)
+        self.numFrames = numFrames
+
+        # Initialize the window: {frameNum: (current, potential, time)}
+        self.windowFrames = {}
+        self.lastFrameNum = -1
+
+        # Views for each type of data.
+        self.currentFrames = frameView(self, 0)
+        self.potentialFrames = frameView(self, 1)
+        self.timeFrames = frameView(self, 2)
+
+    def getFrame(self, frameNum):
+        # Read forward until the frame is in the window.
+        while self.lastFrameNum < frameNum:
+            current, potential, time = next(self.cvFrames)
+            self.lastFrameNum += 1
+            self.windowFrames[self.lastFrameNum] = (np.asarray(current), np.asarray(potential), np.asarray(time))
+            # Only keep the last two cycles.
+            self.windowFrames.pop(self.lastFrameNum - 2, None)
+
+        assert frameNum in self.windowFrames, "Frame " + str(frameNum) + " already left the window"
+        return self.windowFrames[frameNum]
+
+class frameView:
+
+    def __init__(self, window, dataInd):
+        self.window = window
+        self.dataInd = dataInd
+
+    def __len__(self):
+        return self.window.numFrames
+
+    def __getitem__(self, frameNum):
+        return self.window.getFrame(frameNum)[self.dataInd]
@@ -0,0 +1,109 @@
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Basic Modules
+import numpy as np
+# Modules to Plot
+import matplotlib.colors
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# -------------------------------------------------------------------------- #
+# --------------------------- Past Cycle Layer ----------------------------- #
+
+class pastCycleLayer:
+    """
+    Accumulates every past CV cycle into one cached raster that is shown on the
+    axis as a single image. Each new cycle is drawn once onto an offscreen Agg
+    buffer, so the per-frame cost is bounded by the axis size, not the number of
+    cycles already shown.
+    """
+
+    def __init__(self, ax, dpi, color = 'tab:blue', linewidth = 1, alpha = 0.1):
+        # Specify the layer aesthetics.
+        self.ax = ax
+        self.dpi = dpi
+        self.alpha = alpha
+        self.color = matplotlib.colors.to_rgb(color)
+        self.linewidth = linewidth
+
+        # Initialize the layers.
+        self.layerImage = None
+        self.layerCanvas = None
+        self.layerLine = None
+        self.numCycles = 0
+        self.imageStale = False
+
+    def initializeLayer(self):
+        # Get the pixel bounds of the axis at the movie resolution (rows counted from the top).
+        figureWidth, figureHeight = self.ax.figure.get_size_inches()
+        axisPosition = self.ax.get_position()
+        figurePixelsX, figurePixelsY = int(figureWidth*self.dpi), int(figureHeight*self.dpi)
+        self.layerColumns = (int(round(axisPosition.x0*figurePixelsX)), int(round(axisPosition.x1*figurePixelsX)))
+        self.layerRows = (figurePixelsY - int(round(axisPosition.y1*figurePixelsY)), figurePixelsY - int(round(axisPosition.y0*figurePixelsY)))
+        layerWidth = max(1, self.layerColumns[1] - self.layerColumns[0])
+        layerHeight = max(1, self.layerRows[1] - self.layerRows[0])
+
+        # Create an offscreen figure the size of the axis.
+        layerFigure = Figure(figsize=(layerWidth/self.dpi, layerHeight/self.dpi), dpi=self.dpi)
+        layerFigure.patch.set_alpha(0)
+        self.layerCanvas = FigureCanvasAgg(layerFigure)
+        layerAxis = layerFigure.add_axes([0, 0, 1, 1])
+        layerAxis.set_axis_off()
+        layerAxis.patch.set_alpha(0)
+        # Use the same data limits as the visible axis.
+        xLim, yLim = self.ax.get_xlim(), self.ax.get_ylim()
+        layerAxis.set_xlim(xLim)
+        layerAxis.set_ylim(yLim)
+        # Past cycles are drawn opaque; the transparency is applied to the full layer.
+        self.layerLine = layerAxis.plot([], [], color=self.color, linestyle='-', linewidth=self.linewidth)[0]
+        self.layerAxis = layerAxis
+        # Render the empty layer once to create the buffer.
+        self.layerCanvas.draw()
+        
+        # Preallocate the layer image: fixed color with the coverage as transparency.
+        self.layerRGBA = np.zeros((layerHeight, layerWidth, 4), dtype=np.uint8)
+        self.layerRGBA[:, :, :3] = np.round(np.asarray(self.color)*255).astype(np.uint8)
+        self.alphaLookup = np.round(np.arange(256)*self.alpha).astype(np.uint8)
+
+        # Show the layer behind the current CV cycle.
+        self.layerImage = self.ax.imshow(self.layerRGBA, extent=(xLim[0], xLim[1], yLim[0], yLim[1]), origin='upper',
+                                         aspect='auto', interpolation='nearest', zorder=0)
+        # Imshow should not change the axis limits.
+        self.ax.set_xlim(xLim)
+        self.ax.set_ylim(yLim)
+
+    def addCycle(self, potential, current):
+        if self.layerCanvas is None:
+            self.initializeLayer()
+
+        # Draw ONLY the new cycle on top of the cached buffer.
+        self.layerLine.set_data(potential, current)
+        self.layerAxis.draw_artist(self.layerLine)
+        self.numCycles += 1
+        # The image is converted when the next frame is written (see refreshImage).
+        self.imageStale = True
+
+    def refreshImage(self):
+        # Convert the coverage of the past cycles into a transparent image (once for all the cycles added since the last frame).
+        if self.layerCanvas is None or not self.imageStale:
+            return
+        layerCoverage = np.asarray(self.layerCanvas.buffer_rgba())[:, :, 3]
+        self.layerRGBA[:, :, 3] = self.alphaLookup[layerCoverage]
+        self.layerImage.set_data(self.layerRGBA)
+        self.imageStale = False
+
+    def compositeLayer(self, frameBuffer):
+        """
+        Alpha-blend the layer straight into a rendered RGBA frame buffer at the movie
+        resolution. Used by blitting, where the layer image is not drawn as an artist.
+        """
+        if self.layerCanvas is None or self.numCycles == 0:
+            return
+
+        # Get the axis region of the frame.
+        axisRegion = frameBuffer[self.layerRows[0]:self.layerRows[1], self.layerColumns[0]:self.layerColumns[1], :3]
+        layerAlpha = self.layerRGBA[:axisRegion.shape[0], :axisRegion.shape[1], 3:].astype(np.int16)
+        layerColor = self.layerRGBA[0, 0, :3].astype(np.int16)
+        # Blend: region + alpha*(color - region)
+        axisRegion += ((layerColor - axisRegion.astype(np.int16))*layerAlpha//255).astype(np.uint8)
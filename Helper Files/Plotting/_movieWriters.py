@@ -0,0 +1,115 @@
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Basic Modules
+import os
+import subprocess
+import contextlib
+import numpy as np
+# Modules to Plot
+import matplotlib.animation as manimation
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# -------------------------------------------------------------------------- #
+# ------------------------------ Movie Writers ----------------------------- #
+
+class movieWriter:
+    """
+    Headless movie writer: the figure is rendered on an Agg canvas and the raw
+    RGB buffer of every frame is streamed to ffmpeg through a pipe (no savefig,
+    no GUI backend, no temporary images).
+    """
+
+    def __init__(self, fps = 7, metadata = None, codec = "h264"):
+        # Specify the encoding parameters.
+        self.fps = fps
+        self.codec = codec
+        self.metadata = metadata or {}
+
+        # Initialize the writer state.
+        self.fig = None
+        self.dpi = None
+        self._proc = None
+        self.frame_size = None
+        self.numFramesWritten = 0
+
+    @contextlib.contextmanager
+    def saving(self, fig, movieFile, dpi):
+        # Open the encoder, and always close it (and restore the figure) afterwards.
+        self.setup(fig, movieFile, dpi)
+        try:
+            yield self
+        finally:
+            self.finish()
+
+    def setup(self, fig, movieFile, dpi):
+        self.fig = fig
+        self.dpi = dpi
+        self.numFramesWritten = 0
+        # Remember the figure settings to restore them afterwards.
+        self.originalCanvas = fig.canvas
+        self.originalDPI = fig.get_dpi()
+        self.originalSize = fig.get_size_inches()
+
+        # yuv420p needs an even number of pixels in both directions.
+        figureWidth, figureHeight = fig.get_size_inches()
+        frameWidth = int(figureWidth*dpi) // 2 * 2
+        frameHeight = int(figureHeight*dpi) // 2 * 2
+        # Render the figure on an Agg canvas at the exact frame size.
+        FigureCanvasAgg(fig)
+        fig.set_dpi(dpi)
+        fig.set_size_inches(frameWidth/dpi, frameHeight/dpi)
+        self.frame_size = (frameWidth, frameHeight)
+
+        # Start ffmpeg reading raw RGB frames from the pipe.
+        encoderArgs = [manimation.FFMpegWriter.bin_path(), "-y", "-loglevel", "error",
+                       "-f", "rawvideo", "-vcodec", "rawvideo", "-s", "%dx%d" % self.frame_size,
+                       "-pix_fmt", "rgb24", "-framerate", str(self.fps), "-i", "pipe:",
+                       "-vcodec", self.codec, "-pix_fmt", "yuv420p"]
+        for metadataKey, metadataValue in self.metadata.items():
+            encoderArgs.extend(["-metadata", str(metadataKey) + "=" + str(metadataValue)])
+        self._proc = subprocess.Popen(encoderArgs + [movieFile], stdin=subprocess.PIPE)
+
+    def grab_frame(self):
+        # Redraw the whole figure and stream it.
+        self.fig.canvas.draw()
+        self.grabCanvas(self.fig.canvas)
+
+    def grabCanvas(self, canvas):
+        # Stream the already rendered buffer (e.g., after blitting) as raw RGB.
+        frameBuffer = np.asarray(canvas.buffer_rgba())
+        assert (frameBuffer.shape[1], frameBuffer.shape[0]) == self.frame_size, (frameBuffer.shape, self.frame_size)
+        self._proc.stdin.write(np.ascontiguousarray(frameBuffer[:, :, :3]).tobytes())
+        self.numFramesWritten += 1
+
+    def finish(self):
+        # Let ffmpeg finish encoding.
+        self._proc.stdin.close()
+        returnCode = self._proc.wait()
+        self._proc = None
+        # Return the figure to its original canvas.
+        self.fig.set_canvas(self.originalCanvas)
+        self.fig.set_dpi(self.originalDPI)
+        self.fig.set_size_inches(self.originalSize)
+        if returnCode != 0:
+            raise RuntimeError("ffmpeg exited with code " + str(returnCode) + " while writing the movie")
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Movie Utilities ----------------------------- #
+
+def concatenateMovies(movieFiles, outputFile):
+    """
+    Joins movies with identical encoding settings into one file without re-encoding (ffmpeg concat demuxer).
+    """
+    # List the movies for ffmpeg.
+    concatListFile = os.path.splitext(outputFile)[0] + "_concat.txt"
+    with open(concatListFile, "w") as concatList:
+        for movieFile in movieFiles:
+            concatList.write("file '" + os.path.abspath(movieFile).replace("'", "'\\''") + "'\n")
+
+    # Copy the encoded streams into the final movie.
+    try:
+        subprocess.run([manimation.FFMpegWriter.bin_path(), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                        "-i", concatListFile, "-c", "copy", outputFile], check=True)
+    finally:
+        os.remove(concatListFile)
@@ -3,19 +3,42 @@
 # ------------------------- Imported Modules --------------------------------#
 
 # Basic Modules
+import os
 import sys
+import shutil
+import tempfile
 import numpy as np
+import multiprocessing
 # Modules to Plot
+import matplotlib.legend
 import matplotlib.pyplot as plt
-import matplotlib.animation as manimation
+
+# Import Analysis Files
+sys.path.append('./Helper Files/Analysis Protocols/')
+import _statisticsProtocols
+from _profilingProtocols import profiler
+# Import Plotting Layers
+import _movieLayers
+import _movieWriters
+import _movieFrames
+# Import the Shared Memory Frames
+sys.path.append('./Helper Files/Data Extraction/')
+import sharedFrames
 
 # -------------------------------------------------------------------------- #
 # ------------------------- Plotting Functions ------------------------------#
 
 class plotDataCV:
     
-    def __init__(self, filename, outputDirectory, showFullInfo, showPeakCurrent, useCHIPeaks, seePastCVData):
+    def __init__(self, filename, outputDirectory, showFullInfo, showPeakCurrent, useCHIPeaks, seePastCVData, useBlitting = False, 
+                 numRenderWorkers = 1, moviePreset = "full", frameStride = 1):
+        # Store the settings to recreate the plots in other processes.
+        self.plotSettings = dict(filename = filename, outputDirectory = outputDirectory, showFullInfo = showFullInfo, showPeakCurrent = showPeakCurrent, 
+                                 useCHIPeaks = useCHIPeaks, seePastCVData = seePastCVData, useBlitting = useBlitting, numRenderWorkers = 1,
+                                 moviePreset = moviePreset, frameStride = frameStride)
         # Protocol Flags
+        self.numRenderWorkers = numRenderWorkers
+        self.useBlitting = useBlitting
         self.useCHIPeaks = useCHIPeaks
         self.showFullInfo = showFullInfo
         self.seePastCVData = seePastCVData
@@ -30,19 +53,43 @@ class plotDataCV:
         self.axRight = None
         self.axLowerLeft = None
         self.axLowerRight = None
+        # Initialize the cached movie background (blitting)
+        self.staticBackground = None
         
         # Specify figure aesthetics
         self.title = filename
         self.figureWidth = 20; self.figureHeight = 8
         
+        # Specify the movie resolution and speed.
+        self.moviePresets = {
+            "full": dict(movieDPI = 300, movieFPS = 7),       # 6000 x 2400 pixels (2x2 layout)
+            "standard": dict(movieDPI = 150, movieFPS = 7),   # 3000 x 1200 pixels
+            "quickLook": dict(movieDPI = 72, movieFPS = 7),   # 1440 x 576 pixels
+        }
+        assert moviePreset in self.moviePresets, "Unknown movie preset: " + str(moviePreset)
+        self.movieDPI = self.moviePresets[moviePreset]["movieDPI"]
+        self.movieFPS = self.moviePresets[moviePreset]["movieFPS"]
+        # Only render every Nth cycle (plus the last cycle).
+        assert 1 <= frameStride, frameStride
+        self.frameStride = int(frameStride)
+        
         # Specify the colors to plot each peak current: OXIDATION, REDUCTION
         self.peakCurrentColorOrder = [
             ["tab:red", "tab:blue", "tab:orange", "tab:green", "black"],
             ["tab:brown", "tab:purple", "tab:pink", "tab:cyan", "tab:gray"]]
+        
+        # Initialize the running statistics for the peak current.
+        self.runningStatistics = _statisticsProtocols.runningStatistics()
     
     def plotCurves(self, potentialFrames, currentFrames, timeFrames, bothPeakPotentialGroups, 
-                   bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups):
-        print("\tPlotting the Data")
+                   bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, frameRange = None, movieFile = None):
+        # Split the movie between worker processes.
+        if self.numRenderWorkers > 1 and frameRange is None and self.numRenderWorkers < len(potentialFrames):
+            self.plotCurvesParallel(potentialFrames, currentFrames, timeFrames, bothPeakPotentialGroups, 
+                                    bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups)
+            return None
+        
+        if frameRange is None: print("\tPlotting the Data")
         numPeakGroupsBoth = [len(bothPeakPotentialGroups[0]), len(bothPeakPotentialGroups[1])]
         # Initialize the canvas for plotting
         self.initializeFigure(numPeakGroupsBoth)
@@ -51,7 +98,56 @@ class plotDataCV:
         
         # Plot the data
         self.plotMovieCV(potentialFrames, currentFrames, timeFrames, bothPeakPotentialGroups, 
+                       bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, numPeakGroupsBoth, frameRange, movieFile)
+        
+    def plotCurvesStream(self, cvFrames, numFrames, currentBounds, bothPeakPotentialGroups,
+                         bothPeakCurrentGroups, bothBaselineBoundsGroups, getBaselineFitFrames):
+        """
+        Renders the movie while reading the CV frames from a generator (only two cycles in memory).
+            cvFrames: Yields (current, potential, time) for each cycle.
+            currentBounds: The (min, max) CV current of all the cycles.
+            getBaselineFitFrames: Called with the streamed potentialFrames; returns the baseline fits indexed like bothBaselineFitGroups.
+        """
+        print("\tPlotting the Data")
+        cvWindow = _movieFrames.cycleWindow(cvFrames, numFrames)
+        bothBaselineFitGroups = getBaselineFitFrames(cvWindow.potentialFrames)
+
+        numPeakGroupsBoth = [len(bothPeakPotentialGroups[0]), len(bothPeakPotentialGroups[1])]
+        # Initialize the canvas for plotting (the current bounds stand in for the CV frames)
+        self.initializeFigure(numPeakGroupsBoth)
+        self.initializePlots(bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups,
+                             bothBaselineFitGroups, cvWindow.potentialFrames, [currentBounds], numPeakGroupsBoth)
+
+        # Plot the data
+        self.plotMovieCV(cvWindow.potentialFrames, cvWindow.currentFrames, cvWindow.timeFrames, bothPeakPotentialGroups,
                        bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, numPeakGroupsBoth)
+
+    def plotCurvesParallel(self, potentialFrames, currentFrames, timeFrames, bothPeakPotentialGroups, 
+                           bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups):
+        print("\tPlotting the Data with", self.numRenderWorkers, "Workers")
+        # Split the frames into one contiguous chunk per worker.
+        chunkBounds = np.linspace(0, len(potentialFrames), self.numRenderWorkers + 1).astype(int)
+        chunkFolder = tempfile.mkdtemp(prefix = self.title + "_", dir = self.outputDirectory)
+        chunkFiles = [os.path.join(chunkFolder, "chunk_" + str(chunkInd) + ".mp4") for chunkInd in range(self.numRenderWorkers)]
+        
+        # Share the CV frames and baseline fits once instead of pickling them for every chunk.
+        frameStore = sharedFrames.sharedFrameStore()
+        for arrayName, array in [("potentialFrames", potentialFrames), ("currentFrames", currentFrames), ("timeFrames", timeFrames),
+                                 ("oxidationBaselineFits", bothBaselineFitGroups[0]), ("reductionBaselineFits", bothBaselineFitGroups[1])]:
+            frameStore.addArray(arrayName, array)
+        
+        # Render each chunk in a separate process with its own figure.
+        peakArgs = (bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups)
+        chunkJobs = [(self.plotSettings, self.movieDPI, frameStore.getHandles(), peakArgs, (chunkBounds[chunkInd], chunkBounds[chunkInd+1]), chunkFiles[chunkInd]) 
+                     for chunkInd in range(self.numRenderWorkers)]
+        try:
+            with multiprocessing.Pool(self.numRenderWorkers) as renderPool:
+                renderPool.starmap(renderMovieChunk, chunkJobs)
+            # Join the chunks without re-encoding.
+            _movieWriters.concatenateMovies(chunkFiles, self.outputDirectory + self.title + ".mp4")
+        finally:
+            frameStore.close()
+            shutil.rmtree(chunkFolder, ignore_errors = True)
         
     def addAxisPlots(self, ax, numPeakGroupsBoth):
         peakPlots = [[], []]  # OXIDATION, REDUCTION
@@ -79,10 +175,8 @@ class plotDataCV:
                          bothBaselineFitGroups, potentialFrames, currentFrames, numPeakGroupsBoth):
         # Initialize Movie Writer for Plots
         metadata = dict(title=self.title, artist='Matplotlib', comment='Movie support!')
-        self.writer = manimation.FFMpegWriter(fps=7, metadata=metadata)
+        self.writer = _movieWriters.movieWriter(fps=self.movieFPS, metadata=metadata)
         self.movieGraphLeftCurrent = self.axLeft.plot([0], [0], 'tab:blue', '-', linewidth=1, alpha = 1)[0]
-        if self.seePastCVData:
-            self.movieGraphLeftPrev = self.axLeft.plot([0], [0], 'tab:blue', '-', linewidth=1, alpha = 0.1)[0]
         
         if not self.useCHIPeaks:
             self.movieGraphLeftPeak_RedOx = [[], []]
@@ -110,6 +204,9 @@ class plotDataCV:
         self.axLeft.set_title("CV Scan over Time")
         self.axLeft.set_xlabel("Potential (Volts)")
         self.axLeft.set_ylabel("Current (uAmps)")
+        # Accumulate the past CV cycles in the background
+        if self.seePastCVData:
+            self.pastCycleLayer = _movieLayers.pastCycleLayer(self.axLeft, self.movieDPI, color='tab:blue', linewidth=1, alpha=0.1)
                 
         if self.showPeakCurrent and max(numPeakGroupsBoth) != 0:
             
@@ -148,108 +245,227 @@ class plotDataCV:
         self.figure.tight_layout(pad=2.0)
             
     def plotMovieCV(self, potentialFrames, currentFrames, timeFrames, bothPeakPotentialGroups, 
-                   bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, numPeakGroupsBoth):
+                   bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, numPeakGroupsBoth, frameRange = None, movieFile = None):
+        """
+        frameRange: (startFrame, endFrame) to write; the earlier frames are replayed without writing so the figure state matches the full movie.
+        movieFile: The output movie path. Default: <outputDirectory><title>.mp4
+        """
+        # Calculate the running coefficient of variation of every peak group once.
+        bothPeakCoVGroups = self.runningStatistics.groupCoefficientOfVariation(bothPeakCurrentGroups)
+        # Specify the frames to write.
+        startFrame, endFrame = (0, len(potentialFrames)) if frameRange is None else frameRange
+        if movieFile is None:
+            movieFile = self.outputDirectory + self.title + ".mp4"
 
         # Open Movie Writer and Add Data
-        with self.writer.saving(self.figure, self.outputDirectory + self.title + ".mp4", 300):
-            # Add Frames in the Order for Showing
-            for frameNum in range(len(potentialFrames)):
-                # Set Left Side
-                x = np.array(potentialFrames[frameNum])
-                y = np.array(currentFrames[frameNum])
-                t = timeFrames[frameNum]
-                self.axLeft.legend(["RunTime = " + str(round(t[0],2)) + " Seconds"], loc="upper left")
-                self.movieGraphLeftCurrent.set_data(x, y)
-                if self.seePastCVData and frameNum != 0:
-                    self.movieGraphLeftPrev.set_data(np.array(potentialFrames[:frameNum]).flatten(), np.array(currentFrames[:frameNum]).flatten())
+        try:
+            with profiler.stage("plotMovieCV"), self.writer.saving(self.figure, movieFile, self.movieDPI):
+                # Add Frames in the Order for Showing
+                for frameNum in self.iterMovieFrames(potentialFrames, currentFrames, timeFrames, bothPeakPotentialGroups, bothPeakCurrentGroups, 
+                                                     bothPeakCoVGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, numPeakGroupsBoth, startFrame, endFrame):
+                    # Write to Video
+                    profiler.count("framesWritten")
+                    if self.seePastCVData:
+                        self.pastCycleLayer.refreshImage()
+                    if self.useBlitting:
+                        self.blitMovieFrame()
+                    else:
+                        self.writer.grab_frame()
+        finally:
+            # Return the artists to normal.
+            if self.useBlitting and self.staticBackground is not None:
+                self.finishBlitting()
+        # Only show the figure for a full movie.
+        if frameRange is None:
+            plt.show()
+    
+    def iterMovieFrames(self, potentialFrames, currentFrames, timeFrames, bothPeakPotentialGroups, bothPeakCurrentGroups, 
+                        bothPeakCoVGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, numPeakGroupsBoth, startFrame, endFrame):
+        """
+        Sets the artists of each frame up to endFrame and yields the number of every frame to write (from startFrame, every frameStride).
+        Every artist is set from its frame number alone; only the past cycles carry over, so a chunk matches the full movie.
+        """
+        for frameNum in range(endFrame):
+            # Add the previous cycle to the background.
+            if self.seePastCVData and frameNum != 0:
+                self.pastCycleLayer.addCycle(potentialFrames[frameNum-1], currentFrames[frameNum-1])
+            # Skip frames that belong to an earlier chunk or are between strides. The first frame
+            # is always laid out: it places the past cycle layer and, with blitting, the static background.
+            writeFrame = startFrame <= frameNum and self.isMovieFrame(frameNum, len(potentialFrames))
+            if not writeFrame and frameNum != 0:
+                continue
             
-                # Set Right Side
-                if self.showPeakCurrent and max(numPeakGroupsBoth) != 0:
-                    legendListRight = []
-                    # Loop through the oxidation and reduction plots
-                    for reductiveScan in range(len(self.peakCurrentPlots)):                        
-                        # Set scan type
-                        if reductiveScan == 0:
-                            scanDirection = "Oxidation Peak ("
-                        elif reductiveScan == 1:
-                            scanDirection = "Reduction Peak ("
-                        else:
-                            sys.exit("Something went wrong with peakInfoHolder")
+            # Update the artists for this frame.
+            self.updateMovieFrame(frameNum, potentialFrames, currentFrames, timeFrames, bothPeakPotentialGroups, bothPeakCurrentGroups, 
+                                  bothPeakCoVGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, numPeakGroupsBoth)
+            # Fix the layout and cache the static artists on the first frame.
+            if self.useBlitting and self.staticBackground is None:
+                self.initializeBlitting()
+            if writeFrame:
+                yield frameNum
+    
+    def isMovieFrame(self, frameNum, numFrames):
+        # Keep every Nth cycle and always the last cycle.
+        return frameNum % self.frameStride == 0 or frameNum == numFrames - 1
+    
+    def updateMovieFrame(self, frameNum, potentialFrames, currentFrames, timeFrames, bothPeakPotentialGroups, bothPeakCurrentGroups, 
+                         bothPeakCoVGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, numPeakGroupsBoth):
+        # Set Left Side
+        x = np.array(potentialFrames[frameNum])
+        y = np.array(currentFrames[frameNum])
+        t = timeFrames[frameNum]
+        self.setMovieLegend(self.axLeft, ["RunTime = " + str(round(t[0],2)) + " Seconds"], loc="upper left")
+        self.movieGraphLeftCurrent.set_data(x, y)
+    
+        # Set Right Side
+        if self.showPeakCurrent and max(numPeakGroupsBoth) != 0:
+            legendListRight = []
+            # Loop through the oxidation and reduction plots
+            for reductiveScan in range(len(self.peakCurrentPlots)):                        
+                # Set scan type
+                if reductiveScan == 0:
+                    scanDirection = "Oxidation Peak ("
+                elif reductiveScan == 1:
+                    scanDirection = "Reduction Peak ("
+                else:
+                    sys.exit("Something went wrong with peakInfoHolder")
 
-                        # For each set of peaks.
-                        for peakGroupInd in range(numPeakGroupsBoth[reductiveScan]):
-                            # Extract the peak information for the current frame
-                            peakCurrent = bothPeakCurrentGroups[reductiveScan][peakGroupInd][frameNum]
-                            baselineFit = bothBaselineFitGroups[reductiveScan][peakGroupInd][frameNum]
-                            peakPotential = bothPeakPotentialGroups[reductiveScan][peakGroupInd][frameNum]
-                            baselineBounds = bothBaselineBoundsGroups[reductiveScan][peakGroupInd][frameNum]
-                            
-                            if not self.useCHIPeaks:
-                                self.movieGraphLeftBaseline_RedOx[reductiveScan][peakGroupInd].set_data([], [])
-                                self.movieGraphLeftPeak_RedOx[reductiveScan][peakGroupInd].set_data([], [])
-                                      
-                            # If the peak was not found in this frame
-                            if np.isnan(peakPotential):
-                                # Label the peak as empty
-                                legendListRight.append(scanDirection + str(peakGroupInd+1) + "):      \n" +
-                                                   "       Ep = NA\n" +
-                                                   "       Ip = NA\n" +
-                                                   "       CoV = NA")
-                                continue
-                            # Enforce correct data type:
-                            baselineBounds = baselineBounds.astype(int)
-                            
-                            # Get all the peak current and potentials
-                            Ip_fromPreviousFrames = bothPeakCurrentGroups[reductiveScan][peakGroupInd][:frameNum+1]
-                            Ep_fromPreviousFrames = bothPeakPotentialGroups[reductiveScan][peakGroupInd][:frameNum+1]
-                            # Get a list of the current frames: x-axis
-                            listOfFrames = np.arange(1,len(Ip_fromPreviousFrames)+1)
-                            
-                            CoefficientofVariationList = []
-                            # Get Statistics of Peak Current.
-                            for peakCurrentInd in range(len(Ip_fromPreviousFrames)):
-                                currentsUpToFrame = Ip_fromPreviousFrames[:peakCurrentInd + 1]
-                                if np.isnan(currentsUpToFrame[peakCurrentInd]):
-                                    CoefficientofVariationList.append(np.nan)
-                                elif len(currentsUpToFrame) - 1 <= np.sum(np.isnan(currentsUpToFrame)):
-                                    CoefficientofVariationList.append(0)
-                                else:
-                                    # Calculate the CoV of the peak current
-                                    peakSTD = np.nanstd(currentsUpToFrame, ddof=1)
-                                    peakMean = abs(np.nanmean(currentsUpToFrame))
-                                    CoefficientofVariation = (peakSTD/peakMean)*100
-                                    CoefficientofVariationList.append(CoefficientofVariation)
-                            
-                            # Plot the peak currents for every CV segment; right plot
-                            self.movieGraphRight = self.peakCurrentPlots[reductiveScan][peakGroupInd]
-                            legendListRight.append(scanDirection + str(peakGroupInd+1) + "):      \n" +
-                                                   "       Ep = " + "%.3g"%peakPotential + " Volts\n" +
-                                                   "       Ip = " + "%.4g"%peakCurrent + " uAmps\n" +
-                                                   "       CoV = " + "%.3g"%CoefficientofVariationList[-1] + "%")
-                            self.movieGraphRight.set_data(listOfFrames, Ip_fromPreviousFrames)
-                            
-                            if not self.useCHIPeaks:
-                                baselineX = x[int(len(x)/2):] if reductiveScan else x
-                                baselineY = y[int(len(y)/2):] if reductiveScan else y
-                                                                
-                                self.movieGraphLeftBaseline_RedOx[reductiveScan][peakGroupInd].set_data(baselineX[baselineBounds[0]:baselineBounds[1]], baselineFit[baselineBounds[0]:baselineBounds[1]])
-                                self.movieGraphLeftPeak_RedOx[reductiveScan][peakGroupInd].set_data(baselineX[ [baselineBounds[1], baselineBounds[1]] ], [ baselineFit[baselineBounds[1]], baselineY[baselineBounds[1]] ])
-                            if self.showFullInfo:
-                                # Plot the peak potential for every CV segment; lower left plot
-                                self.movieGraphLowerLeft = self.peakPotentialPlots[reductiveScan][peakGroupInd]
-                                self.movieGraphLowerLeft.set_data(listOfFrames, Ep_fromPreviousFrames)
-                                # ---------------------------------------- #
-                                # Get Plot for Coefficient of VariationList
-                                self.movieGraphLowerRight = self.peakCoVPlots[reductiveScan][peakGroupInd]
-                                # Plot the Data
-                                self.movieGraphLowerRight.set_data(listOfFrames, CoefficientofVariationList)
-                        self.axRight.legend(legendListRight, bbox_to_anchor=(1.025, 1.025), loc='upper left')
-                        # figLegend = self.figure.legend(legendListRight, bbox_to_anchor=(1.0, 0.95), loc='upper left')
-                        # figLegend.set_in_layout(True)
-                        self.figure.tight_layout(pad=2.0)
-                # Write to Video
-                self.writer.grab_frame()
-        plt.show()
+                # For each set of peaks.
+                for peakGroupInd in range(numPeakGroupsBoth[reductiveScan]):
+                    # Extract the peak information for the current frame
+                    peakCurrent = bothPeakCurrentGroups[reductiveScan][peakGroupInd][frameNum]
+                    baselineFit = bothBaselineFitGroups[reductiveScan][peakGroupInd][frameNum]
+                    peakPotential = bothPeakPotentialGroups[reductiveScan][peakGroupInd][frameNum]
+                    baselineBounds = bothBaselineBoundsGroups[reductiveScan][peakGroupInd][frameNum]
+                    
+                    if not self.useCHIPeaks:
+                        self.movieGraphLeftBaseline_RedOx[reductiveScan][peakGroupInd].set_data([], [])
+                        self.movieGraphLeftPeak_RedOx[reductiveScan][peakGroupInd].set_data([], [])
+                    
+                    # Get all the peak current and potentials (the cycles without a peak are gaps)
+                    Ip_fromPreviousFrames = bothPeakCurrentGroups[reductiveScan][peakGroupInd][:frameNum+1]
+                    Ep_fromPreviousFrames = bothPeakPotentialGroups[reductiveScan][peakGroupInd][:frameNum+1]
+                    # Get a list of the current frames: x-axis
+                    listOfFrames = np.arange(1,len(Ip_fromPreviousFrames)+1)
+                    # Get the running coefficient of variation of the peak current.
+                    CoefficientofVariationList = bothPeakCoVGroups[reductiveScan][peakGroupInd][:frameNum+1]
+                    
+                    # Plot the peak history up to this frame, even without a peak in it.
+                    self.peakCurrentPlots[reductiveScan][peakGroupInd].set_data(listOfFrames, Ip_fromPreviousFrames)
+                    if self.showFullInfo:
+                        self.peakPotentialPlots[reductiveScan][peakGroupInd].set_data(listOfFrames, Ep_fromPreviousFrames)
+                        self.peakCoVPlots[reductiveScan][peakGroupInd].set_data(listOfFrames, CoefficientofVariationList)
+                              
+                    # If the peak was not found in this frame
+                    if np.isnan(peakPotential):
+                        # Label the peak as empty
+                        legendListRight.append(scanDirection + str(peakGroupInd+1) + "):      \n" +
+                                           "       Ep = NA\n" +
+                                           "       Ip = NA\n" +
+                                           "       CoV = NA")
+                        continue
+                    # Enforce correct data type:
+                    baselineBounds = baselineBounds.astype(int)
+                    
+                    # Label the peak currents for every CV segment; right plot
+                    legendListRight.append(scanDirection + str(peakGroupInd+1) + "):      \n" +
+                                           "       Ep = " + "%.3g"%peakPotential + " Volts\n" +
+                                           "       Ip = " + "%.4g"%peakCurrent + " uAmps\n" +
+                                           "       CoV = " + "%.3g"%CoefficientofVariationList[-1] + "%")
+                    
+                    if not self.useCHIPeaks:
+                        baselineX = x[int(len(x)/2):] if reductiveScan else x
+                        baselineY = y[int(len(y)/2):] if reductiveScan else y
+                                                        
+                        self.movieGraphLeftBaseline_RedOx[reductiveScan][peakGroupInd].set_data(baselineX[baselineBounds[0]:baselineBounds[1]], baselineFit[baselineBounds[0]:baselineBounds[1]])
+                        self.movieGraphLeftPeak_RedOx[reductiveScan][peakGroupInd].set_data(baselineX[ [baselineBounds[1], baselineBounds[1]] ], [ baselineFit[baselineBounds[1]], baselineY[baselineBounds[1]] ])
+            self.setMovieLegend(self.axRight, legendListRight, bbox_to_anchor=(1.025, 1.025), loc='upper left')
+            # Without blitting, the layout follows the legend every frame.
+            if not self.useBlitting:
+                self.figure.tight_layout(pad=2.0)
+    
+    def setMovieLegend(self, ax, legendList, **legendKwargs):
+        movieLegend = ax.get_legend()
+        # With blitting, only update the text of the cached legend.
+        if self.useBlitting and movieLegend is not None and len(movieLegend.get_texts()) == len(legendList):
+            for legendText, legendString in zip(movieLegend.get_texts(), legendList):
+                legendText.set_text(legendString)
+        else:
+            ax.legend(legendList, **legendKwargs)
+    
+    # ---------------------------------------------------------------------- #
+    # ----------------------------- Blitting ------------------------------- #
+    
+    def getDynamicArtists(self):
+        # The past cycle layer is composited separately.
+        dynamicArtists = [self.movieGraphLeftCurrent]
+        
+        # Add the peak detection lines.
+        if not self.useCHIPeaks:
+            for reductiveScan in range(2):
+                dynamicArtists.extend(self.movieGraphLeftBaseline_RedOx[reductiveScan])
+                dynamicArtists.extend(self.movieGraphLeftPeak_RedOx[reductiveScan])
+        # Add the peak information plots.
+        if self.axRight is not None:
+            for reductiveScan in range(2):
+                dynamicArtists.extend(self.peakCurrentPlots[reductiveScan])
+                if self.showFullInfo:
+                    dynamicArtists.extend(self.peakPotentialPlots[reductiveScan])
+                    dynamicArtists.extend(self.peakCoVPlots[reductiveScan])
+        
+        # Draw the legends on top.
+        for ax in [self.axLeft, self.axRight]:
+            if ax is not None and ax.get_legend() is not None:
+                dynamicArtists.append(ax.get_legend())
+        
+        return dynamicArtists
+    
+    def getMovieFrameData(self):
+        # The data of every dynamic artist, the legend texts, and the number of past cycles (to compare two renderings of a frame).
+        movieFrameData = [self.pastCycleLayer.numCycles if self.seePastCVData else None]
+        for artist in self.getDynamicArtists():
+            if isinstance(artist, matplotlib.legend.Legend):
+                movieFrameData.append([legendText.get_text() for legendText in artist.get_texts()])
+            else:
+                movieFrameData.extend(np.asarray(artistData, dtype=float) for artistData in artist.get_data())
+        return movieFrameData
+    
+    def initializeBlitting(self):
+        # Fix the layout once (using the first frame's legends).
+        self.figure.tight_layout(pad=2.0)
+        
+        # The past cycle layer is blended into each frame instead of drawn as an image.
+        if self.seePastCVData:
+            if self.pastCycleLayer.layerImage is None:
+                self.pastCycleLayer.initializeLayer()
+            self.pastCycleLayer.layerImage.set_visible(False)
+        # Exclude the dynamic artists from the static background.
+        self.dynamicArtists = self.getDynamicArtists()
+        for artist in self.dynamicArtists:
+            artist.set_animated(True)
+        # Cache the static axes, ticks, and labels.
+        self.figure.canvas.draw()
+        self.staticBackground = self.figure.canvas.copy_from_bbox(self.figure.bbox)
+        
+    def blitMovieFrame(self):
+        # Restore the static background.
+        self.figure.canvas.restore_region(self.staticBackground)
+        # Add the past CV cycles behind the dynamic artists.
+        if self.seePastCVData:
+            self.pastCycleLayer.compositeLayer(np.asarray(self.figure.canvas.buffer_rgba()))
+        # Draw only the dynamic artists on top.
+        for artist in self.dynamicArtists:
+            self.figure.draw_artist(artist)
+        # Stream the canvas to the movie.
+        self.writer.grabCanvas(self.figure.canvas)
+        
+    def finishBlitting(self):
+        # Return the artists to normal.
+        for artist in self.dynamicArtists:
+            artist.set_animated(False)
+        if self.seePastCVData:
+            self.pastCycleLayer.layerImage.set_visible(True)
+        self.staticBackground = None
     
     def calculatePlotBounds(self, bothPeakPotentialGroups, bothPeakCurrentGroups, currentFrames):
         # Set the CV y-Limits
@@ -284,4 +500,21 @@ class plotDataCV:
     
     
     
-    
\ No newline at end of file
+    
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Parallel Rendering ---------------------------#
+
+def renderMovieChunk(plotSettings, movieDPI, frameHandles, peakArgs, frameRange, movieFile):
+    # Worker processes never display the figure.
+    plt.switch_backend("Agg")
+    with sharedFrames.sharedFrameView(frameHandles) as frameView:
+        # Recreate the plots with their own figure, reading the frames in place.
+        plotData = plotDataCV(**plotSettings)
+        plotData.movieDPI = movieDPI
+        bothBaselineFitGroups = [frameView["oxidationBaselineFits"], frameView["reductionBaselineFits"]]
+        plotData.plotCurves(frameView["potentialFrames"], frameView["currentFrames"], frameView["timeFrames"], *peakArgs, bothBaselineFitGroups,
+                            frameRange = frameRange, movieFile = movieFile)
+        plt.close(plotData.figure)
+        # Release the views before detaching.
+        plotData = bothBaselineFitGroups = None
@@ -0,0 +1,218 @@
+
+"""
+Benchmark the CV Pipeline on Synthetic CHI Files (Parse, Analyze, Group, Render, and Export Times).
+    Every Run Appends its Table to "<benchmarkDirectory>benchmarkResults.csv" to Compare Runs.
+
+Need to Install in the Python Enviroment Beforehand:
+    $ conda install openpyxl
+    % conda install ffmpeg ffmpeg-python
+"""
+
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import os
+import sys
+import csv
+import json
+import time
+import itertools
+import subprocess
+
+# Plotting Files (dataPlotting and matplotlib are imported only when a movie is rendered)
+sys.path.append('./Helper Files/Plotting/')
+
+# Import Python Files for Data Extraction
+sys.path.append('./Helper Files/Data Extraction/')
+import excelProcessing
+import processDataCV
+import syntheticData
+
+# ---------------------------------------------------------------------------#
+# ------------------------------ Program Begins -----------------------------#
+
+if __name__ == "__main__":
+    # ---------------------------------------------------------------------- #
+    #    User Parameters to Edit (More Complex Edits are Inside the Files)   #
+    # ---------------------------------------------------------------------- #
+
+    # Specify Where the Synthetic Files and Results are Saved
+    benchmarkDirectory = "./Benchmarks/"
+    runLabel = time.strftime("%Y-%m-%d %H:%M:%S")   # The Name of This Run in the Results File
+
+    # Specify the Size Sweep (Every Combination is Benchmarked)
+    numCyclesSweep = [10, 100, 1000]                # Number of CV Cycles in the File
+    sampleIntervalSweep = [0.002, 0.001]            # Sample Interval (Volts) of the File
+    maxPointsPerRun = 5*10**6                       # Skip Sizes with This Many Data Points or More
+    maxPointsPerSegment = 2000      # Skip Finer Sweeps: the Baseline Search Grows with the Square of the Sweep (~0.3 s/Cycle at 1000 Points, ~4 s at 2000, ~23 s at 5000)
+    excelRowLimit = 1048576         # Files with More Rows Than an XLSX Sheet Holds are Parsed Without Excel (loadCHIFrames)
+
+    # Specify the Synthetic CV (See syntheticData.syntheticCV for All Options)
+    syntheticSettings = dict(lowVolt = 0.2, highVolt = 1.2, scanRate = 0.05, noiseCurrent = 2e-8)
+
+    # Specify the Cold-Start Budget of the Analyze-Only Path (mainProtocol.py with plotMovies = False)
+    checkStartup = True             # Time a Fresh Interpreter Importing the Analyze-Only Modules (Exits with 1 if Over Budget)
+    startupBudget = 1.5             # Seconds from Interpreter Start to the Imports Finished
+    numStartupRuns = 3              # Fresh Interpreters Timed (the Fastest Counts)
+    startupModules = ["excelProcessing", "processDataCV", "resultsProcessing", "resultsDatabase", "analysisCache", "cvFileProcessing", "pipelineProcessing"]
+    lazyModules = ["matplotlib", "openpyxl", "pyexcel"]     # Backends the Analyze-Only Path Must Not Load
+
+    # Specify the Stages to Benchmark
+    benchmarkRendering = True       # Render the Movie (Needs ffmpeg; the Slowest Stage)
+    moviePreset = "quickLook"       # Movie Resolution: "full" (300 dpi), "standard" (150 dpi), "quickLook" (72 dpi)
+    frameStride = 1                 # Only Render Every Nth Cycle (Plus the Last Cycle) in the Movie
+    exportFormats = ("xlsx", "csv", "npz")
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------- Preparation Steps -------------------------- #
+
+    # Initialize analysis classes.
+    saveData = excelProcessing.saveData()
+    extractData = excelProcessing.processFiles()
+    analyzeDataCV = processDataCV.processData(numInitCyclesToSkip = 0, useCHIPeaks = False)
+    if benchmarkRendering:
+        import dataPlotting
+        import matplotlib.pyplot as plt
+        plt.switch_backend("Agg")
+
+    # Create the output folders.
+    syntheticDirectory = benchmarkDirectory + "Synthetic Data/"
+    outputDirectory = benchmarkDirectory + "CV Analysis/"
+    os.makedirs(syntheticDirectory, exist_ok = True)
+    os.makedirs(outputDirectory, exist_ok = True)
+    stageNames = ["Parse", "Analyze", "Group", "Render", "Export"]
+
+    # ---------------------------------------------------------------------- #
+    # --------------------------- Startup Program -------------------------- #
+    
+    startupPassed = True
+    if checkStartup:
+        # Import the analyze-only modules in a fresh interpreter.
+        startupCode = "import sys, json; " + "; ".join("sys.path.append(%r)" % helperFolder for helperFolder in ['./Helper Files/', './Helper Files/Analysis Protocols/', './Helper Files/Data Extraction/']) + \
+                      "; import " + ", ".join(startupModules) + "; print(json.dumps(sorted(module for module in %r if module in sys.modules)))" % lazyModules
+        startupTimes = []
+        for startupRun in range(numStartupRuns + 1):
+            startTime = time.perf_counter()
+            subprocess.run([sys.executable, "-c", startupCode], capture_output = True, check = True)
+            startupTimes.append(time.perf_counter() - startTime)
+        # The first run also writes the bytecode; keep the fastest of the others.
+        startupTime = min(startupTimes[1:])
+        # Find the slow and the unwanted imports.
+        startupProcess = subprocess.run([sys.executable, "-X", "importtime", "-c", startupCode], capture_output = True, text = True, check = True)
+        loadedLazyModules = json.loads(startupProcess.stdout.strip().splitlines()[-1])
+        # The slowest top-level imports (cumulative microseconds from -X importtime).
+        importTimes = [line.split("|") for line in startupProcess.stderr.splitlines() if line.startswith("import time:") and not line.endswith("imported package")]
+        topImports = sorted(((int(cumulativeTime), moduleName.strip()) for selfTime, cumulativeTime, moduleName in importTimes if not moduleName.startswith("  ")), reverse = True)[0:5]
+        
+        startupPassed = startupTime <= startupBudget and len(loadedLazyModules) == 0
+        print("\nAnalyze-Only Startup: %.3f s (Budget %.3g s)" % (startupTime, startupBudget) + ("" if startupPassed else " FAILED"))
+        print("\tSlowest Imports:", ", ".join("%s %.3f s" % (moduleName, cumulativeTime/1e6) for cumulativeTime, moduleName in topImports))
+        if loadedLazyModules:
+            print("\tLoaded Backends that Should be Lazy:", ", ".join(loadedLazyModules))
+    
+    # ---------------------------------------------------------------------- #
+    # -------------------------- Benchmark Program ------------------------- #
+
+    benchmarkRows = []
+    for numCycles, sampleInterval in itertools.product(numCyclesSweep, sampleIntervalSweep):
+        syntheticCV = syntheticData.syntheticCV(sampleInterval = sampleInterval, **syntheticSettings)
+        numPoints = numCycles*syntheticCV.pointsPerScan
+        if numPoints >= maxPointsPerRun:
+            print("\nSkipping", numCycles, "Cycles at", sampleInterval, "V:", numPoints, "Points is Not Below maxPointsPerRun")
+            continue
+        if syntheticCV.pointsPerScan/2 > maxPointsPerSegment:
+            print("\nSkipping", numCycles, "Cycles at", sampleInterval, "V:", int(syntheticCV.pointsPerScan/2), "Points per Sweep is Above maxPointsPerSegment")
+            continue
+
+        # Generate the synthetic file once.
+        fileName = "synthetic_" + str(numCycles) + "cycles_" + str(sampleInterval) + "V"
+        dataFile = syntheticDirectory + fileName + ".txt"
+        if not os.path.isfile(dataFile):
+            syntheticCV.writeFile(dataFile, numCycles)
+        stageTimes = dict.fromkeys(stageNames, None)
+        # Convert the file to XLSX like mainProtocol.py only if it fits in one sheet.
+        with open(dataFile, "r") as chiFile:
+            useExcel = sum(1 for line in chiFile) < excelRowLimit
+
+        # ------------------------- Parse the Data ------------------------- #
+        # Remove the converted workbook so every run parses the text file.
+        excelFile = outputDirectory + "Excel Files/" + fileName + ".xlsx"
+        if os.path.isfile(excelFile):
+            os.remove(excelFile)
+        startTime = time.perf_counter()
+        if useExcel:
+            xlWorksheet, xlWorkbook = extractData.getExcelFile(dataFile, outputDirectory, testSheetNum = 0, excelDelimiter = ",")
+            startRow, scanRate, pointsPerScan, pointsPerSegment, startSegment, numberOfSegments, skipOffset = analyzeDataCV.getRunInfo(xlWorksheet)
+            currentFrames, potentialFrames, timeFrames = analyzeDataCV.extractCHIData(xlWorksheet, startRow, scanRate, pointsPerScan)
+            xlWorkbook.close()
+        else:
+            currentFrames, potentialFrames, timeFrames = analyzeDataCV.loadCHIFrames(dataFile)
+        pointsPerSegment = int(len(potentialFrames[0])/2)
+        stageTimes["Parse"] = time.perf_counter() - startTime
+
+        # ------------------------ Analyze the Data ------------------------ #
+        startTime = time.perf_counter()
+        segmentAnalyses = []
+        for potentialFull, currentFull in zip(potentialFrames, currentFrames):
+            for segmentScale in range(2):
+                segmentInds = slice(segmentScale*pointsPerSegment, (segmentScale+1)*pointsPerSegment)
+                segmentAnalyses.append(analyzeDataCV.analyzeCV.analyzeData(potentialFull[segmentInds], currentFull[segmentInds]))
+        stageTimes["Analyze"] = time.perf_counter() - startTime
+
+        # ------------------------- Group the Peaks ------------------------ #
+        startTime = time.perf_counter()
+        bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups = \
+            analyzeDataCV.getPeaks(potentialFrames, currentFrames, pointsPerSegment, iter(segmentAnalyses))
+        stageTimes["Group"] = time.perf_counter() - startTime
+        segmentAnalyses = None
+
+        # ------------------------- Plot the Data -------------------------- #
+        if benchmarkRendering:
+            startTime = time.perf_counter()
+            plotData = dataPlotting.plotDataCV(fileName, outputDirectory, showFullInfo = True, showPeakCurrent = True, useCHIPeaks = False, seePastCVData = True,
+                                               moviePreset = moviePreset, frameStride = frameStride)
+            plotData.plotCurves(potentialFrames, currentFrames, timeFrames, bothPeakPotentialGroups,
+                                bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups)
+            plt.close(plotData.figure)
+            stageTimes["Render"] = time.perf_counter() - startTime
+
+        # ------------------------- Save the Data -------------------------- #
+        startTime = time.perf_counter()
+        saveData.saveDataCV(bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups,
+                            outputDirectory + "Peak Information/", fileName + ".xlsx", sheetName = "CV Analysis", exportFormats = exportFormats)
+        stageTimes["Export"] = time.perf_counter() - startTime
+
+        benchmarkRows.append(dict(runLabel = runLabel, numCycles = len(currentFrames), sampleInterval = sampleInterval, numPoints = numPoints, parser = "xlsx" if useExcel else "text",
+                                  numPeakGroups = len(bothPeakPotentialGroups[0]) + len(bothPeakPotentialGroups[1]), **stageTimes))
+
+    # ---------------------------------------------------------------------- #
+    # --------------------------- Report Results --------------------------- #
+
+    # Print the seconds and throughput (cycles/second) of every stage.
+    print("\nBenchmark:", runLabel)
+    print("%8s %10s %10s" % ("Cycles", "Interval", "Points") + "".join("%18s" % (stageName + " s (cyc/s)") for stageName in stageNames))
+    for benchmarkRow in benchmarkRows:
+        stageColumns = ""
+        for stageName in stageNames:
+            stageTime = benchmarkRow[stageName]
+            stageColumns += "%18s" % ("-" if stageTime is None else "%.3g (%.3g)" % (stageTime, benchmarkRow["numCycles"]/max(stageTime, 1e-12)))
+        print("%8d %10g %10d" % (benchmarkRow["numCycles"], benchmarkRow["sampleInterval"], benchmarkRow["numPoints"]) + stageColumns)
+
+    # Append the results to compare between runs.
+    resultsFile = benchmarkDirectory + "benchmarkResults.csv"
+    writeHeader = not os.path.isfile(resultsFile)
+    resultColumns = ["runLabel", "numCycles", "sampleInterval", "numPoints", "parser", "numPeakGroups"] + stageNames
+    if not writeHeader:
+        # Keep the columns of the earlier runs.
+        with open(resultsFile, "r", newline = "") as resultsCSV:
+            resultColumns = next(csv.reader(resultsCSV), resultColumns)
+    with open(resultsFile, "a", newline = "") as resultsCSV:
+        csvWriter = csv.DictWriter(resultsCSV, fieldnames = resultColumns, extrasaction = "ignore")
+        if writeHeader:
+            csvWriter.writeheader()
+        csvWriter.writerows(benchmarkRows)
+    print("\nSaved the Results to:", resultsFile)
+    # Fail the run if the analyze-only startup went over its budget.
+    if not startupPassed:
+        sys.exit("The Analyze-Only Startup is Over its Budget")
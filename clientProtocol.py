@@ -0,0 +1,53 @@
+
+"""
+Send CV Files to the Analysis Server (Start it First with serverProtocol.py) and Print the Results as JSON.
+    $ python clientProtocol.py "./data/2022-03-23 MQ HCF/CV-Carbon-CuHCF-1.txt"   # Analyze and Save Like mainProtocol.py
+    $ python clientProtocol.py --no-movies --return-peaks <dataFiles>              # Skip the Movies and Return Every Peak
+    $ python clientProtocol.py --ping                                              # Check the Server
+    $ python clientProtocol.py --shutdown                                          # Stop the Server
+The Command Exits with 1 if Any File Failed.
+"""
+
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import os
+import sys
+import json
+import argparse
+
+# Import Python Files for Data Extraction (only the standard library is loaded, so the client starts instantly)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Helper Files/Data Extraction/'))
+import analysisServer
+
+# ---------------------------------------------------------------------------#
+# ------------------------------ Program Begins -----------------------------#
+
+if __name__ == "__main__":
+    argumentParser = argparse.ArgumentParser(description = "Send CV files to the analysis server.")
+    argumentParser.add_argument("dataFiles", nargs = "*", help = "The CV files to analyze (TXT/CSV/XLSX).")
+    argumentParser.add_argument("--socket", default = analysisServer.defaultSocketPath, help = "The Unix socket of the server.")
+    argumentParser.add_argument("--no-movies", action = "store_true", help = "Do not render the CV movies.")
+    argumentParser.add_argument("--return-peaks", action = "store_true", help = "Return the peaks of every cycle, not only the summary.")
+    argumentParser.add_argument("--ping", action = "store_true", help = "Print the state of the server.")
+    argumentParser.add_argument("--shutdown", action = "store_true", help = "Stop the server.")
+    arguments = argumentParser.parse_args()
+
+    # Compose the request (the server resolves no paths, so send absolute ones).
+    if arguments.ping:
+        request = {"command": "ping"}
+    elif arguments.shutdown:
+        request = {"command": "shutdown"}
+    elif arguments.dataFiles:
+        request = {"command": "analyze", "dataFiles": [os.path.abspath(dataFile) for dataFile in arguments.dataFiles],
+                   "options": {"plotMovies": not arguments.no_movies, "returnPeaks": arguments.return_peaks}}
+    else:
+        argumentParser.error("Give the data files to analyze, --ping, or --shutdown.")
+
+    try:
+        response = analysisServer.sendRequest(request, arguments.socket)
+    except OSError as connectionError:
+        sys.exit("Could Not Reach the Analysis Server at " + arguments.socket + " (" + str(connectionError) + "). Start it with serverProtocol.py")
+    print(json.dumps(response, indent = 2))
+    sys.exit(0 if response["status"] == "ok" else 1)
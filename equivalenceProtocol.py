@@ -0,0 +1,157 @@
+
+"""
+Check that the Alternate Peak Engines Find the Same Peaks as the Reference Analysis (findLinearBaseline,
+    findNearbyMinimum, and addPeakInfo_toGroups) on the Data Files and on Synthetic CHI Files.
+    Reports the Largest Ep, Ip, and Baseline Bound Differences and the Speedup of Each Engine.
+    Also Checks that the Streamed CV Frames Match the Frames of the Whole File (Split at the Same Vertices), and
+    that a Movie Chunk or Frame Stride Starting on a Cycle Without a Peak Shows the Same Frames as the Full Movie.
+    Exits with an Error if Any Engine is Outside the Tolerances or Any Frames Differ.
+
+Only TXT/CSV Files Exported from CHI are Compared (They are Read Without Excel).
+"""
+
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import os
+import sys
+import numpy as np
+
+# Import Python Files for Data Extraction
+sys.path.append('./Helper Files/Data Extraction/')
+import processDataCV
+import syntheticData
+import engineComparison
+# Import Python Files for Plotting (the movie frames are only compared, not written)
+sys.path.append('./Helper Files/Plotting/')
+import dataPlotting
+dataPlotting.plt.switch_backend("Agg")
+
+# ---------------------------------------------------------------------------#
+# ------------------------------ Program Begins -----------------------------#
+
+if __name__ == "__main__":
+    # ---------------------------------------------------------------------- #
+    #    User Parameters to Edit (More Complex Edits are Inside the Files)   #
+    # ---------------------------------------------------------------------- #
+
+    # Specify the Data Folders to Compare (TXT/CSV Files Exported from CHI)
+    dataDirectories = ["./Data/2022-03-23 MQ HCF/", "./Data/Jose/"]
+    numInitCyclesToSkip = 1         # Number of Beginning Cycles to Skip (As in mainProtocol.py).
+
+    # Specify the Synthetic Corpus (See syntheticData.syntheticCV for All Options)
+    syntheticDirectory = "./Equivalence/Synthetic Data/"
+    numSyntheticCycles = 50
+    syntheticCorpus = {
+        "singlePeak": dict(),
+        "finePeak": dict(sampleInterval = 0.0002),
+        "twoPeaks": dict(peaks = [dict(peakPotential = 0.45, peakSeparation = 0.06, peakHeight = 6e-6, peakWidth = 0.04),
+                                  dict(peakPotential = 0.9, peakSeparation = 0.1, peakHeight = 1e-5, peakWidth = 0.05)]),
+        "noisyPeak": dict(noiseCurrent = 3e-7, randomSeed = 1),
+    }
+
+    # Specify the Largest Allowed Differences from the Reference
+    peakPotentialTolerance = 1e-6   # Volts
+    peakCurrentTolerance = 1e-6     # Relative to the Reference Peak Current
+    baselineBoundsTolerance = 0     # Data Points
+    # Specify the Number of Cycles Each File Must Keep (NiHCF Has a Sweep with One Repeated Point in Cycle 36)
+    expectedNumCycles = {"CV-Carbon-NiHCF-1.txt": 48, "CV-Carbon-NiHCF-2.txt": 48, "CV-Carbon-NiHCF-3.txt": 48}
+    # Specify the Movie Frames to Compare (The Chunk Start and a Strided Frame Have No Peak)
+    numMovieFrames = 10             # Number of Synthetic Cycles in the Movie
+    movieChunkStart = 4             # The First Frame of the Compared Chunk
+    movieFrameStride = 3            # The Compared Frame Stride
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------- Preparation Steps -------------------------- #
+
+    # Initialize analysis classes.
+    analyzeDataCV = processDataCV.processData(numInitCyclesToSkip = numInitCyclesToSkip, useCHIPeaks = False)
+    compareEngines = engineComparison.engineComparison(analyzeDataCV, peakPotentialTolerance, peakCurrentTolerance, baselineBoundsTolerance)
+
+    # Collect the CHI text files.
+    dataFiles = []
+    for dataDirectory in dataDirectories:
+        for fileName in sorted(os.listdir(dataDirectory)):
+            if fileName.endswith((".txt", ".csv")):
+                dataFiles.append(dataDirectory + fileName)
+
+    # Generate the synthetic corpus once.
+    for corpusName, syntheticSettings in syntheticCorpus.items():
+        dataFile = syntheticDirectory + corpusName + "_" + str(numSyntheticCycles) + "cycles.txt"
+        if not os.path.isfile(dataFile):
+            syntheticData.syntheticCV(**syntheticSettings).writeFile(dataFile, numSyntheticCycles)
+        dataFiles.append(dataFile)
+
+    # ---------------------------------------------------------------------- #
+    # -------------------------- Compare Program --------------------------- #
+
+    reportRows = []; frameErrors = []
+    for dataFile in dataFiles:
+        print("\nComparing the Engines on:", dataFile)
+        # Read the CV frames.
+        currentFrames, potentialFrames, timeFrames = [], [], []
+        for currentFrame, potentialFrame, timeFrame in analyzeDataCV.streamCHIFrames(dataFile):
+            currentFrames.append(currentFrame); potentialFrames.append(potentialFrame); timeFrames.append(timeFrame)
+        
+        # The streamed frames must be the frames of the whole file.
+        fullCurrentFrames, fullPotentialFrames, fullTimeFrames = analyzeDataCV.loadCHIFrames(dataFile)
+        if np.shape(potentialFrames) != fullPotentialFrames.shape or not np.array_equal(potentialFrames, fullPotentialFrames) or \
+                not np.array_equal(currentFrames, fullCurrentFrames) or not np.array_equal(timeFrames, fullTimeFrames):
+            frameErrors.append(os.path.basename(dataFile) + ": streamed frames " + str(np.shape(potentialFrames)) + " differ from the whole file " + str(fullPotentialFrames.shape))
+        if expectedNumCycles.get(os.path.basename(dataFile), len(potentialFrames)) != len(potentialFrames):
+            frameErrors.append(os.path.basename(dataFile) + ": kept " + str(len(potentialFrames)) + " cycles instead of " + str(expectedNumCycles[os.path.basename(dataFile)]))
+        if len(potentialFrames) == 0:
+            print("\tNo Complete Cycles Found")
+            continue
+        pointsPerSegment = int(len(potentialFrames[0])/2)
+
+        reportRows.extend(compareEngines.compareEngines(os.path.basename(dataFile), potentialFrames, currentFrames, pointsPerSegment))
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------ Compare Movie Frames ------------------------ #
+
+    # Give the synthetic cycles one peak per scan, missing in the chunk's first frame and in a strided frame.
+    currentFrames, potentialFrames, timeFrames = analyzeDataCV.loadCHIFrames(syntheticDirectory + "singlePeak_" + str(numSyntheticCycles) + "cycles.txt")
+    currentFrames, potentialFrames, timeFrames = currentFrames[:numMovieFrames], potentialFrames[:numMovieFrames], timeFrames[:numMovieFrames]
+    pointsPerSegment = int(len(potentialFrames[0])/2); frameInds = np.arange(numMovieFrames); peakInds = int(pointsPerSegment/4) + frameInds
+    bothPeakPotentialGroups = [[potentialFrames[frameInds, peakInds]], [potentialFrames[frameInds, pointsPerSegment + peakInds]]]
+    bothPeakCurrentGroups = [[currentFrames[frameInds, peakInds]], [currentFrames[frameInds, pointsPerSegment + peakInds]]]
+    bothBaselineBoundsGroups = [[np.stack([peakInds - int(pointsPerSegment/8), peakInds], axis = 1)] for reductiveScan in range(2)]
+    bothBaselineFitGroups = [[currentFrames[:, :pointsPerSegment]], [currentFrames[:, pointsPerSegment:]]]
+    for peakGroups in bothPeakPotentialGroups + bothPeakCurrentGroups:
+        peakGroups[0][[movieChunkStart, 2*movieFrameStride]] = np.nan
+
+    def replayMovieFrames(frameStride, startFrame):
+        # Set the artists of every written frame like plotMovieCV, without writing the movie.
+        plotData = dataPlotting.plotDataCV("movieCheck", "", showFullInfo = True, showPeakCurrent = True, useCHIPeaks = False, seePastCVData = True, frameStride = frameStride)
+        numPeakGroupsBoth = [1, 1]
+        plotData.initializeFigure(numPeakGroupsBoth)
+        plotData.initializePlots(bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, potentialFrames, currentFrames, numPeakGroupsBoth)
+        bothPeakCoVGroups = plotData.runningStatistics.groupCoefficientOfVariation(bothPeakCurrentGroups)
+        movieFrames = {frameNum: plotData.getMovieFrameData() for frameNum in plotData.iterMovieFrames(potentialFrames, currentFrames, timeFrames, bothPeakPotentialGroups, 
+                            bothPeakCurrentGroups, bothPeakCoVGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, numPeakGroupsBoth, startFrame, numMovieFrames)}
+        dataPlotting.plt.close(plotData.figure)
+        return movieFrames
+
+    # Every written frame must match the same frame of the full movie.
+    fullMovieFrames = replayMovieFrames(frameStride = 1, startFrame = 0)
+    for movieName, frameStride, startFrame in [("Chunk", 1, movieChunkStart), ("Stride", movieFrameStride, 0)]:
+        print("\nComparing the Movie Frames of a", movieName)
+        for frameNum, movieFrameData in replayMovieFrames(frameStride, startFrame).items():
+            if len(movieFrameData) != len(fullMovieFrames[frameNum]) or not all(np.array_equal(artistData, fullArtistData, equal_nan = True) 
+                    if isinstance(artistData, np.ndarray) else artistData == fullArtistData for artistData, fullArtistData in zip(movieFrameData, fullMovieFrames[frameNum])):
+                frameErrors.append("Movie " + movieName + ": frame " + str(frameNum) + " differs from the full movie")
+
+    # ---------------------------------------------------------------------- #
+    # --------------------------- Report Results --------------------------- #
+
+    compareEngines.printReport(reportRows)
+    for frameError in frameErrors:
+        print("\tFrame Mismatch:", frameError)
+    if len(frameErrors) != 0:
+        sys.exit("\n" + str(len(frameErrors)) + " CV or Movie Frames Differ")
+    failedRows = [reportRow for reportRow in reportRows if len(reportRow["comparisonErrors"]) != 0]
+    if len(failedRows) != 0:
+        sys.exit("\n" + str(len(failedRows)) + " of " + str(len(reportRows)) + " Engine Comparisons are Outside the Tolerances")
+    print("\nAll Engines Match the Reference Analysis")
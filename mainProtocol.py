@@ -16,14 +16,18 @@ import sys
 # Import Helper Files
 sys.path.append('./Helper Files/')
 
-#Import Plotting Files
+# Plotting Files (dataPlotting and matplotlib are imported only when a movie is rendered)
 sys.path.append('./Helper Files/Plotting/')
-import dataPlotting
+
+# Import the Shared Profiler
+sys.path.append('./Helper Files/Analysis Protocols/')
+from _profilingProtocols import profiler
 
 # Import Python Files for Data Extraction
 sys.path.append('./Helper Files/Data Extraction/')
 import excelProcessing
-import processDataCV
+import cvFileProcessing
+import pipelineProcessing
 
 # ---------------------------------------------------------------------------#
 # ------------------------------ Program Begins -----------------------------#
@@ -39,14 +43,37 @@ if __name__ == "__main__":
     # dataDirectory = "./data/Jose/" # The Folder with the CV Files (TXT/CSV/XLS/XLSX)
     
     # Plotting flags
+    plotMovies = True               # Render the CV Movies (False: Analyze and Save Only; Render Later with renderProtocol.py)
     showPeakCurrent = True          # Display Real-Time Peak Current Data on Right (ONLY IF Peak Current Exists)
     seePastCVData = True            # See All CSV Frames in the Background (with 10% opacity)
     showFullInfo = True             # Plot Peak Potential and See Coefficient of VariationList Plot for peak Current
+    numRenderWorkers = 1            # Number of Processes to Render the Movie in Chunks (1 = Serial Rendering)
+    moviePreset = "full"            # Movie Resolution: "full" (300 dpi), "standard" (150 dpi), "quickLook" (72 dpi)
+    frameStride = 1                 # Only Render Every Nth Cycle (Plus the Last Cycle) in the Movie
+    useBlitting = False             # Redraw Only the Changing Artists (Faster; the Layout and Legend Box are Fixed at the First Cycle)
     # Program flags
     useCHIPeaks = False             # Do not reanalyze the CV curves. Use CHI-given peaks.
+    exportFormats = ("xlsx",)       # Peak Information Files: Any of "xlsx", "csv", "npz" (Binary Columns; Fastest for Long Runs)
     
     # Program 
     numInitCyclesToSkip = 1         # Number of Beginning Cycles to Skip (In the First Few Cycles the Electrode is Adapting).
+    compactStorage = False          # Store the CV Frames and Results as float32 After the Analysis (Half the Memory and Cache Size; Analysis Stays float64).
+    checkCompactStorage = False     # Check the Stored float32 Peaks Match the float64 Analysis to the Reported Digits (Raises a ValueError).
+    reuseUnchangedCycles = False    # Refit the Peaks on the Last Analyzed Baselines if a Cycle Changed Less than maxCycleChange (Long Stability Runs; Serial Analysis Only: Not with Workers, Lockstep, Progressive, or Streaming).
+    maxCycleChange = 0.5            # The Largest RMS Change of the Filtered Current (in Units of the Measurement Noise) to Reuse the Baselines.
+    raggedCyclePolicy = "drop"      # Cycles Without pointsPerSegment Points per Sweep (Found at the Potential Vertices): "drop" or "pad" (Padded Points are Not Analyzed). 1-2 Extra Points are Trimmed.
+    progressiveAnalysis = False     # Analyze a Sparse Subset of Cycles First and Save Provisional Peak CSVs to "Peak Information/Quick Look/", then Backfill (the Movie and Final Files Wait for the Backfill; Serial Analysis Only).
+    numQuickLookCycles = 20         # Number of Cycles in the First Provisional Results.
+    quickLookSpacing = "log"        # Spacing of the Quick Look Cycles: "log" (Denser at the Start) or "even".
+    useAnalysisCache = True         # Reuse the Analysis of Unchanged Files (Same Data, Parameters, and Code).
+    analysisCacheFolder = "./Analysis Cache/"   # Where the Cached Analyses are Stored (Shared Across Data Folders).
+    maxAnalysisCacheSize = 2*1024**3            # Maximum Cache Size in Bytes (Least Recently Used Analyses are Deleted).
+    pipelineFiles = False           # Parse/Analyze/Render/Save Different Files at the Same Time (Movies are Not Shown).
+    pipelineQueueSize = 1           # Number of Files that Can Wait Between Two Pipeline Stages.
+    lockstepReplicates = False      # Analyze the Files with the Same Scan Settings Together (Vectorized Filtering; All Files are Held in Memory).
+    numAnalysisWorkers = 1          # Number of Processes that Analyze the Segments of a File (Frames are Shared in Memory; 1 = Serial Analysis).
+    profileStages = False           # Time Each Stage, Trace its Memory, and Count the Hot Paths: JSON Reports in "CV Analysis/Profiling/" (Serial Runs Only; Tracing Slows the Run).
+    streamCycles = False            # Read, Analyze, Plot, and Save One Cycle at a Time (TXT/CSV Files; Flat Memory for Very Long Runs).
     
     # Specify Which Files You Want to Read
     fileDoesntContain = "N/A"       # Substring that cannot be in analyze filenames.
@@ -56,46 +83,58 @@ if __name__ == "__main__":
     # ------------------------- Preparation Steps -------------------------- #
     
     # Initialize analysis classes.
-    saveData = excelProcessing.saveData()
     extractData = excelProcessing.processFiles()
-    analyzeDataCV = processDataCV.processData(numInitCyclesToSkip, useCHIPeaks)
+    fileProcessor = cvFileProcessing.cvFileProcessor(
+        analysisSettings = dict(numInitCyclesToSkip = numInitCyclesToSkip, useCHIPeaks = useCHIPeaks, compactStorage = compactStorage, checkCompactStorage = checkCompactStorage,
+                                numAnalysisWorkers = numAnalysisWorkers, reuseUnchangedCycles = reuseUnchangedCycles, maxCycleChange = maxCycleChange, raggedCyclePolicy = raggedCyclePolicy),
+        movieSettings = dict(showFullInfo = showFullInfo, showPeakCurrent = showPeakCurrent, useCHIPeaks = useCHIPeaks, seePastCVData = seePastCVData,
+                             numRenderWorkers = numRenderWorkers, moviePreset = moviePreset, frameStride = frameStride, useBlitting = useBlitting),
+        plotMovies = plotMovies, exportFormats = exportFormats, useAnalysisCache = useAnalysisCache, analysisCacheFolder = analysisCacheFolder,
+        maxAnalysisCacheSize = maxAnalysisCacheSize, progressiveAnalysis = progressiveAnalysis, numQuickLookCycles = numQuickLookCycles, quickLookSpacing = quickLookSpacing)
     
     # Get the files to analyze in sorted order
-    cvFiles = extractData.getFiles(dataDirectory, fileDoesntContain, fileContains)
+    dataFiles = [dataDirectory + currentFile for currentFile in extractData.getFiles(dataDirectory, fileDoesntContain, fileContains)]
     
     # Create the output folder if the one the provided does not exist
     outputDirectory = dataDirectory +  "CV Analysis/"
     os.makedirs(outputDirectory, exist_ok = True)
+    # Write the stage timings of every file.
+    if profileStages:
+        assert not (pipelineFiles or streamCycles or lockstepReplicates), "Profiling reports one file at a time (serial runs only)"
+        profiler.enable(outputDirectory + "Profiling/")
     
     # ---------------------------------------------------------------------- #
     # ----------------------------- CV Program ----------------------------- #
     
-    # For each CV file.
-    for currentFile in cvFiles: 
-        
-        # ------------------------ Extract the Data ------------------------ #
-        # Convert and read the data file in an XLSX format.
-        dataFile = dataDirectory + currentFile
-        fileName = os.path.splitext(currentFile)[0]
-        xlWorksheet, xlWorkbook = extractData.getExcelFile(dataFile, outputDirectory, testSheetNum = 0, excelDelimiter = ",")
-        # ------------------------------------------------------------------ # 
-
-        # ------------------------ Analyze the Data ------------------------ #
-        # Extract the information from the file
-        bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, \
-            currentFrames, potentialFrames, timeFrames = analyzeDataCV.processCV(xlWorksheet, xlWorkbook)
-        # ------------------------------------------------------------------ # 
-
-        # --------------------- Plot and Save the Data --------------------- #
-        # Plot the CV Data
-        plotData = dataPlotting.plotDataCV(fileName, outputDirectory, showFullInfo, showPeakCurrent, useCHIPeaks, seePastCVData)
-        plotData.plotCurves(potentialFrames, currentFrames, timeFrames, bothPeakPotentialGroups, 
-                            bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups)
-        
-        # Save the Data
-        savePeakInfoFolder = outputDirectory + "Peak Information/"
-        saveData.saveDataCV(bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, \
-                            savePeakInfoFolder, fileName + ".xlsx", sheetName = "CV Analysis")
-        # ------------------------------------------------------------------ # 
-        
-
+    if streamCycles:
+        # Stream every file (the cache, database, and saved results need the full frames).
+        assert not useCHIPeaks, "Streaming reanalyzes the CV curves"
+        for dataFile in dataFiles:
+            fileProcessor.streamFile(dataFile)
+    elif lockstepReplicates:
+        # Analyze all the files first, then plot and save each file.
+        for fileInfo in fileProcessor.analyzeReplicates([fileProcessor.extractFile(dataFile) for dataFile in dataFiles]):
+            fileProcessor.saveFile(fileProcessor.renderFile(fileInfo))
+    elif pipelineFiles:
+        # Overlap the stages of consecutive files (the movies are rendered off the main thread).
+        if plotMovies:
+            import matplotlib.pyplot as plt
+            plt.switch_backend("Agg")
+        cvPipeline = pipelineProcessing.filePipeline([("Parse", fileProcessor.extractFile), ("Analyze", fileProcessor.analyzeFile), ("Render", fileProcessor.renderFile), ("Save", fileProcessor.saveFile)],
+                                                     queueSize = pipelineQueueSize)
+        cvPipeline.run(dataFiles)
+        cvPipeline.printUtilization()
+    else:
+        # For each CV file.
+        for dataFile in dataFiles: 
+            profiler.startFile(os.path.basename(dataFile))
+            with profiler.stage("Parse"): fileInfo = fileProcessor.extractFile(dataFile)
+            with profiler.stage("Analyze"): fileInfo = fileProcessor.analyzeFile(fileInfo)
+            with profiler.stage("Render"): fileInfo = fileProcessor.renderFile(fileInfo)
+            with profiler.stage("Save"): fileProcessor.saveFile(fileInfo)
+            profiler.finishFile()
+        # Summarize the stage timings of the batch.
+        profiler.saveSummary()
+    
+    # Close the worker pool and the peak databases.
+    fileProcessor.close()
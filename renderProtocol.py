@@ -0,0 +1,80 @@
+"""
+Re-Render the CV Movies from Saved Analysis Results (No Parsing or Analysis).
+    The Results are Saved by mainProtocol.py in "<dataDirectory>CV Analysis/Analysis Results/"
+
+Need to Install in the Python Enviroment Beforehand:
+    % conda install ffmpeg ffmpeg-python
+"""
+
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import os
+import sys
+
+#Import Plotting Files
+sys.path.append('./Helper Files/Plotting/')
+import dataPlotting
+
+# Import Python Files for Saved Results
+sys.path.append('./Helper Files/Data Extraction/')
+import resultsProcessing
+
+# ---------------------------------------------------------------------------#
+# ------------------------------ Program Begins -----------------------------#
+
+if __name__ == "__main__":
+    # ---------------------------------------------------------------------- #
+    #    User Parameters to Edit (More Complex Edits are Inside the Files)   #
+    # ---------------------------------------------------------------------- #
+
+    # Specify the Directory with All the Data (The Same Folder Given to mainProtocol.py)
+    dataDirectory = "./data/2022-03-23 MQ HCF/" # The Folder with the CV Files (TXT/CSV/XLS/XLSX)
+
+    # Plotting flags
+    showPeakCurrent = True          # Display Real-Time Peak Current Data on Right (ONLY IF Peak Current Exists)
+    seePastCVData = True            # See All CSV Frames in the Background (with 10% opacity)
+    showFullInfo = True             # Plot Peak Potential and See Coefficient of VariationList Plot for peak Current
+    numRenderWorkers = 1            # Number of Processes to Render the Movie in Chunks (1 = Serial Rendering)
+    moviePreset = "full"            # Movie Resolution: "full" (300 dpi), "standard" (150 dpi), "quickLook" (72 dpi)
+    frameStride = 1                 # Only Render Every Nth Cycle (Plus the Last Cycle) in the Movie
+    useBlitting = False             # Redraw Only the Changing Artists (Faster; the Layout and Legend Box are Fixed at the First Cycle)
+    # Program flags
+    useCHIPeaks = False             # The Results Were Made with CHI-given peaks.
+
+    # Specify Which Files You Want to Render
+    fileDoesntContain = "N/A"       # Substring that cannot be in rendered filenames.
+    fileContains = ""               # Substring that must be in rendered filenames.
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------- Preparation Steps -------------------------- #
+
+    # Initialize the results class.
+    analysisResults = resultsProcessing.analysisResults()
+
+    # Get the saved results in sorted order
+    outputDirectory = dataDirectory +  "CV Analysis/"
+    resultsFolder = outputDirectory + "Analysis Results/"
+    resultFiles = analysisResults.getResultFiles(resultsFolder, fileDoesntContain, fileContains)
+    if len(resultFiles) == 0:
+        sys.exit("No Analysis Results Found in: " + resultsFolder + " (Run mainProtocol.py First)")
+
+    # ---------------------------------------------------------------------- #
+    # --------------------------- Render Program --------------------------- #
+
+    # For each saved result.
+    for resultFile in resultFiles:
+        fileName = os.path.splitext(resultFile)[0]
+        print("\nRendering Data:", fileName)
+
+        # Load the analysis results.
+        bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, \
+            currentFrames, potentialFrames, timeFrames = analysisResults.loadResults(resultsFolder + resultFile)
+
+        # Plot the CV Data
+        plotData = dataPlotting.plotDataCV(fileName, outputDirectory, showFullInfo, showPeakCurrent, useCHIPeaks, seePastCVData, numRenderWorkers = numRenderWorkers,
+                                           moviePreset = moviePreset, frameStride = frameStride, useBlitting = useBlitting)
+        plotData.plotCurves(potentialFrames, currentFrames, timeFrames, bothPeakPotentialGroups,
+                            bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups)
+
@@ -0,0 +1,112 @@
+
+"""
+Keep the CV Analysis Loaded and Analyze the Files Sent by clientProtocol.py (Scripted Pipelines, One File at a Time).
+    The Imports, Analysis Classes, Filter Designs, Analysis Cache, and Worker Pool Stay Warm Between Files.
+    Each File is Analyzed Like in mainProtocol.py and the Outputs are Saved in "<dataFolder>CV Analysis/".
+    Stop the Server with "python clientProtocol.py --shutdown" or Ctrl-C.
+
+Need to Install in the Python Enviroment Beforehand:
+    $ conda install openpyxl
+    % conda install ffmpeg ffmpeg-python
+"""
+
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import os
+import sys
+import tempfile
+
+# Plotting Files (dataPlotting and matplotlib are imported at startup only when movies are rendered)
+sys.path.append('./Helper Files/Plotting/')
+
+# Import Python Files for Data Extraction
+sys.path.append('./Helper Files/Data Extraction/')
+import cvFileProcessing
+import analysisServer
+import syntheticData
+
+# ---------------------------------------------------------------------------#
+# ------------------------------ Program Begins -----------------------------#
+
+if __name__ == "__main__":
+    # ---------------------------------------------------------------------- #
+    #    User Parameters to Edit (More Complex Edits are Inside the Files)   #
+    # ---------------------------------------------------------------------- #
+
+    # Specify Where the Server Listens
+    socketPath = analysisServer.defaultSocketPath   # The Unix Socket the Clients Connect To
+    maxConcurrent = 1               # Number of Files Handled at Once in Threads (Overlaps Reading, Saving, and Rendering; the Analysis Shares One Core, so Use numAnalysisWorkers for More Cores)
+
+    # Plotting flags (Each Request Can Turn the Movies Off)
+    plotMovies = True               # Render the CV Movies (False: Analyze and Save Only; Render Later with renderProtocol.py)
+    showPeakCurrent = True          # Display Real-Time Peak Current Data on Right (ONLY IF Peak Current Exists)
+    seePastCVData = True            # See All CSV Frames in the Background (with 10% opacity)
+    showFullInfo = True             # Plot Peak Potential and See Coefficient of VariationList Plot for peak Current
+    moviePreset = "standard"        # Movie Resolution: "full" (300 dpi), "standard" (150 dpi), "quickLook" (72 dpi)
+    frameStride = 1                 # Only Render Every Nth Cycle (Plus the Last Cycle) in the Movie
+    useBlitting = False             # Redraw Only the Changing Artists (Faster; the Layout and Legend Box are Fixed at the First Cycle)
+    # Program flags
+    useCHIPeaks = False             # Do not reanalyze the CV curves. Use CHI-given peaks.
+    exportFormats = ("xlsx",)       # Peak Information Files: Any of "xlsx", "csv", "npz" (Binary Columns; Fastest for Long Runs)
+
+    # Program
+    numInitCyclesToSkip = 1         # Number of Beginning Cycles to Skip (In the First Few Cycles the Electrode is Adapting).
+    compactStorage = False          # Store the CV Frames and Results as float32 After the Analysis (Half the Memory and Cache Size; Analysis Stays float64).
+    checkCompactStorage = False     # Check the Stored float32 Peaks Match the float64 Analysis to the Reported Digits (Raises a ValueError).
+    reuseUnchangedCycles = False    # Refit the Peaks on the Last Analyzed Baselines if a Cycle Changed Less than maxCycleChange (Serial Analysis Only: numAnalysisWorkers = 1).
+    maxCycleChange = 0.5            # The Largest RMS Change of the Filtered Current (in Units of the Measurement Noise) to Reuse the Baselines.
+    raggedCyclePolicy = "drop"      # Cycles Without pointsPerSegment Points per Sweep (Found at the Potential Vertices): "drop" or "pad" (Padded Points are Not Analyzed). 1-2 Extra Points are Trimmed.
+    numAnalysisWorkers = 1          # Number of Processes that Analyze the Segments of a File (One Pool is Kept Open; 1 = Serial Analysis).
+    warmUpAnalysis = True           # Analyze a Small Synthetic File at Startup so the First Request Finds Everything Loaded.
+    useAnalysisCache = True         # Reuse the Analysis of Unchanged Files (Same Data, Parameters, and Code).
+    analysisCacheFolder = "./Analysis Cache/"   # Where the Cached Analyses are Stored (Shared Across Data Folders).
+    maxAnalysisCacheSize = 2*1024**3            # Maximum Cache Size in Bytes (Least Recently Used Analyses are Deleted).
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------- Preparation Steps -------------------------- #
+
+    # Initialize the analysis of each file (each concurrent file has its own analysis classes; one worker pool is kept open).
+    fileProcessor = cvFileProcessing.cvFileProcessor(
+        analysisSettings = dict(numInitCyclesToSkip = numInitCyclesToSkip, useCHIPeaks = useCHIPeaks, compactStorage = compactStorage, checkCompactStorage = checkCompactStorage,
+                                numAnalysisWorkers = numAnalysisWorkers, reuseUnchangedCycles = reuseUnchangedCycles, maxCycleChange = maxCycleChange, raggedCyclePolicy = raggedCyclePolicy),
+        movieSettings = dict(showFullInfo = showFullInfo, showPeakCurrent = showPeakCurrent, useCHIPeaks = useCHIPeaks, seePastCVData = seePastCVData,
+                             moviePreset = moviePreset, frameStride = frameStride, useBlitting = useBlitting),
+        plotMovies = plotMovies, exportFormats = exportFormats, useAnalysisCache = useAnalysisCache, analysisCacheFolder = analysisCacheFolder,
+        maxAnalysisCacheSize = maxAnalysisCacheSize, numWorkers = maxConcurrent)
+    # The movies are rendered off the main thread.
+    if plotMovies:
+        import matplotlib.pyplot as plt
+        import dataPlotting
+        plt.switch_backend("Agg")
+
+    # Load the analysis before the first request: the lazy imports, the Excel conversion, and the filter designs.
+    if warmUpAnalysis:
+        with tempfile.TemporaryDirectory() as warmUpDirectory:
+            warmUpFile = os.path.join(warmUpDirectory, "warmUp.txt")
+            syntheticData.syntheticCV().writeFile(warmUpFile, numInitCyclesToSkip + 2)
+            for extractData, analyzeDataCV in fileProcessor.workerClasses:
+                xlWorksheet, xlWorkbook = extractData.getExcelFile(warmUpFile, os.path.join(warmUpDirectory, "CV Analysis", ""), testSheetNum = 0, excelDelimiter = ",")
+                analyzeDataCV.processCV(xlWorksheet, xlWorkbook)
+        print("\nFinished Warming Up the Analysis")
+
+    # ---------------------------------------------------------------------- #
+    # ----------------------------- CV Program ----------------------------- #
+
+    def analyzeDataFile(dataFile, workerInd, options):
+        # Analyze, save, and render the file like mainProtocol.py (each request can turn the movie off).
+        fileInfo = fileProcessor.processFile(dataFile, workerInd, plotMovies = options.get("plotMovies", True))
+        bothPeakPotentialGroups, bothPeakCurrentGroups, bothBaselineBoundsGroups, bothBaselineFitGroups, \
+            currentFrames, potentialFrames, timeFrames = fileInfo["analysisResults"]
+
+        return dict(fileName = fileInfo["fileName"], outputDirectory = os.path.abspath(fileInfo["outputDirectory"]), numCycles = len(currentFrames),
+                    usedCache = fileInfo["usedCache"], renderedMovie = fileInfo["renderedMovie"],
+                    peaks = cvFileProcessing.summarizePeakGroups(bothPeakPotentialGroups, bothPeakCurrentGroups, options.get("returnPeaks", False)))
+
+    # Analyze the submitted files until the server is stopped.
+    cvServer = analysisServer.analysisServer(analyzeDataFile, socketPath, maxConcurrent)
+    cvServer.run()
+
+    # Close the worker pool and the peak databases.
+    fileProcessor.close()
@@ -0,0 +1,85 @@
+
+"""
+Sweep the CV Analysis Parameters on the Data Files, Reusing Every Analysis Stage the Parameter Sets Share.
+    For Example, Changing the Peak Grouping Threshold Reuses the Parsed Data, Filtered Data, and Peaks.
+    The Peak Groups Found with Each Parameter Set are Saved in "<dataDirectory>CV Analysis/Parameter Sweep/sweepSummary.csv".
+"""
+
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import os
+import sys
+import csv
+import numpy as np
+
+# Import Python Files for Data Extraction
+sys.path.append('./Helper Files/Data Extraction/')
+import excelProcessing
+import parameterSweep
+
+# ---------------------------------------------------------------------------#
+# ------------------------------ Program Begins -----------------------------#
+
+if __name__ == "__main__":
+    # ---------------------------------------------------------------------- #
+    #    User Parameters to Edit (More Complex Edits are Inside the Files)   #
+    # ---------------------------------------------------------------------- #
+
+    # Specify the Directory with All the Data (CSV Files Exported from CHI)
+    dataDirectory = "./data/2022-03-23 MQ HCF/" # The Folder with the CV Files (TXT/CSV/XLSX)
+    fileDoesntContain = "N/A"       # Substring that cannot be in analyze filenames.
+    fileContains = ""               # Substring that must be in analyze filenames.
+
+    # Specify the Parameter Grid (Parameters Not Listed Keep Their Current Values)
+    parameterGrid = {
+        "lowPassCutoff": [50, 100, 200],                    # Low Pass Filter Cutoff (Filter Stage)
+        "minBaselinePoints": [10, 20],                      # Fewest Points Between the Baseline Points (Peaks Stage)
+        "maxPeakPotentialDeviation": [0.05, 0.07, 0.1],     # Potential Difference (V) that Defines a New Peak Group (Grouping Stage)
+    }
+    numInitCyclesToSkip = 1         # Number of Beginning Cycles to Skip (In the First Few Cycles the Electrode is Adapting).
+    numSweepWorkers = 1             # Number of Processes Evaluating the Grid (Each Reuses the Stages of its Part of the Grid).
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------- Preparation Steps -------------------------- #
+
+    # Initialize analysis classes.
+    extractData = excelProcessing.processFiles()
+    cvSweep = parameterSweep.parameterSweep(numInitCyclesToSkip, keepBaselineFits = False)
+
+    # Get the files to analyze in sorted order
+    cvFiles = extractData.getFiles(dataDirectory, fileDoesntContain, fileContains)
+    # Create the output folder.
+    sweepFolder = dataDirectory + "CV Analysis/Parameter Sweep/"
+    os.makedirs(sweepFolder, exist_ok = True)
+
+    # ---------------------------------------------------------------------- #
+    # --------------------------- Sweep Program ---------------------------- #
+
+    summaryRows = []
+    for currentFile in cvFiles:
+        sweepResults = cvSweep.runSweep(dataDirectory + currentFile, parameterGrid, numSweepWorkers)
+        # Summarize the peak groups of every parameter set.
+        for sweepResult in sweepResults:
+            bothPeakPotentialGroups, bothPeakCurrentGroups = sweepResult["peakGroups"][0:2]
+            summaryRow = dict(fileName = currentFile, **sweepResult["parameters"])
+            for reductiveScan, peakType in enumerate(["oxidation", "reduction"]):
+                peakCurrentGroups = np.asarray(bothPeakCurrentGroups[reductiveScan], dtype=float)
+                summaryRow[peakType + "PeakGroups"] = len(peakCurrentGroups)
+                # The fraction of cycles where each group has a peak.
+                summaryRow[peakType + "PeakCoverage"] = " ".join("%.3f" % np.mean(~np.isnan(peakCurrents)) for peakCurrents in peakCurrentGroups)
+            summaryRows.append(summaryRow)
+        # Free the stages of this file.
+        cvSweep.clearStages()
+    cvSweep.printStageCounts()
+
+    # ---------------------------------------------------------------------- #
+    # --------------------------- Report Results --------------------------- #
+
+    summaryFile = sweepFolder + "sweepSummary.csv"
+    with open(summaryFile, "w", newline = "") as summaryCSV:
+        csvWriter = csv.DictWriter(summaryCSV, fieldnames = list(summaryRows[0].keys()) if summaryRows else ["fileName"])
+        csvWriter.writeheader()
+        csvWriter.writerows(summaryRows)
+    print("\nSaved the Sweep Summary to:", summaryFile)
@@ -0,0 +1,96 @@
+
+"""
+Watch the Data Folders and Analyze Every New or Changed CV Export as Soon as the Instrument Finishes Writing It.
+    Each File is Analyzed Like in mainProtocol.py and the Outputs are Saved in "<watchFolder>CV Analysis/".
+    The State of Every File (waiting, queued, analyzing, done, failed) is in "CV Analysis/watchStatus.json".
+    Stop Watching with Ctrl-C.
+
+Need to Install in the Python Enviroment Beforehand:
+    $ conda install openpyxl
+    % conda install ffmpeg ffmpeg-python
+"""
+
+# -------------------------------------------------------------------------- #
+# ----------------------------- Import Modules ----------------------------- #
+
+# Basic Modules
+import sys
+
+# Plotting Files (dataPlotting and matplotlib are imported only when a movie is rendered)
+sys.path.append('./Helper Files/Plotting/')
+
+# Import Python Files for Data Extraction
+sys.path.append('./Helper Files/Data Extraction/')
+import cvFileProcessing
+import folderWatcher
+
+# ---------------------------------------------------------------------------#
+# ------------------------------ Program Begins -----------------------------#
+
+if __name__ == "__main__":
+    # ---------------------------------------------------------------------- #
+    #    User Parameters to Edit (More Complex Edits are Inside the Files)   #
+    # ---------------------------------------------------------------------- #
+
+    # Specify the Folders the Instrument Exports To
+    watchFolders = ["./data/2022-03-23 MQ HCF/"]
+    fileExtensions = (".txt", ".csv", ".xlsx")    # The Data Files to Analyze
+
+    # Watching flags
+    pollInterval = 1                # Seconds Between Checks of the Folders
+    stableTime = 2                  # Seconds a File Must Stay the Same Size Before it is Analyzed (The Export is Finished)
+    maxConcurrent = 2               # Number of Files Handled at Once in Threads (Overlaps Reading, Saving, and Rendering; the Analysis Shares One Core, so Use numAnalysisWorkers for More Cores)
+
+    # Plotting flags
+    plotMovies = True               # Render the CV Movies (False: Analyze and Save Only; Render Later with renderProtocol.py)
+    showPeakCurrent = True          # Display Real-Time Peak Current Data on Right (ONLY IF Peak Current Exists)
+    seePastCVData = True            # See All CSV Frames in the Background (with 10% opacity)
+    showFullInfo = True             # Plot Peak Potential and See Coefficient of VariationList Plot for peak Current
+    moviePreset = "standard"        # Movie Resolution: "full" (300 dpi), "standard" (150 dpi), "quickLook" (72 dpi)
+    frameStride = 1                 # Only Render Every Nth Cycle (Plus the Last Cycle) in the Movie
+    useBlitting = False             # Redraw Only the Changing Artists (Faster; the Layout and Legend Box are Fixed at the First Cycle)
+    # Program flags
+    useCHIPeaks = False             # Do not reanalyze the CV curves. Use CHI-given peaks.
+    exportFormats = ("xlsx",)       # Peak Information Files: Any of "xlsx", "csv", "npz" (Binary Columns; Fastest for Long Runs)
+
+    # Program
+    numInitCyclesToSkip = 1         # Number of Beginning Cycles to Skip (In the First Few Cycles the Electrode is Adapting).
+    compactStorage = False          # Store the CV Frames and Results as float32 After the Analysis (Half the Memory and Cache Size; Analysis Stays float64).
+    checkCompactStorage = False     # Check the Stored float32 Peaks Match the float64 Analysis to the Reported Digits (Raises a ValueError).
+    reuseUnchangedCycles = False    # Refit the Peaks on the Last Analyzed Baselines if a Cycle Changed Less than maxCycleChange (Serial Analysis Only: numAnalysisWorkers = 1).
+    maxCycleChange = 0.5            # The Largest RMS Change of the Filtered Current (in Units of the Measurement Noise) to Reuse the Baselines.
+    raggedCyclePolicy = "drop"      # Cycles Without pointsPerSegment Points per Sweep (Found at the Potential Vertices): "drop" or "pad" (Padded Points are Not Analyzed). 1-2 Extra Points are Trimmed.
+    numAnalysisWorkers = 1          # Number of Processes that Analyze the Segments of a File (One Pool is Shared by the Files; 1 = Serial Analysis).
+    useAnalysisCache = True         # Reuse the Analysis of Unchanged Files (Same Data, Parameters, and Code).
+    analysisCacheFolder = "./Analysis Cache/"   # Where the Cached Analyses are Stored (Shared Across Data Folders).
+    maxAnalysisCacheSize = 2*1024**3            # Maximum Cache Size in Bytes (Least Recently Used Analyses are Deleted).
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------- Preparation Steps -------------------------- #
+
+    # Initialize the analysis of each file (each concurrent file has its own analysis classes).
+    fileProcessor = cvFileProcessing.cvFileProcessor(
+        analysisSettings = dict(numInitCyclesToSkip = numInitCyclesToSkip, useCHIPeaks = useCHIPeaks, compactStorage = compactStorage, checkCompactStorage = checkCompactStorage,
+                                numAnalysisWorkers = numAnalysisWorkers, reuseUnchangedCycles = reuseUnchangedCycles, maxCycleChange = maxCycleChange, raggedCyclePolicy = raggedCyclePolicy),
+        movieSettings = dict(showFullInfo = showFullInfo, showPeakCurrent = showPeakCurrent, useCHIPeaks = useCHIPeaks, seePastCVData = seePastCVData,
+                             moviePreset = moviePreset, frameStride = frameStride, useBlitting = useBlitting),
+        plotMovies = plotMovies, exportFormats = exportFormats, useAnalysisCache = useAnalysisCache, analysisCacheFolder = analysisCacheFolder,
+        maxAnalysisCacheSize = maxAnalysisCacheSize, numWorkers = maxConcurrent)
+    # The movies are rendered off the main thread.
+    if plotMovies:
+        import matplotlib.pyplot as plt
+        plt.switch_backend("Agg")
+
+    # ---------------------------------------------------------------------- #
+    # ----------------------------- CV Program ----------------------------- #
+
+    def analyzeDataFile(dataFile, workerInd):
+        # Analyze, save, and render the file like mainProtocol.py.
+        fileProcessor.processFile(dataFile, workerInd)
+
+    # Analyze the files as they arrive.
+    cvWatcher = folderWatcher.folderWatcher(watchFolders, analyzeDataFile, fileExtensions, pollInterval, stableTime, maxConcurrent)
+    cvWatcher.run()
+
+    # Close the worker pool and the peak databases.
+    fileProcessor.close()